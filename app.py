@@ -5,7 +5,7 @@ Serves the dashboard and runs the aggregator on a schedule
 import os
 import threading
 import time
-from flask import Flask, send_from_directory, jsonify, redirect
+from flask import Flask, send_from_directory, jsonify, redirect, request
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -38,12 +38,211 @@ def index():
     """, 200
 
 
+@app.route("/freshness.json")
+def freshness():
+    """When the dashboard content last changed and was last checked"""
+    if not os.path.exists(os.path.join(DASHBOARD_DIR, "freshness.json")):
+        return jsonify({}), 404
+    response = send_from_directory(DASHBOARD_DIR, "freshness.json")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/health")
 def health():
     """Health check endpoint for Render"""
     return jsonify({"status": "ok"}), 200
 
 
+@app.route("/search")
+def search():
+    """Full-text search over everything the aggregator has collected"""
+    from outputs.search_index import search_items
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"status": "error", "message": "Missing q parameter"}), 400
+
+    limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+    started = time.perf_counter()
+    results = search_items(
+        query,
+        limit=limit,
+        kind=request.args.get("kind"),
+        days=request.args.get("days", type=int),
+    )
+    took_ms = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify({"query": query, "count": len(results), "took_ms": took_ms, "results": results}), 200
+
+
+_ranking_cache = {"snapshot": None, "features": None}
+_ranking_lock = threading.Lock()
+
+
+def _latest_features():
+    """Feature arrays for the latest run snapshot, rebuilt only when a new snapshot lands"""
+    from outputs.snapshots import list_snapshots, load_snapshot
+    from processing import ItemFeatures, link_raises
+
+    entries = list_snapshots()
+    if not entries:
+        return None
+    with _ranking_lock:
+        if _ranking_cache["snapshot"] != entries[-1]["id"]:
+            snapshot = load_snapshot(entries[-1]["id"])
+            link_raises(snapshot["articles"], snapshot["raises"])
+            _ranking_cache["features"] = ItemFeatures(snapshot["articles"], snapshot["raises"])
+            _ranking_cache["snapshot"] = entries[-1]["id"]
+        return _ranking_cache["features"]
+
+
+@app.route("/api/top")
+def top_items():
+    """Ranked items per section from the latest run; numeric weights can be overridden via query args"""
+    from processing.scoring import SECTIONS, score_items, top_k
+    import config
+
+    features = _latest_features()
+    if features is None:
+        return jsonify({"status": "error", "message": "No run snapshot available yet"}), 503
+
+    k = max(1, min(request.args.get("k", 15, type=int), 200))
+    sections = [request.args["section"]] if request.args.get("section") else SECTIONS
+    if any(section not in SECTIONS for section in sections):
+        return jsonify({"status": "error", "message": f"section must be one of {SECTIONS}"}), 400
+    weights = {
+        name: request.args.get(name, type=float)
+        for name, value in config.SCORING_WEIGHTS.items()
+        if isinstance(value, float) and request.args.get(name) is not None
+    }
+
+    try:
+        scores = score_items(features, weights)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    result = {}
+    for section in sections:
+        result[section] = [
+            {**features.items[i], "score": round(float(scores[i]), 4)}
+            for i in top_k(scores, features.section_mask(section), k)
+        ]
+    return jsonify({"snapshot": _ranking_cache["snapshot"], "sections": result}), 200
+
+
+_investor_cache = {"version": None, "graph": None}
+_investor_lock = threading.Lock()
+
+
+def _investor_graph():
+    """Co-investment graph, reloaded only when new participations have been stored"""
+    from processing.investors import graph_version, load_graph
+
+    version = graph_version()
+    with _investor_lock:
+        if _investor_cache["version"] != version:
+            _investor_cache["graph"] = load_graph() if version is not None else None
+            _investor_cache["version"] = version
+        return _investor_cache["graph"]
+
+
+def _investor_query(run):
+    """Run a graph query with the shared 503/400 handling and timing"""
+    from processing.investors import SECTORS
+
+    graph = _investor_graph()
+    if graph is None:
+        return jsonify({"status": "error", "message": "No investor graph yet"}), 503
+    sector = request.args.get("sector")
+    if sector is not None and sector not in SECTORS:
+        return jsonify({"status": "error", "message": f"sector must be one of {SECTORS}"}), 400
+    started = time.perf_counter()
+    result = run(graph, sector)
+    if result is None:
+        return jsonify({"status": "error", "message": "Investor not found"}), 404
+    return jsonify({**result, "took_ms": round((time.perf_counter() - started) * 1000, 2)}), 200
+
+
+@app.route("/api/investors/<name>/coinvestors")
+def coinvestors(name):
+    """Funds co-investing most often (or by="amount") with name, optionally over the last `days` days"""
+    def run(graph, sector):
+        node = graph.find(name)
+        if node is None:
+            return None
+        return {"investor": graph.names[node], "coinvestors": graph.top_coinvestors(
+            name,
+            k=max(1, min(request.args.get("k", 10, type=int), 200)),
+            by="amount" if request.args.get("by") == "amount" else "count",
+            days=request.args.get("days", type=int),
+            sector=sector,
+        )}
+    return _investor_query(run)
+
+
+@app.route("/api/investors/<name>/network")
+def investor_network(name):
+    """Ego network: name, its k strongest co-investors and the edges among them"""
+    k = max(1, min(request.args.get("k", 20, type=int), 100))
+    return _investor_query(lambda graph, sector: graph.ego_network(name, k))
+
+
+@app.route("/api/investors/path")
+def investor_path():
+    """Shortest syndicate chain between two funds (?from=&to=, optional min_deals per hop)"""
+    def run(graph, sector):
+        source, target = request.args.get("from", ""), request.args.get("to", "")
+        if graph.find(source) is None or graph.find(target) is None:
+            return None
+        hops = graph.shortest_path(source, target, min_deals=request.args.get("min_deals", 1, type=int))
+        return {"connected": hops is not None, "hops": hops or []}
+    return _investor_query(run)
+
+
+@app.route("/api/investors/active")
+def active_investors():
+    """Most active funds in the last `days` days; new=1 keeps funds with no earlier deal (in the sector)"""
+    return _investor_query(lambda graph, sector: {"investors": graph.active_investors(
+        days=request.args.get("days", 30, type=int),
+        sector=sector,
+        new_only=request.args.get("new", "0") not in ("0", "false", ""),
+        k=max(1, min(request.args.get("k", 20, type=int), 200)),
+    )})
+
+
+@app.route("/websub/callback/<source>", methods=["GET", "POST"])
+def websub_callback(source):
+    """WebSub subscriber callback: intent verification (GET) and content distribution (POST)"""
+    from collectors import websub
+
+    if request.method == "GET":
+        challenge = websub.verify_intent(source, request.args.to_dict())
+        if challenge is None:
+            return "Unknown subscription", 404
+        return challenge, 200, {"Content-Type": "text/plain"}
+
+    articles = websub.ingest_push(source, request.get_data(), request.headers.get("X-Hub-Signature", ""))
+    if articles:
+        # Make pushed posts searchable right away, and mark rss changed so the
+        # dashboard (and other rss followers) rebuild without waiting for a poll
+        from outputs.search_index import index_items
+        from scheduler import add_items
+        try:
+            index_items(articles, [])
+            add_items("rss", articles)
+        except Exception as e:
+            print(f"[WebSub] Error storing {source}: {e}")
+        print(f"[WebSub] {len(articles)} new items pushed for {source}")
+    # Always acknowledge, even for bodies that failed signature checks
+    return "", 204
+
+
+@app.route("/schedule")
+def schedule():
+    """Upcoming scheduler jobs with their cadence and last outcome"""
+    from scheduler import upcoming
+    return jsonify({"jobs": upcoming()})
+
+
 @app.route("/run")
 def trigger_run():
     """Manually trigger the aggregator (useful for testing)"""
@@ -58,6 +257,8 @@ def trigger_run():
                 "send_email": bool(os.getenv("EMAIL_SENDER")),
                 "include_twitter": bool(os.getenv("TWITTER_BEARER_TOKEN")),
                 "build_dashboard": True,
+                "workers": collect_workers(),
+                "deadline_seconds": run_deadline(),
             },
         )
         thread.start()
@@ -66,34 +267,79 @@ def trigger_run():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
-def scheduled_run():
-    """Background thread that runs the aggregator on a schedule"""
-    from main import run_aggregator
+def collect_workers():
+    """Work-queue worker count from COLLECT_WORKERS (None: collect in this process)"""
+    workers = os.getenv("COLLECT_WORKERS")
+    return int(workers) if workers else None
+
+
+def run_deadline():
+    """Collection time budget from RUN_DEADLINE, e.g. "90s" (None: unbounded)"""
+    from deadline import parse_duration
+    value = os.getenv("RUN_DEADLINE")
+    return parse_duration(value) if value else None
 
-    interval_hours = int(os.getenv("RUN_INTERVAL_HOURS", "6"))
-    print(f"[Scheduler] Will run every {interval_hours} hours")
+
+def scheduled_run():
+    """Background thread running each collector and output on its own cadence (config.SCHEDULE)"""
+    from scheduler import run_scheduler
 
     while True:
         try:
-            print("[Scheduler] Running aggregator...")
-            run_aggregator(
-                dry_run=False,
-                push_sheets=bool(os.getenv("SPREADSHEET_ID")),
-                send_email=bool(os.getenv("EMAIL_SENDER")),
-                include_twitter=bool(os.getenv("TWITTER_BEARER_TOKEN")),
-                build_dashboard=True,
-            )
-            print("[Scheduler] Done. Sleeping...")
+            run_scheduler()
         except Exception as e:
             print(f"[Scheduler] Error: {e}")
+            time.sleep(60)
+
+
+def outbox_worker():
+    """Background thread that retries undelivered outputs once their backoff expires"""
+    from outputs.outbox import drain_outbox
+
+    poll_seconds = int(os.getenv("OUTBOX_POLL_SECONDS", "60"))
+    while True:
+        time.sleep(poll_seconds)
+        try:
+            stats = drain_outbox()
+            if stats["delivered"] or stats["failed"]:
+                print(f"[Outbox] {stats['delivered']} delivered, {stats['failed']} failed")
+        except Exception as e:
+            print(f"[Outbox] Error: {e}")
+
+
+def websub_worker():
+    """Background thread that subscribes to discovered hubs and renews leases before they expire
+
+    Every gunicorn worker runs this thread; each renewal slot is claimed in
+    the scheduler's SQLite store, so only one of them contacts the hubs.
+    """
+    from datetime import timedelta
+    from collectors import websub
+    from scheduler import claim_periodic
 
-        time.sleep(interval_hours * 3600)
+    period = timedelta(seconds=int(os.getenv("WEBSUB_RENEW_SECONDS", "3600")))
+    while True:
+        wait = period.total_seconds()
+        try:
+            claimed, wait = claim_periodic("websub", period)
+            if claimed:
+                stats = websub.renew_subscriptions()
+                if stats["requested"] or stats["failed"]:
+                    print(f"[WebSub] {stats['requested']} subscription requests sent, {stats['failed']} failed")
+        except Exception as e:
+            print(f"[WebSub] Error: {e}")
+        time.sleep(wait + 1)
 
 
 # Start the scheduler in a background thread when the app starts
 if os.getenv("ENABLE_SCHEDULER", "true").lower() == "true":
     scheduler_thread = threading.Thread(target=scheduled_run, daemon=True)
     scheduler_thread.start()
+    outbox_thread = threading.Thread(target=outbox_worker, daemon=True)
+    outbox_thread.start()
+    if os.getenv("WEBSUB_CALLBACK_URL"):
+        websub_thread = threading.Thread(target=websub_worker, daemon=True)
+        websub_thread.start()
 
 
 if __name__ == "__main__":
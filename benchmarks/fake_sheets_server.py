@@ -0,0 +1,219 @@
+"""
+Local in-memory stand-in for the Google Sheets values API
+Lets the Sheets output be exercised and benchmarked without Google:
+
+    python -m benchmarks.fake_sheets_server [articles]
+
+Implements values get/update/append/clear and their batch variants, and
+counts every request it serves.
+"""
+import re
+import json
+import time
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+CELL_RE = re.compile(r"^([A-Z]*)(\d*)$")
+PATH_RE = re.compile(r"^/v4/spreadsheets/([^/]+)/values(?:/([^:]+))?(?::(\w+))?$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def parse_range(range_name: str) -> Tuple[str, int, int, int, int]:
+    """Split "Sheet!A2:G9" into (sheet, first row, first col, last row, last col), 0-based, -1 = open"""
+    sheet, _, cells = range_name.rpartition("!")
+    sheet = sheet.strip("'")
+    start, _, end = cells.partition(":")
+    start_col, start_row = CELL_RE.match(start).groups()
+    end_col, end_row = CELL_RE.match(end or start).groups()
+    return (
+        sheet,
+        int(start_row) - 1 if start_row else 0,
+        _column_index(start_col) if start_col else 0,
+        int(end_row) - 1 if end_row else -1,
+        _column_index(end_col) if end_col else -1,
+    )
+
+
+class FakeSpreadsheets:
+    """Spreadsheet id -> sheet name -> rows of cell values"""
+
+    def __init__(self):
+        self.books: Dict[str, Dict[str, List[List[str]]]] = {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def sheet(self, spreadsheet_id: str, name: str) -> List[List[str]]:
+        return self.books.setdefault(spreadsheet_id, {}).setdefault(name, [])
+
+    def read(self, spreadsheet_id: str, range_name: str) -> Dict:
+        name, r0, c0, r1, c1 = parse_range(range_name)
+        rows = self.sheet(spreadsheet_id, name)
+        last = len(rows) - 1 if r1 < 0 else min(r1, len(rows) - 1)
+        values = []
+        for row in rows[r0:last + 1]:
+            cells = row[c0:] if c1 < 0 else row[c0:c1 + 1]
+            while cells and cells[-1] == "":
+                cells = cells[:-1]
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        return {"range": range_name, "majorDimension": "ROWS", "values": values} if values else {"range": range_name}
+
+    def write(self, spreadsheet_id: str, range_name: str, values: List[List], row_offset: int = None) -> Dict:
+        name, r0, c0, _, _ = parse_range(range_name)
+        rows = self.sheet(spreadsheet_id, name)
+        if row_offset is not None:
+            r0 = row_offset
+        for i, new_row in enumerate(values):
+            while len(rows) <= r0 + i:
+                rows.append([])
+            row = rows[r0 + i]
+            if len(row) < c0 + len(new_row):
+                row.extend([""] * (c0 + len(new_row) - len(row)))
+            for j, value in enumerate(new_row):
+                row[c0 + j] = "" if value is None else str(value)
+        return {"updatedRange": range_name, "updatedRows": len(values)}
+
+    def clear(self, spreadsheet_id: str, range_name: str):
+        name, r0, c0, r1, c1 = parse_range(range_name)
+        rows = self.sheet(spreadsheet_id, name)
+        last = len(rows) - 1 if r1 < 0 else min(r1, len(rows) - 1)
+        for row in rows[r0:last + 1]:
+            end = len(row) if c1 < 0 else min(c1 + 1, len(row))
+            for j in range(c0, end):
+                row[j] = ""
+
+    def used_rows(self, spreadsheet_id: str, name: str, c0: int, c1: int) -> int:
+        rows = self.sheet(spreadsheet_id, name)
+        used = 0
+        for i, row in enumerate(rows):
+            if any(row[c0:(None if c1 < 0 else c1 + 1)]):
+                used = i + 1
+        return used
+
+
+class _Handler(BaseHTTPRequestHandler):
+    store: FakeSpreadsheets = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _reply(self, status: int, payload: Dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        match = PATH_RE.match(url.path)
+        if not match:
+            return self._reply(404, {"error": {"code": 404, "message": f"Unknown path {url.path}"}})
+        spreadsheet_id, range_name, action = match.groups()
+        range_name = unquote(range_name) if range_name else None
+        query = parse_qs(url.query)
+        store = self.store
+        op = action or {"GET": "get", "PUT": "update"}.get(method, method.lower())
+
+        with store.lock:
+            store.requests[op] += 1
+            if op == "get":
+                return self._reply(200, store.read(spreadsheet_id, range_name))
+            if op == "batchGet":
+                ranges = query.get("ranges", [])
+                return self._reply(200, {
+                    "spreadsheetId": spreadsheet_id,
+                    "valueRanges": [store.read(spreadsheet_id, r) for r in ranges],
+                })
+            if op == "update":
+                body = self._body()
+                return self._reply(200, store.write(spreadsheet_id, range_name, body.get("values", [])))
+            if op == "batchUpdate":
+                body = self._body()
+                responses = [store.write(spreadsheet_id, d["range"], d.get("values", [])) for d in body.get("data", [])]
+                return self._reply(200, {"spreadsheetId": spreadsheet_id, "responses": responses})
+            if op == "append":
+                body = self._body()
+                name, _, c0, _, c1 = parse_range(range_name)
+                offset = store.used_rows(spreadsheet_id, name, c0, c1)
+                return self._reply(200, {"updates": store.write(spreadsheet_id, range_name, body.get("values", []), offset)})
+            if op == "clear":
+                store.clear(spreadsheet_id, range_name)
+                return self._reply(200, {"clearedRange": range_name})
+            if op == "batchClear":
+                body = self._body()
+                for r in body.get("ranges", []):
+                    store.clear(spreadsheet_id, r)
+                return self._reply(200, {"clearedRanges": body.get("ranges", [])})
+        return self._reply(400, {"error": {"code": 400, "message": f"Unsupported operation {op}"}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+
+def start_fake_sheets_server(host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, FakeSpreadsheets, str]:
+    """Start the stand-in on a background thread; returns (server, store, endpoint URL)"""
+    store = FakeSpreadsheets()
+    handler = type("FakeSheetsHandler", (_Handler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store, f"http://{host}:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    # Benchmark run: replace vs sync pushes against the local stand-in
+    import sys
+    from outputs.google_sheets import use_local_sheets_endpoint, push_to_sheets
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    server, store, endpoint = start_fake_sheets_server()
+    use_local_sheets_endpoint(endpoint)
+
+    def make_articles(count: int, offset: int = 0) -> List[Dict]:
+        return [{
+            "title": f"Article {i}", "link": f"https://example.com/{i}", "source": "bench",
+            "published": f"2026-10-{1 + i % 28:02d}T00:00:00", "categories": ["crypto"],
+            "is_funding": i % 3 == 0, "is_regulatory": False,
+        } for i in range(offset, offset + count)]
+
+    raises = [{
+        "project": f"Project {i}", "amount": f"${i}M", "round": "Seed", "category": "DeFi",
+        "lead_investors": ["Fund"], "chains": ["Ethereum"], "date": "2026-10-01T00:00:00",
+    } for i in range(n // 10)]
+
+    for label, mode, articles in [
+        ("replace (full rewrite)", "replace", make_articles(n)),
+        ("sync, initial load", "sync", make_articles(n)),
+        ("sync, 1% new", "sync", make_articles(n, n // 100)),
+        ("sync, unchanged", "sync", make_articles(n, n // 100)),
+    ]:
+        if mode == "replace" or label.endswith("initial load"):
+            store.books.clear()
+        store.requests.clear()
+        start = time.perf_counter()
+        push_to_sheets(articles, raises, "bench", mode=mode)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {label:<24} {elapsed:8.1f}ms  requests: {dict(store.requests)}")
+
+    server.shutdown()
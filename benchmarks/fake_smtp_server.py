@@ -0,0 +1,142 @@
+"""
+Local SMTP stand-in that accepts and records messages
+Lets digest delivery be exercised and benchmarked without a real mail server:
+
+    python -m benchmarks.fake_smtp_server [recipients]
+
+Speaks enough ESMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT) over plain TCP. drop_every=N closes the connection instead of
+accepting every Nth message, to exercise reconnect and retry paths.
+"""
+import socketserver
+import threading
+import time
+from typing import List, Dict, Tuple
+
+
+class FakeMailbox:
+    """Messages and connection counts recorded by the stand-in"""
+
+    def __init__(self, drop_every: int = 0):
+        self.messages: List[Dict] = []
+        self.connections = 0
+        self.dropped = 0
+        self.drop_every = drop_every
+        self._attempts = 0
+        self.lock = threading.Lock()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    mailbox: FakeMailbox = None
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        mailbox = self.mailbox
+        with mailbox.lock:
+            mailbox.connections += 1
+        self._reply("220 localhost fake SMTP ready")
+        sender, recipients = None, []
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "AUTH":
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = line[10:].strip("<>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(line[8:].strip("<>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                with mailbox.lock:
+                    mailbox._attempts += 1
+                    drop = mailbox.drop_every and mailbox._attempts % mailbox.drop_every == 0
+                    if drop:
+                        mailbox.dropped += 1
+                if drop:
+                    return
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    body.append(data_line)
+                with mailbox.lock:
+                    mailbox.messages.append({"from": sender, "to": recipients, "data": b"".join(body)})
+                self._reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_fake_smtp_server(host: str = "127.0.0.1", port: int = 0,
+                           drop_every: int = 0) -> Tuple[socketserver.ThreadingTCPServer, FakeMailbox, int]:
+    """Start the stand-in on a background thread; returns (server, mailbox, port)"""
+    mailbox = FakeMailbox(drop_every)
+    handler = type("FakeSMTPHandler", (_SMTPHandler,), {"mailbox": mailbox})
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mailbox, server.server_address[1]
+
+
+if __name__ == "__main__":
+    # Benchmark run: personalized digests to many recipients over a pooled connection
+    import sys
+    import config
+    from outputs.email_digest import DigestRenderer, SMTPPool, build_digest_message
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server, mailbox, port = start_fake_smtp_server(drop_every=97)
+
+    articles = [{
+        "title": f"Article {i} about {'AI models' if i % 2 else 'crypto protocol'} raises",
+        "link": f"https://example.com/{i}", "source": "bench", "published": "2026-10-01T00:00:00",
+        "summary": "led by Paradigm" if i % 5 == 0 else "", "categories": ["ai" if i % 2 else "crypto"],
+        "is_funding": i % 3 == 0, "is_regulatory": i % 4 == 0,
+    } for i in range(300)]
+    raises = [{
+        "project": f"Project {i}", "amount": f"${i}M", "amount_raw": i, "round": "Seed", "category": "DeFi",
+        "lead_investors": ["Paradigm" if i % 7 == 0 else "Fund"], "all_investors": ["Fund"],
+        "date": "2026-10-01T00:00:00",
+    } for i in range(60)]
+    profiles = list(config.DIGEST_PROFILES)
+    recipients = [(f"user{i}@example.com", profiles[i % len(profiles)]) for i in range(n)]
+
+    start = time.perf_counter()
+    renderer = DigestRenderer(articles, raises)
+    digests = {p: renderer.render(config.DIGEST_PROFILES[p]) for p in profiles}
+    render_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with SMTPPool("bench@example.com", "secret", "127.0.0.1", port, use_ssl=False, send_interval=0) as pool:
+        for address, profile in recipients:
+            html, text = digests[profile]
+            pool.send(address, build_digest_message("bench@example.com", address, html, text))
+    send_s = time.perf_counter() - start
+
+    print(f"Rendered {len(profiles)} profiles in {render_ms:.1f}ms")
+    print(f"Delivered {len(mailbox.messages)}/{n} messages in {send_s:.2f}s "
+          f"({len(mailbox.messages) / send_s:.0f} msg/s) over {mailbox.connections} connections, "
+          f"{mailbox.dropped} dropped and retried")
+    server.shutdown()
@@ -0,0 +1,68 @@
+"""
+Startup benchmark based on `python -X importtime`
+Imports each entry point in a fresh interpreter several times and reports the
+median cumulative import time plus the heaviest modules pulled in:
+
+    python -m benchmarks.import_time [runs]
+
+The scheduler is disabled for the app import so only module loading is timed.
+"""
+import os
+import sys
+import statistics
+import subprocess
+from typing import List, Dict, Tuple
+
+# Label -> statement run in the fresh interpreter
+TARGETS = {
+    "main (CLI)": "import main",
+    "app (gunicorn worker)": "import app",
+    "dashboard-only run": "import main; import outputs; outputs.generate_dashboard",
+    "sheets backend": "import outputs; outputs.push_to_sheets",
+    "all collectors": "import collectors; collectors.collect_all_feeds; collectors.fetch_recent_raises",
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Module -> (self us, cumulative us) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(statement: str) -> Dict[str, Tuple[int, int]]:
+    env = {**os.environ, "ENABLE_SCHEDULER": "false"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def total_ms(modules: Dict[str, Tuple[int, int]]) -> float:
+    """Sum of top-level cumulative times, i.e. everything imported"""
+    return sum(self_us for self_us, _ in modules.values()) / 1000
+
+
+def heaviest(modules: Dict[str, Tuple[int, int]], top: int = 5) -> List[Tuple[str, float]]:
+    """Top-level packages by their share of self time"""
+    packages: Dict[str, int] = {}
+    for name, (self_us, _) in modules.items():
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return sorted(((p, us / 1000) for p, us in packages.items()), key=lambda x: -x[1])[:top]
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for label, statement in TARGETS.items():
+        samples = [measure(statement) for _ in range(runs)]
+        median = statistics.median(total_ms(s) for s in samples)
+        top = ", ".join(f"{name} {ms:.0f}ms" for name, ms in heaviest(samples[-1]))
+        print(f"{label:<24} {median:>7.1f}ms  {len(samples[-1]):>4} modules  ({top})")
@@ -0,0 +1,261 @@
+"""
+Load benchmark for the web app's serving path
+Starts the app under gunicorn with the production settings from render.yaml
+(2 sync workers, 120s timeout) and drives `/`, `/health` and the data
+endpoints at rising concurrency. Meanwhile each worker parses feeds in a
+background thread, the way the scheduler does between requests:
+
+    python -m benchmarks.load_test [--levels 1,4,16,64] [--duration 10] [--idle] [--record]
+
+Reports throughput, p50/p95/p99 latency and error rate per concurrency level.
+Every run is compared against the baseline in load_test_baseline.json;
+--record replaces it. Endpoints that do not answer 200 before the run (no
+snapshot for /api/top, no freshness.json yet) are left out.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import threading
+import subprocess
+import http.client
+from typing import List, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_test_baseline.json")
+
+# Request mix: path -> share of requests
+ENDPOINTS = {
+    "/": 4,
+    "/health": 2,
+    "/freshness.json": 2,
+    "/search?q=raises": 1,
+    "/api/top?k=10": 1,
+    "/api/investors/active?days=30": 1,
+    "/schedule": 1,
+}
+REQUEST_TIMEOUT = 30
+GUNICORN_ARGS = ["--workers", "2", "--timeout", "120"]
+
+FEED_ENTRIES = 40
+
+
+def _synthetic_feed() -> bytes:
+    """An RSS document with full-post HTML summaries, like the larger feeds in config.RSS_FEEDS"""
+    paragraph = (
+        "<p>Acme Labs raised <strong>$20M</strong> in a Series A led by "
+        "<a href='https://example.com/fund'>Example Fund</a> to build zero-knowledge "
+        "infrastructure for onchain AI agents &amp; stablecoin payments.</p>"
+    )
+    items = "".join(
+        f"<item><title>Post {i}</title><link>https://example.com/post/{i}</link>"
+        f"<guid>https://example.com/post/{i}</guid><pubDate>Mon, 19 Oct 2026 08:00:00 GMT</pubDate>"
+        f"<description><![CDATA[<div>{paragraph * 30}<script>track({i})</script>"
+        f"<p>The post Post {i} appeared first on Example.</p></div>]]></description></item>"
+        for i in range(FEED_ENTRIES)
+    )
+    return f"<?xml version='1.0'?><rss version='2.0'><channel><title>Bench</title>{items}</channel></rss>".encode()
+
+
+def _parse_forever():
+    import feedparser
+    from collectors.html_text import html_to_text
+
+    document = _synthetic_feed()
+    while True:
+        for entry in feedparser.parse(document).entries:
+            html_to_text(entry.get("summary", ""))
+
+
+def busy_app():
+    """gunicorn app factory: the app plus a feed-parsing thread in each worker"""
+    from app import app
+
+    threading.Thread(target=_parse_forever, daemon=True).start()
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int, path: str) -> int:
+    """One request on a fresh connection (sync workers close after each response); returns the status"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=REQUEST_TIMEOUT)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def start_server(port: int, busy: bool = True) -> subprocess.Popen:
+    """gunicorn on port, returned once /health answers"""
+    target = "benchmarks.load_test:busy_app()" if busy else "app:app"
+    env = {**os.environ, "ENABLE_SCHEDULER": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", target, "--bind", f"127.0.0.1:{port}", *GUNICORN_ARGS],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    for _ in range(100):
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {server.stderr.read().strip().splitlines()[-1:]}")
+        try:
+            if get(port, "/health") == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("gunicorn did not come up within 10s")
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def summarize(samples: List[tuple], elapsed: float) -> Dict:
+    """Throughput, latency percentiles (ms) and error rate over (path, seconds, ok) samples"""
+    latencies = sorted(seconds * 1000 for _, seconds, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+    }
+
+
+def run_level(port: int, paths: List[str], concurrency: int, duration: float) -> Dict:
+    """Closed-loop load: concurrency clients each sending the next request as soon as one returns"""
+    samples: List[tuple] = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset: int):
+        local = []
+        i = offset
+        while time.perf_counter() < stop_at:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = get(port, path) == 200
+            except OSError:
+                ok = False
+            local.append((path, time.perf_counter() - start, ok))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n * 7,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {"concurrency": concurrency, **summarize(samples, elapsed)}
+    result["endpoints"] = {
+        path: summarize([s for s in samples if s[0] == path], elapsed) for path in dict.fromkeys(paths)
+    }
+    return result
+
+
+def request_mix(port: int) -> List[str]:
+    """ENDPOINTS expanded by weight, keeping only the paths that currently answer 200"""
+    paths = []
+    for path, weight in ENDPOINTS.items():
+        status = get(port, path)
+        if status != 200:
+            print(f"  skipping {path} (HTTP {status} before load)")
+            continue
+        paths.extend([path] * weight)
+    return paths
+
+
+def load_baseline(label: str) -> Optional[Dict]:
+    if not os.path.exists(BASELINE_PATH):
+        return None
+    with open(BASELINE_PATH) as f:
+        return json.load(f).get(label)
+
+
+def record_baseline(label: str, levels: List[Dict]):
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    baselines[label] = {
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit.stdout.strip(),
+        "machine": f"{platform.machine()}, {os.cpu_count()} CPUs, Python {platform.python_version()}",
+        "levels": levels,
+    }
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _delta(value: float, before: Optional[float]) -> str:
+    if not before:
+        return ""
+    return f" ({(value - before) / before:+.0%})"
+
+
+def report(levels: List[Dict], baseline: Optional[Dict]):
+    previous = {level["concurrency"]: level for level in (baseline or {}).get("levels", [])}
+    print(f"  {'clients':>7} {'reqs':>6} {'req/s':>14} {'p50':>16} {'p95':>16} {'p99':>16} {'errors':>7}")
+    for level in levels:
+        before = previous.get(level["concurrency"], {})
+        cells = [
+            f"{level['rps']:.1f}{_delta(level['rps'], before.get('rps'))}",
+            *(f"{level[key]:.1f}ms{_delta(level[key], before.get(key))}" for key in ("p50_ms", "p95_ms", "p99_ms")),
+        ]
+        print(f"  {level['concurrency']:>7} {level['requests']:>6} {cells[0]:>14} "
+              f"{cells[1]:>16} {cells[2]:>16} {cells[3]:>16} {level['error_rate']:>7.1%}")
+    top = levels[-1]
+    print(f"\n  per endpoint at {top['concurrency']} clients:")
+    for path, stats in top["endpoints"].items():
+        print(f"    {path:<20} {stats['requests']:>6} reqs  p50 {stats['p50_ms']:>7.1f}ms  "
+              f"p95 {stats['p95_ms']:>7.1f}ms  p99 {stats['p99_ms']:>7.1f}ms  errors {stats['error_rate']:.1%}")
+    if baseline:
+        print(f"\n  compared with baseline from {baseline['recorded']} ({baseline['commit']}, {baseline['machine']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark for the web app")
+    parser.add_argument("--levels", default="1,4,16,64", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per concurrency level")
+    parser.add_argument("--idle", action="store_true", help="No background parsing in the workers")
+    parser.add_argument("--record", action="store_true", help=f"Save the results as the baseline in {os.path.basename(BASELINE_PATH)}")
+    args = parser.parse_args()
+
+    label = "idle" if args.idle else "busy"
+    port = _free_port()
+    server = start_server(port, busy=not args.idle)
+    try:
+        paths = request_mix(port)
+        print(f"Load test ({label} workers): {', '.join(dict.fromkeys(paths))}, {args.duration:g}s per level\n")
+        levels = [run_level(port, paths, int(n), args.duration) for n in args.levels.split(",")]
+    finally:
+        server.terminate()
+        server.wait()
+
+    report(levels, load_baseline(label))
+    if args.record:
+        record_baseline(label, levels)
+        print(f"\n  recorded as the {label} baseline")
@@ -1,3 +1,28 @@
-from .rss_collector import collect_all_feeds
-from .defillama_collector import fetch_recent_raises
-from .twitter_collector import collect_twitter_feed, format_tweet_for_digest
+"""
+Collectors
+Each collector is imported on first use, so a run only loads the HTTP and
+feed-parsing libraries of the sources it actually collects.
+"""
+import importlib
+
+# Exported name -> submodule that provides it
+_BACKENDS = {
+    "collect_all_feeds": ".rss_collector",
+    "fetch_recent_raises": ".defillama_collector",
+    "collect_twitter_feed": ".twitter_collector",
+    "format_tweet_for_digest": ".twitter_collector",
+}
+
+__all__ = list(_BACKENDS)
+
+
+def __getattr__(name):
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_BACKENDS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
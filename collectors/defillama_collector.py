@@ -1,23 +1,31 @@
 """
 DefiLlama Raises API collector - free funding data for crypto projects
 """
+import json
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
+import deadline
 
 
 DEFILLAMA_RAISES_URL = "https://api.llama.fi/raises"
 
 
-def fetch_recent_raises(days_back: int = 7) -> List[Dict]:
-    """Fetch recent funding rounds from DefiLlama"""
+def fetch_recent_raises(days_back: Optional[int] = 7) -> List[Dict]:
+    """Fetch recent funding rounds from DefiLlama (days_back=None: the full history)"""
     raises = []
-    cutoff = datetime.now() - timedelta(days=days_back)
+    cutoff = datetime.now() - timedelta(days=days_back) if days_back is not None else datetime.min
+
+    if deadline.expired():
+        deadline.miss("DefiLlama")
+        return raises
 
     try:
-        response = requests.get(DEFILLAMA_RAISES_URL, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        response = requests.get(DEFILLAMA_RAISES_URL, timeout=deadline.timeout(30), stream=True)
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        data = json.loads(deadline.read_body(response, 30))
 
         for raise_data in data.get("raises", []):
             # DefiLlama uses Unix timestamp
@@ -39,7 +47,7 @@ def fetch_recent_raises(days_back: int = 7) -> List[Dict]:
                     "round": raise_data.get("round", "Unknown"),
                     "category": raise_data.get("category", ""),
                     "lead_investors": investors,
-                    "all_investors": all_investors[:10],  # Limit for display
+                    "all_investors": all_investors,
                     "date": raise_date.isoformat(),
                     "source": "defillama",
                     "chains": raise_data.get("chains", []),
@@ -47,6 +55,8 @@ def fetch_recent_raises(days_back: int = 7) -> List[Dict]:
 
     except Exception as e:
         print(f"Error fetching DefiLlama raises: {e}")
+        if deadline.expired():
+            deadline.miss("DefiLlama")
 
     # Sort by amount (largest first), then by date
     raises.sort(key=lambda x: (x["amount_raw"], x["date"]), reverse=True)
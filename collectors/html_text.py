@@ -0,0 +1,189 @@
+"""
+HTML-to-text normalization for feed summaries
+Summaries arrive as HTML (often the full post). Text is extracted from a
+growing prefix window only until there is enough of it: scripts, styles and
+comments are dropped, tags become spaces, entities are decoded, whitespace is
+collapsed and feed boilerplate ("The post ... appeared first on ...",
+"Continue reading") is removed before truncating on a word boundary.
+Results are cached by entry GUID + content hash, so unchanged entries are
+never reprocessed across runs.
+
+    python -m collectors.html_text    # throughput benchmark
+"""
+import os
+import re
+import html
+import sqlite3
+import hashlib
+from typing import List, Dict, Tuple
+
+SUMMARY_LIMIT = 500
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join("data", "summaries.db"))
+
+# Dropped with their content; an unclosed block at the window edge runs to the end
+SKIP_RE = re.compile(
+    r"<!--.*?(?:-->|$)|<!\[CDATA\[.*?(?:\]\]>|$)"
+    r"|<(script|style|noscript|template|svg|iframe|object|figure)\b.*?(?:</\1\s*>|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+TAG_RE = re.compile(r"<[^>]*>")
+POST_FOOTER_RE = re.compile(r"The post .{1,300}? appeared first on .{1,120}?\.", re.IGNORECASE)
+# Trailing calls to action, dropped with whatever follows them
+TAIL_PHRASES = ("continue reading", "read more", "read the full story", "read the full article", "keep reading")
+TAIL_MAX = 200
+
+
+def _strip_boilerplate(text: str, at_end: bool) -> str:
+    if "appeared first on" in text:
+        text = POST_FOOTER_RE.sub(" ", text)
+    lower = text.lower() if at_end else ""
+    for phrase in TAIL_PHRASES if at_end else ():
+        i = lower.rfind(phrase)
+        if i != -1 and len(text) - i <= TAIL_MAX:
+            text, lower = text[:i], lower[:i]
+    return text.replace("[…]", " ").replace("[...]", " ")
+
+
+def _extract(fragment: str, complete: bool) -> str:
+    text = TAG_RE.sub(" ", SKIP_RE.sub(" ", fragment))
+    text = " ".join(html.unescape(text).split())
+    # Calls to action only count as boilerplate at the real end of the document
+    return " ".join(_strip_boilerplate(text, complete).split())
+
+
+def _safe_prefix(raw: str, size: int) -> str:
+    """First size chars of raw, backed off so no tag or entity is split"""
+    chunk = raw[:size]
+    lt = chunk.rfind("<")
+    if lt > chunk.rfind(">"):
+        chunk = chunk[:lt]
+    amp = chunk.rfind("&")
+    if amp != -1 and ";" not in chunk[amp:]:
+        chunk = chunk[:amp]
+    return chunk
+
+
+def truncate_words(text: str, limit: int = SUMMARY_LIMIT) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip(" ,;:-") + "…"
+
+
+def html_to_text(raw: str, limit: int = SUMMARY_LIMIT) -> str:
+    """Plain-text summary of an HTML fragment, at most limit characters (+ ellipsis)"""
+    if not raw:
+        return ""
+    if "<" not in raw and "&" not in raw:
+        return truncate_words(" ".join(raw.split()), limit)
+    window = limit * 4
+    while True:
+        complete = window >= len(raw)
+        text = _extract(raw if complete else _safe_prefix(raw, window), complete)
+        # Keep one word past the limit so truncation can tell where the word ends
+        if complete or len(text) > limit + 40:
+            return truncate_words(text, limit)
+        window *= 4
+
+
+def content_hash(raw: str) -> str:
+    return hashlib.blake2b(raw.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+
+
+class SummaryCache:
+    """Normalized summaries keyed by entry GUID, valid while the content hash matches"""
+
+    def __init__(self, db_path: str = SUMMARY_CACHE_PATH):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS summaries (guid TEXT PRIMARY KEY, hash TEXT NOT NULL, text TEXT NOT NULL)")
+        return conn
+
+    def normalize_many(self, entries: List[Tuple[str, str]], limit: int = SUMMARY_LIMIT) -> List[str]:
+        """Text for each (guid, raw html) pair, reusing cached results for unchanged entries"""
+        hashes = [content_hash(raw) for _, raw in entries]
+        conn = self._connect()
+        try:
+            cached: Dict[str, Tuple[str, str]] = {}
+            guids = [guid for guid, _ in entries]
+            for i in range(0, len(guids), 500):
+                chunk = guids[i:i + 500]
+                for guid, digest, text in conn.execute(
+                    f"SELECT guid, hash, text FROM summaries WHERE guid IN ({','.join('?' * len(chunk))})", chunk
+                ):
+                    cached[guid] = (digest, text)
+
+            texts, fresh = [], []
+            for (guid, raw), digest in zip(entries, hashes):
+                hit = cached.get(guid)
+                if hit and hit[0] == digest:
+                    texts.append(hit[1])
+                    continue
+                text = html_to_text(raw, limit)
+                texts.append(text)
+                fresh.append((guid, digest, text))
+            if fresh:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO summaries (guid, hash, text) VALUES (?, ?, ?)", fresh)
+        finally:
+            conn.close()
+        return texts
+
+
+if __name__ == "__main__":
+    # Benchmark run: current slicing path vs stdlib HTMLParser vs windowed extraction vs cache hits
+    import time
+    import random
+    import tempfile
+    from html.parser import HTMLParser
+
+    class _ParserText(HTMLParser):
+        def __init__(self):
+            super().__init__(convert_charrefs=True)
+            self.parts, self.skip = [], 0
+
+        def handle_starttag(self, tag, attrs):
+            self.skip += tag in ("script", "style")
+
+        def handle_endtag(self, tag):
+            self.skip -= tag in ("script", "style") and self.skip > 0
+
+        def handle_data(self, data):
+            if not self.skip:
+                self.parts.append(data)
+
+    def parser_path(raw: str) -> str:
+        p = _ParserText()
+        p.feed(raw)
+        return truncate_words(" ".join(" ".join(p.parts).split()))
+
+    words = "protocol network launch users market token chain model agents data open research team new".split()
+    paragraph = lambda: " ".join(random.choices(words, k=60))
+    entries = [(
+        f"guid-{i}",
+        f'<figure><img src="https://cdn.example.com/img/{i}.jpg" alt="funding round investors SEC"></figure>'
+        + "".join(f"<p>{paragraph()} &amp; <a href=\"https://example.com/{i}?utm_source=rss\">{paragraph()}</a></p>"
+                  for _ in range(random.randint(2, 30)))
+        + '<script>var funding = "sec";</script>'
+        + f'<p>The post <a href="#">Item {i}</a> appeared first on <a href="#">Example</a>.</p>'
+    ) for i in range(5000)]
+    total_kb = sum(len(raw) for _, raw in entries) / 1024
+
+    def bench(label, fn):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        false_hits = sum(1 for text in out if "funding" in text.lower() or "sec" in text.lower().split())
+        print(f"  {label:<28} {len(entries) / elapsed:>9,.0f} entries/s  {total_kb / 1024 / elapsed:>6.1f} MB/s  "
+              f"false keyword hits: {false_hits}")
+
+    print(f"{len(entries)} entries, {total_kb / 1024:.1f}MB of HTML")
+    bench("current ([:500] slice)", lambda: [raw[:500] for _, raw in entries])
+    bench("HTMLParser, full document", lambda: [parser_path(raw) for _, raw in entries])
+    bench("windowed extraction", lambda: [html_to_text(raw) for _, raw in entries])
+    cache = SummaryCache(os.path.join(tempfile.mkdtemp(), "summaries.db"))
+    bench("cache, cold", lambda: cache.normalize_many(entries))
+    bench("cache, unchanged entries", lambda: cache.normalize_many(entries))
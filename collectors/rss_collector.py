@@ -2,55 +2,141 @@
 RSS Feed collector for crypto/AI news
 """
 import feedparser
+import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import config
+import deadline
+from profiling import stage
+from . import websub
+from .html_text import SummaryCache
+
+
+FEED_TIMEOUT = 20
+
+
+def feed_origin(source_name: str) -> str:
+    """"main" for config.RSS_FEEDS, "extra" for feeds only site profiles add (their extra_feeds)"""
+    return "main" if source_name in config.RSS_FEEDS else "extra"
+
+
+def parse_entries(feed, source_name: str) -> List[Dict]:
+    """Normalize a parsed feed's entries into article dicts, tagged with the feed's origin"""
+    origin = feed_origin(source_name)
+    entries = feed.entries[:20]  # Last 20 items per feed
+    # Summaries are HTML; extract plain text once per entry version
+    summaries = SummaryCache().normalize_many([
+        (entry.get("id") or entry.get("link") or entry.get("title", ""), entry.get("summary", ""))
+        for entry in entries
+    ])
+
+    articles = []
+    for entry, summary in zip(entries, summaries):
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        if published:
+            pub_date = datetime(*published[:6])
+        else:
+            pub_date = datetime.now()
+
+        articles.append({
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "source": source_name,
+            "published": pub_date.isoformat(),
+            "summary": summary,
+            "origin": origin,
+        })
+    return articles
+
+
+def load_feed(url: str, source_name: str) -> List[Dict]:
+    """Fetch and parse a single RSS feed, raising if it could not be read
+
+    Any WebSub hub the feed advertises is remembered. The download goes
+    through requests so it has a timeout (feedparser's own fetch has none);
+    the body is streamed, so a feed trickling in is cut off at FEED_TIMEOUT
+    or the run deadline, whichever comes first.
+    """
+    response = requests.get(url, timeout=deadline.timeout(FEED_TIMEOUT),
+                            headers={"User-Agent": feedparser.USER_AGENT}, stream=True)
+    if not response.ok:
+        response.close()
+        response.raise_for_status()
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    headers["content-location"] = response.url
+    feed = feedparser.parse(deadline.read_body(response, FEED_TIMEOUT), response_headers=headers)
+    # feedparser reports network and XML errors through bozo instead of raising
+    if feed.get("bozo") and not feed.entries:
+        raise feed.get("bozo_exception") or ValueError("unreadable feed")
+    articles = parse_entries(feed, source_name)
+    hub = websub.discover_hub(feed, url)
+    if hub:
+        websub.record_hub(source_name, *hub)
+        websub.mark_polled(source_name, articles)
+    return articles
 
 
 def fetch_rss_feed(url: str, source_name: str) -> List[Dict]:
-    """Fetch and parse a single RSS feed"""
+    """Fetch and parse a single RSS feed, remembering any WebSub hub it advertises"""
     articles = []
     try:
-        feed = feedparser.parse(url)
-        for entry in feed.entries[:20]:  # Last 20 items per feed
-            published = entry.get("published_parsed") or entry.get("updated_parsed")
-            if published:
-                pub_date = datetime(*published[:6])
-            else:
-                pub_date = datetime.now()
-
-            articles.append({
-                "title": entry.get("title", ""),
-                "link": entry.get("link", ""),
-                "source": source_name,
-                "published": pub_date.isoformat(),
-                "summary": entry.get("summary", "")[:500],
-            })
+        articles = load_feed(url, source_name)
     except Exception as e:
         print(f"Error fetching {source_name}: {e}")
+        if deadline.expired():
+            deadline.miss(source_name)
     return articles
 
 
-def categorize_article(article: Dict) -> List[str]:
+def categorize_article(article: Dict, categories: Optional[Dict[str, List[str]]] = None) -> List[str]:
     """Categorize article based on keywords"""
     text = (article["title"] + " " + article["summary"]).lower()
-    categories = []
-    for category, keywords in config.CATEGORIES.items():
+    matched = []
+    for category, keywords in (categories or config.CATEGORIES).items():
         if any(kw in text for kw in keywords):
-            categories.append(category)
-    return categories if categories else ["general"]
+            matched.append(category)
+    return matched if matched else ["general"]
 
 
-def is_funding_news(article: Dict) -> bool:
+def is_funding_news(article: Dict, keywords: Optional[List[str]] = None) -> bool:
     """Check if article is about funding/investment"""
     text = (article["title"] + " " + article["summary"]).lower()
-    return any(kw in text for kw in config.FUNDING_KEYWORDS)
+    return any(kw in text for kw in (keywords or config.FUNDING_KEYWORDS))
 
 
-def is_regulatory_news(article: Dict) -> bool:
+def is_regulatory_news(article: Dict, keywords: Optional[List[str]] = None) -> bool:
     """Check if article is about regulation/policy"""
     text = (article["title"] + " " + article["summary"]).lower()
-    return any(kw in text for kw in config.REGULATORY_KEYWORDS)
+    return any(kw in text for kw in (keywords or config.REGULATORY_KEYWORDS))
+
+
+def classify_article(article: Dict, categories: Optional[Dict[str, List[str]]] = None) -> Dict:
+    """Tag an article with categories and funding/regulatory flags, in place
+
+    categories overrides config.CATEGORIES (its "funding" and "regulatory"
+    lists drive the flags), e.g. with a site profile's keywords.
+    """
+    categories = categories or config.CATEGORIES
+    article["categories"] = categorize_article(article, categories)
+    article["is_funding"] = is_funding_news(article, categories.get("funding"))
+    article["is_regulatory"] = is_regulatory_news(article, categories.get("regulatory"))
+    return article
+
+
+def all_feeds() -> Dict[str, str]:
+    """Union of the main feed list and any extra feeds site profiles add"""
+    feeds = dict(config.RSS_FEEDS)
+    for profile in config.SITE_PROFILES.values():
+        feeds.update(profile.get("extra_feeds", {}))
+    return feeds
+
+
+def recent_articles(articles: List[Dict], cutoff: datetime) -> List[Dict]:
+    """Classified articles published after cutoff"""
+    return [
+        classify_article(article) for article in articles
+        if datetime.fromisoformat(article["published"]) > cutoff
+    ]
 
 
 def collect_all_feeds(hours_back: int = 24) -> List[Dict]:
@@ -58,17 +144,23 @@ def collect_all_feeds(hours_back: int = 24) -> List[Dict]:
     all_articles = []
     cutoff = datetime.now() - timedelta(hours=hours_back)
 
-    for source_name, url in config.RSS_FEEDS.items():
+    # Feeds with a live WebSub subscription are pushed to the web app instead of polled
+    pushed = websub.push_sources()
+
+    for source_name, url in all_feeds().items():
+        if source_name in pushed:
+            articles = websub.pushed_articles(source_name, cutoff)
+            print(f"Using {len(articles)} pushed items for {source_name}")
+            all_articles.extend(articles)
+            continue
+        if deadline.expired():
+            deadline.miss(source_name)
+            continue
+
         print(f"Fetching {source_name}...")
-        articles = fetch_rss_feed(url, source_name)
-
-        for article in articles:
-            pub_date = datetime.fromisoformat(article["published"])
-            if pub_date > cutoff:
-                article["categories"] = categorize_article(article)
-                article["is_funding"] = is_funding_news(article)
-                article["is_regulatory"] = is_regulatory_news(article)
-                all_articles.append(article)
+        with stage(f"feed:{source_name}"):
+            articles = fetch_rss_feed(url, source_name)
+        all_articles.extend(recent_articles(articles, cutoff))
 
     # Sort by date, newest first
     all_articles.sort(key=lambda x: x["published"], reverse=True)
@@ -6,6 +6,7 @@ import os
 import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+import deadline
 
 TWITTER_API_BASE = "https://api.twitter.com/2"
 
@@ -67,7 +68,7 @@ def fetch_user_tweets(username: str, bearer_token: str, max_results: int = 10) -
         # First get user ID
         user_url = f"{TWITTER_API_BASE}/users/by/username/{username}"
         headers = {"Authorization": f"Bearer {bearer_token}"}
-        user_resp = requests.get(user_url, headers=headers, timeout=10)
+        user_resp = requests.get(user_url, headers=headers, timeout=deadline.timeout(10))
 
         if user_resp.status_code != 200:
             return tweets
@@ -85,7 +86,7 @@ def fetch_user_tweets(username: str, bearer_token: str, max_results: int = 10) -
             "exclude": "retweets,replies"
         }
 
-        tweets_resp = requests.get(tweets_url, headers=headers, params=params, timeout=10)
+        tweets_resp = requests.get(tweets_url, headers=headers, params=params, timeout=deadline.timeout(10))
 
         if tweets_resp.status_code == 200:
             data = tweets_resp.json()
@@ -100,6 +101,8 @@ def fetch_user_tweets(username: str, bearer_token: str, max_results: int = 10) -
 
     except Exception as e:
         print(f"Error fetching @{username}: {e}")
+        if deadline.expired():
+            deadline.miss(f"@{username}")
 
     return tweets
 
@@ -121,28 +124,39 @@ def collect_twitter_feed(hours_back: int = 24) -> List[Dict]:
     cutoff = datetime.now() - timedelta(hours=hours_back)
 
     for username, category in TWITTER_ACCOUNTS.items():
+        if deadline.expired():
+            deadline.miss(f"@{username}")
+            continue
         print(f"  Fetching @{username}...")
-        tweets = fetch_user_tweets(username, bearer_token)
-
-        for tweet in tweets:
-            try:
-                created = datetime.fromisoformat(tweet["created_at"].replace("Z", "+00:00"))
-                created = created.replace(tzinfo=None)
-                if created > cutoff:
-                    tweet["category"] = category
-                    tweet["is_deal"] = is_deal_related(tweet["text"])
-                    tweet["source"] = "twitter"
-                    all_tweets.append(tweet)
-            except Exception:
-                continue
-
-    # Sort by engagement (likes + retweets)
-    all_tweets.sort(
+        all_tweets.extend(collect_account(username, category, bearer_token, cutoff))
+
+    return sort_by_engagement(all_tweets)
+
+
+def collect_account(username: str, category: str, bearer_token: str, cutoff: datetime) -> List[Dict]:
+    """Tagged tweets from one account posted after cutoff"""
+    recent = []
+    for tweet in fetch_user_tweets(username, bearer_token):
+        try:
+            created = datetime.fromisoformat(tweet["created_at"].replace("Z", "+00:00"))
+            created = created.replace(tzinfo=None)
+            if created > cutoff:
+                tweet["category"] = category
+                tweet["is_deal"] = is_deal_related(tweet["text"])
+                tweet["source"] = "twitter"
+                recent.append(tweet)
+        except Exception:
+            continue
+    return recent
+
+
+def sort_by_engagement(tweets: List[Dict]) -> List[Dict]:
+    """Sort by engagement (likes + retweets), highest first"""
+    tweets.sort(
         key=lambda x: x["metrics"].get("like_count", 0) + x["metrics"].get("retweet_count", 0),
         reverse=True
     )
-
-    return all_tweets
+    return tweets
 
 
 def format_tweet_for_digest(tweet: Dict) -> Dict:
@@ -156,6 +170,7 @@ def format_tweet_for_digest(tweet: Dict) -> Dict:
         "categories": ["twitter", tweet["category"]],
         "is_funding": tweet["is_deal"],
         "is_regulatory": False,
+        "engagement": tweet["metrics"].get("like_count", 0) + tweet["metrics"].get("retweet_count", 0),
     }
 
 
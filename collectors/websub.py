@@ -0,0 +1,331 @@
+"""
+WebSub (PubSubHubbub) push ingestion
+Feeds that advertise a hub are discovered during normal polling; the web app
+subscribes to them, answers the hub's intent verification, renews leases
+before they expire and ingests pushed feed bodies through the same
+normalization and classification as polled feeds. Polling is then only used
+for feeds without a live subscription, plus a periodic fallback poll whose
+items are stored with the pushed ones.
+"""
+import os
+import re
+import hmac
+import json
+import sqlite3
+import secrets
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple, Set
+import requests
+import config
+
+WEBSUB_DB_PATH = os.getenv("WEBSUB_DB_PATH", os.path.join("data", "websub.db"))
+
+# Public base URL of the web app, e.g. https://news.example.com; push is off when unset
+WEBSUB_CALLBACK_URL = os.getenv("WEBSUB_CALLBACK_URL", "").rstrip("/")
+
+LEASE_SECONDS = int(os.getenv("WEBSUB_LEASE_SECONDS", str(7 * 86400)))
+# Renew once less than this much of a lease is left
+RENEW_MARGIN = timedelta(hours=12)
+# A pending request the hub never verified is retried after this long
+PENDING_TIMEOUT = timedelta(hours=1)
+# Subscribed feeds are still polled this often, to catch pushes a hub dropped
+FALLBACK_POLL = timedelta(hours=int(os.getenv("WEBSUB_FALLBACK_POLL_HOURS", "24")))
+PUSH_RETENTION = timedelta(days=14)
+
+LINK_HEADER_RE = re.compile(r'<([^>]+)>\s*;\s*rel="?([^";]+)"?')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    source TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    hub TEXT NOT NULL,
+    secret TEXT,
+    state TEXT NOT NULL DEFAULT 'discovered',
+    requested_at TEXT,
+    lease_expires TEXT,
+    last_push TEXT,
+    last_polled TEXT,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS pushed_items (
+    link TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    published TEXT NOT NULL,
+    received_at TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pushed_by_source ON pushed_items(source, published);
+"""
+
+
+def connect(db_path: str = WEBSUB_DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def discover_hub(feed, url: str) -> Optional[Tuple[str, str]]:
+    """(hub, topic) advertised by a parsed feed, via <link rel="hub"> or the HTTP Link header"""
+    links = {}
+    for link in feed.get("feed", {}).get("links", []):
+        if link.get("rel") in ("hub", "self") and link.get("href"):
+            links.setdefault(link["rel"], link["href"])
+    for href, rels in LINK_HEADER_RE.findall(feed.get("headers", {}).get("link", "")):
+        for rel in rels.split():
+            links.setdefault(rel, href)
+    if "hub" not in links:
+        return None
+    return links["hub"], links.get("self", url)
+
+
+def record_hub(source: str, hub: str, topic: str, db_path: str = WEBSUB_DB_PATH):
+    """Remember a discovered hub; a changed hub or topic resets the subscription"""
+    conn = connect(db_path)
+    try:
+        with conn:
+            row = conn.execute("SELECT hub, topic FROM subscriptions WHERE source = ?", (source,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO subscriptions (source, topic, hub) VALUES (?, ?, ?)", (source, topic, hub))
+            elif (row["hub"], row["topic"]) != (hub, topic):
+                conn.execute(
+                    "UPDATE subscriptions SET hub = ?, topic = ?, state = 'discovered', lease_expires = NULL "
+                    "WHERE source = ?", (hub, topic, source),
+                )
+    finally:
+        conn.close()
+
+
+def mark_polled(source: str, articles: List[Dict] = (), db_path: str = WEBSUB_DB_PATH):
+    """Record a poll of a hub-advertising feed and store what it returned alongside the pushes
+
+    While the source is served from pushes, pushed_articles is its only
+    input, so posts the hub never pushed (including those published before
+    the subscription) must come from these polls.
+    """
+    from .rss_collector import classify_article
+
+    now = datetime.now().isoformat()
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO pushed_items (link, source, published, received_at, item) VALUES (?, ?, ?, ?, ?)",
+                [(a["link"], source, a["published"], now, json.dumps(classify_article(dict(a))))
+                 for a in articles if a.get("link")],
+            )
+            conn.execute("UPDATE subscriptions SET last_polled = ? WHERE source = ?", (now, source))
+    finally:
+        conn.close()
+
+
+def push_sources(db_path: str = WEBSUB_DB_PATH) -> Set[str]:
+    """Sources with a verified, unexpired subscription that were polled recently enough to skip polling"""
+    if not os.path.exists(db_path):
+        return set()
+    now = datetime.now()
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT source, last_polled FROM subscriptions WHERE state = 'verified' AND lease_expires > ?",
+            (now.isoformat(),),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        row["source"] for row in rows
+        if row["last_polled"] and now - datetime.fromisoformat(row["last_polled"]) < FALLBACK_POLL
+    }
+
+
+def callback_url(source: str) -> str:
+    return f"{WEBSUB_CALLBACK_URL}/websub/callback/{source}"
+
+
+def request_subscription(source: str, mode: str = "subscribe", db_path: str = WEBSUB_DB_PATH) -> bool:
+    """Ask the hub to (un)subscribe; the hub confirms later by verifying the intent
+
+    The request is recorded before it is sent: hubs often verify while the
+    POST is still open, possibly on another gunicorn worker, which has to
+    find the subscription pending already. A failed request restores the
+    previous state.
+    """
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM subscriptions WHERE source = ?", (source,)).fetchone()
+        if row is None:
+            return False
+        secret = row["secret"] or secrets.token_hex(20)
+        # A renewal keeps the current lease in use until the hub re-verifies
+        state = row["state"] if mode == "subscribe" and row["state"] == "verified" else (
+            "pending" if mode == "subscribe" else "unsubscribing")
+        with conn:
+            conn.execute(
+                "UPDATE subscriptions SET secret = ?, requested_at = ?, last_error = NULL, state = ? WHERE source = ?",
+                (secret, datetime.now().isoformat(), state, source),
+            )
+        try:
+            response = requests.post(row["hub"], data={
+                "hub.mode": mode,
+                "hub.topic": row["topic"],
+                "hub.callback": callback_url(source),
+                "hub.lease_seconds": LEASE_SECONDS,
+                "hub.secret": secret,
+            }, timeout=15)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            with conn:
+                # Only if the hub has not verified in the meantime
+                conn.execute(
+                    "UPDATE subscriptions SET last_error = ?, state = ? WHERE source = ? AND state = ?",
+                    (str(e)[:500], row["state"], source, state),
+                )
+            return False
+        return True
+    finally:
+        conn.close()
+
+
+def renew_subscriptions(db_path: str = WEBSUB_DB_PATH) -> Dict[str, int]:
+    """Subscribe to newly discovered hubs and renew leases that are about to expire"""
+    stats = {"requested": 0, "failed": 0}
+    if not WEBSUB_CALLBACK_URL:
+        return stats
+    now = datetime.now()
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT source, state, requested_at, lease_expires FROM subscriptions").fetchall()
+        with conn:
+            conn.execute("DELETE FROM pushed_items WHERE received_at < ?", ((now - PUSH_RETENTION).isoformat(),))
+    finally:
+        conn.close()
+
+    for row in rows:
+        requested = datetime.fromisoformat(row["requested_at"]) if row["requested_at"] else None
+        if row["source"] not in config.RSS_FEEDS and not any(
+                row["source"] in p.get("extra_feeds", {}) for p in config.SITE_PROFILES.values()):
+            # Feed removed from config: drop the subscription instead of renewing it
+            if row["state"] == "verified":
+                ok = request_subscription(row["source"], mode="unsubscribe", db_path=db_path)
+                stats["requested" if ok else "failed"] += 1
+            continue
+        if row["state"] in ("unsubscribing", "unsubscribed"):
+            continue
+        if row["state"] == "verified":
+            due = not row["lease_expires"] or datetime.fromisoformat(row["lease_expires"]) - now < RENEW_MARGIN
+        else:
+            # discovered, denied, expired, or pending without a verification yet
+            due = requested is None or now - requested > PENDING_TIMEOUT
+        if due:
+            ok = request_subscription(row["source"], db_path=db_path)
+            stats["requested" if ok else "failed"] += 1
+    return stats
+
+
+def verify_intent(source: str, params: Dict, db_path: str = WEBSUB_DB_PATH) -> Optional[str]:
+    """Handle the hub's GET to the callback; returns the challenge to echo, or None to refuse"""
+    mode = params.get("hub.mode")
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT topic, state FROM subscriptions WHERE source = ?", (source,)).fetchone()
+        if row is None or params.get("hub.topic") != row["topic"]:
+            return None
+        with conn:
+            if mode == "denied":
+                conn.execute("UPDATE subscriptions SET state = 'denied', last_error = ? WHERE source = ?",
+                             (params.get("hub.reason", "denied by hub"), source))
+                return ""
+            if mode == "subscribe" and row["state"] in ("pending", "verified"):
+                try:
+                    lease = int(params.get("hub.lease_seconds") or LEASE_SECONDS)
+                except ValueError:
+                    return None
+                conn.execute(
+                    "UPDATE subscriptions SET state = 'verified', lease_expires = ?, last_error = NULL WHERE source = ?",
+                    ((datetime.now() + timedelta(seconds=lease)).isoformat(), source),
+                )
+                return params.get("hub.challenge")
+            if mode == "unsubscribe" and row["state"] == "unsubscribing":
+                conn.execute("UPDATE subscriptions SET state = 'unsubscribed', lease_expires = NULL WHERE source = ?",
+                             (source,))
+                return params.get("hub.challenge")
+        return None
+    finally:
+        conn.close()
+
+
+def _signature_ok(secret: Optional[str], body: bytes, signature: str) -> bool:
+    if not secret:
+        return True
+    method, _, digest = signature.partition("=")
+    if method not in ("sha1", "sha256", "sha384", "sha512") or not digest:
+        return False
+    expected = hmac.new(secret.encode(), body, getattr(hashlib, method)).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def ingest_push(source: str, body: bytes, signature: str = "", db_path: str = WEBSUB_DB_PATH) -> List[Dict]:
+    """Parse and store a pushed feed body; returns the new, classified articles
+
+    Bodies with a bad signature are ignored (the caller still acknowledges
+    them, as the spec requires).
+    """
+    import feedparser
+    from .rss_collector import parse_entries, classify_article
+
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT secret, state FROM subscriptions WHERE source = ?", (source,)).fetchone()
+        if row is None or row["state"] != "verified" or not _signature_ok(row["secret"], body, signature):
+            return []
+
+        new_articles = []
+        now = datetime.now().isoformat()
+        with conn:
+            for article in parse_entries(feedparser.parse(body), source):
+                classify_article(article)
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO pushed_items (link, source, published, received_at, item) VALUES (?, ?, ?, ?, ?)",
+                    (article["link"], source, article["published"], now, json.dumps(article)),
+                ).rowcount
+                if inserted:
+                    new_articles.append(article)
+            conn.execute("UPDATE subscriptions SET last_push = ? WHERE source = ?", (now, source))
+        return new_articles
+    finally:
+        conn.close()
+
+
+def pushed_articles(source: str, since: datetime, db_path: str = WEBSUB_DB_PATH) -> List[Dict]:
+    """Articles pushed or fallback-polled for a source and published after `since`"""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT item FROM pushed_items WHERE source = ? AND published > ?", (source, since.isoformat())
+        ).fetchall()
+    finally:
+        conn.close()
+    return [json.loads(row["item"]) for row in rows]
+
+
+def subscription_status(db_path: str = WEBSUB_DB_PATH) -> List[Dict]:
+    if not os.path.exists(db_path):
+        return []
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT source, hub, state, lease_expires, last_push, last_polled, last_error "
+            "FROM subscriptions ORDER BY source"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    # Show subscription state
+    for sub in subscription_status():
+        print(f"  {sub['source']:<18} {sub['state']:<12} lease={sub['lease_expires'] or '-'}  "
+              f"last_push={sub['last_push'] or '-'}  {sub['last_error'] or ''}")
@@ -0,0 +1,395 @@
+"""
+Work-queue collection - spread one run's fetching over worker processes
+The coordinator turns a run into tasks (one per polled feed, one per Twitter
+account, one for DefiLlama) in a SQLite queue. Workers lease tasks; a lease
+hides its task for LEASE_SECONDS, so a crashed or stuck worker's task
+becomes visible again and is retried, up to MAX_ATTEMPTS with backoff. A
+lease id guards completion, so only the current holder's results count.
+Results are written to the queue database; once every task is settled,
+the coordinator gathers them and the run continues to the outputs.
+
+    python -m collectors.workqueue              # worker: serve tasks until stopped
+    python -m collectors.workqueue --run ID     # worker: exit once run ID is settled
+
+Workers on other machines need the queue database on a shared volume
+(WORKQUEUE_DB_PATH) plus the same config and environment.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import subprocess
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import deadline
+
+WORKQUEUE_DB_PATH = os.getenv("WORKQUEUE_DB_PATH", os.path.join("data", "workqueue.db"))
+LEASE_SECONDS = int(os.getenv("WORKQUEUE_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = timedelta(seconds=15)
+POLL_INTERVAL = 1.0
+# Longest a coordinator waits for a run before gathering whatever finished
+RUN_TIMEOUT = timedelta(minutes=int(os.getenv("WORKQUEUE_RUN_TIMEOUT_MINUTES", "30")))
+RETENTION = timedelta(days=3)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    params TEXT NOT NULL,
+    gathered_at TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at TEXT NOT NULL,
+    lease_id TEXT,
+    worker TEXT,
+    last_error TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_visible ON tasks(status, visible_at);
+CREATE INDEX IF NOT EXISTS tasks_run ON tasks(run_id, status);
+CREATE TABLE IF NOT EXISTS results (
+    task_id INTEGER PRIMARY KEY REFERENCES tasks(id),
+    run_id TEXT NOT NULL,
+    items TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+"""
+
+
+def connect(db_path: str = WORKQUEUE_DB_PATH) -> sqlite3.Connection:
+    """Open the queue database, creating the schema on first use"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def plan_tasks(include_twitter: bool = True) -> Tuple[List[Tuple[str, str, str]], List[str]]:
+    """(kind, name, target) tasks for one run, and the feeds served from WebSub pushes instead"""
+    from . import websub
+    from .rss_collector import all_feeds
+    from .twitter_collector import TWITTER_ACCOUNTS, get_twitter_client
+
+    pushed = websub.push_sources()
+    tasks, skipped = [], []
+    for source_name, url in all_feeds().items():
+        if source_name in pushed:
+            skipped.append(source_name)
+        else:
+            tasks.append(("feed", source_name, url))
+    tasks.append(("defillama", "defillama", ""))
+    if include_twitter and get_twitter_client():
+        tasks.extend(("twitter", username, category) for username, category in TWITTER_ACCOUNTS.items())
+    return tasks, skipped
+
+
+def enqueue_collection(hours_back: int = 24, raises_days: int = 7, include_twitter: bool = True,
+                       db_path: str = WORKQUEUE_DB_PATH) -> str:
+    """Create a run and queue its tasks, returning the run id"""
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    tasks, pushed = plan_tasks(include_twitter)
+    params = {"hours_back": hours_back, "raises_days": raises_days, "pushed": pushed}
+    # Workers may run elsewhere, so the run deadline travels as wall-clock time
+    if deadline.remaining() is not None:
+        params["deadline"] = time.time() + deadline.remaining()
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("INSERT INTO runs (run_id, created, params) VALUES (?, ?, ?)",
+                         (run_id, _now(), json.dumps(params)))
+            conn.executemany(
+                "INSERT INTO tasks (run_id, kind, name, target, visible_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, kind, name, target, _now()) for kind, name, target in tasks],
+            )
+    finally:
+        conn.close()
+    return run_id
+
+
+def _expire(conn: sqlite3.Connection):
+    """Fail leased tasks whose lease ran out on their last attempt"""
+    with conn:
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', last_error = 'lease expired', finished_at = ? "
+            "WHERE status = 'leased' AND visible_at <= ? AND attempts >= ?",
+            (_now(), _now(), MAX_ATTEMPTS),
+        )
+
+
+def lease_task(worker: str, run_id: Optional[str] = None, conn: Optional[sqlite3.Connection] = None,
+               db_path: str = WORKQUEUE_DB_PATH) -> Optional[sqlite3.Row]:
+    """Lease the oldest visible task (of run_id, if given), hiding it for LEASE_SECONDS
+
+    Visible means queued and due, or leased by a worker whose lease expired.
+    Tasks of runs past their deadline are left for the coordinator to report
+    as missed, as in-process collection skips sources once time is up.
+    """
+    own = conn is None
+    conn = conn or connect(db_path)
+    try:
+        _expire(conn)
+        scope = "AND run_id = ?" if run_id else ""
+        while True:
+            now = _now()
+            row = conn.execute(
+                f"SELECT id FROM tasks WHERE status IN ('queued', 'leased') AND visible_at <= ? "
+                f"AND attempts < ? {scope} "
+                f"AND run_id NOT IN (SELECT run_id FROM runs WHERE json_extract(params, '$.deadline') <= ?) "
+                f"ORDER BY id LIMIT 1",
+                (now, MAX_ATTEMPTS, *([run_id] if run_id else []), time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            lease_id = uuid.uuid4().hex
+            hidden_until = (datetime.now() + timedelta(seconds=LEASE_SECONDS)).isoformat()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE tasks SET status = 'leased', lease_id = ?, worker = ?, visible_at = ?, "
+                    "attempts = attempts + 1 "
+                    "WHERE id = ? AND status IN ('queued', 'leased') AND visible_at <= ? AND attempts < ?",
+                    (lease_id, worker, hidden_until, row["id"], now, MAX_ATTEMPTS),
+                )
+            # Another worker won the race for this task: look again
+            if cursor.rowcount == 1:
+                return conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone()
+    finally:
+        if own:
+            conn.close()
+
+
+def complete_task(conn: sqlite3.Connection, task: sqlite3.Row, items: Dict[str, List[Dict]]) -> bool:
+    """Store a task's items; ignored (False) if its lease was lost to another worker"""
+    with conn:
+        cursor = conn.execute(
+            "UPDATE tasks SET status = 'done', finished_at = ?, last_error = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_id = ?",
+            (_now(), task["id"], task["lease_id"]),
+        )
+        if cursor.rowcount != 1:
+            return False
+        conn.execute("INSERT OR REPLACE INTO results (task_id, run_id, items) VALUES (?, ?, ?)",
+                     (task["id"], task["run_id"], json.dumps(items)))
+    return True
+
+
+def fail_task(conn: sqlite3.Connection, task: sqlite3.Row, error: str) -> bool:
+    """Make a failed task visible again after a backoff, or give up after MAX_ATTEMPTS"""
+    attempts = task["attempts"]
+    status = "failed" if attempts >= MAX_ATTEMPTS else "queued"
+    visible_at = (datetime.now() + BACKOFF_BASE * 2 ** (attempts - 1)).isoformat()
+    with conn:
+        cursor = conn.execute(
+            "UPDATE tasks SET status = ?, visible_at = ?, last_error = ?, finished_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_id = ?",
+            (status, visible_at, error, _now() if status == "failed" else None, task["id"], task["lease_id"]),
+        )
+    return cursor.rowcount == 1
+
+
+def run_task(task: sqlite3.Row, params: Dict) -> Dict[str, List[Dict]]:
+    """Fetch and normalize one task's items; raises so the queue can retry"""
+    if task["kind"] == "feed":
+        from .rss_collector import load_feed, recent_articles
+        cutoff = datetime.now() - timedelta(hours=params["hours_back"])
+        return {"articles": recent_articles(load_feed(task["target"], task["name"]), cutoff)}
+    if task["kind"] == "twitter":
+        from .twitter_collector import collect_account, get_twitter_client
+        token = get_twitter_client()
+        if not token:
+            raise RuntimeError("TWITTER_BEARER_TOKEN not set on this worker")
+        cutoff = datetime.now() - timedelta(hours=params["hours_back"])
+        return {"tweets": collect_account(task["name"], task["target"], token, cutoff)}
+    if task["kind"] == "defillama":
+        from .defillama_collector import fetch_recent_raises
+        return {"raises": fetch_recent_raises(days_back=params["raises_days"])}
+    raise ValueError(f"unknown task kind {task['kind']!r}")
+
+
+def run_pending(run_id: str, conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT COUNT(*) FROM tasks WHERE run_id = ? AND status IN ('queued', 'leased')", (run_id,)
+    ).fetchone()
+    return row[0]
+
+
+def run_expired(run_id: str, conn: sqlite3.Connection) -> bool:
+    """Whether a run's deadline has passed"""
+    row = conn.execute("SELECT json_extract(params, '$.deadline') FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return bool(row and row[0] is not None and row[0] <= time.time())
+
+
+def run_worker(run_id: Optional[str] = None, worker: Optional[str] = None,
+               db_path: str = WORKQUEUE_DB_PATH) -> int:
+    """Lease and run tasks until stopped, or until run_id has nothing left or is past its deadline
+
+    Returns the number of tasks completed.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect(db_path)
+    params: Dict[str, Dict] = {}
+    completed = 0
+    try:
+        while True:
+            task = lease_task(worker, run_id, conn)
+            if task is None:
+                if run_id and (run_pending(run_id, conn) == 0 or run_expired(run_id, conn)):
+                    return completed
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            if task["run_id"] not in params:
+                row = conn.execute("SELECT params FROM runs WHERE run_id = ?", (task["run_id"],)).fetchone()
+                params[task["run_id"]] = json.loads(row["params"])
+            run_deadline = params[task["run_id"]].get("deadline")
+            deadline.start(run_deadline - time.time() if run_deadline else None)
+            try:
+                items = run_task(task, params[task["run_id"]])
+            except Exception as e:
+                fail_task(conn, task, str(e))
+                print(f"[{worker}] {task['kind']} {task['name']} failed (attempt {task['attempts']}): {e}")
+                continue
+            if complete_task(conn, task, items):
+                completed += 1
+    finally:
+        conn.close()
+
+
+def start_workers(run_id: str, count: int, db_path: str = WORKQUEUE_DB_PATH) -> List[subprocess.Popen]:
+    """Launch local worker processes for one run"""
+    env = {**os.environ, "WORKQUEUE_DB_PATH": os.path.abspath(db_path)}
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "collectors.workqueue", "--run", run_id, "--worker-id", f"local-{i}"], env=env,
+        )
+        for i in range(count)
+    ]
+
+
+def wait_for_run(run_id: str, timeout: timedelta = RUN_TIMEOUT, db_path: str = WORKQUEUE_DB_PATH) -> bool:
+    """Block until every task of the run is done or failed; False on timeout or at the run deadline"""
+    if deadline.remaining() is not None:
+        timeout = min(timeout, timedelta(seconds=deadline.remaining()))
+    give_up = datetime.now() + timeout
+    conn = connect(db_path)
+    try:
+        while datetime.now() < give_up:
+            _expire(conn)
+            if run_pending(run_id, conn) == 0:
+                return True
+            time.sleep(POLL_INTERVAL)
+        return False
+    finally:
+        conn.close()
+
+
+def cancel_run(run_id: str, db_path: str = WORKQUEUE_DB_PATH) -> List[Dict]:
+    """Cancel a run's unfinished tasks so no worker picks them up; returns the cancelled tasks"""
+    conn = connect(db_path)
+    try:
+        with conn:
+            rows = conn.execute(
+                "SELECT kind, name FROM tasks WHERE run_id = ? AND status IN ('queued', 'leased') ORDER BY id",
+                (run_id,),
+            ).fetchall()
+            conn.execute(
+                "UPDATE tasks SET status = 'cancelled', finished_at = ?, last_error = 'run gave up waiting' "
+                "WHERE run_id = ? AND status IN ('queued', 'leased')", (_now(), run_id),
+            )
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def gather_run(run_id: str, db_path: str = WORKQUEUE_DB_PATH) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """(articles, raw tweets, raises) from a run's finished tasks, ordered like in-process collection"""
+    from . import websub
+    from .twitter_collector import sort_by_engagement
+
+    conn = connect(db_path)
+    try:
+        params = json.loads(conn.execute("SELECT params FROM runs WHERE run_id = ?", (run_id,)).fetchone()["params"])
+        articles, tweets, raises = [], [], []
+        for row in conn.execute("SELECT items FROM results WHERE run_id = ? ORDER BY task_id", (run_id,)):
+            items = json.loads(row["items"])
+            articles.extend(items.get("articles", []))
+            tweets.extend(items.get("tweets", []))
+            raises.extend(items.get("raises", []))
+        with conn:
+            conn.execute("UPDATE runs SET gathered_at = ? WHERE run_id = ?", (_now(), run_id))
+    finally:
+        conn.close()
+
+    # Pushed feeds are read from this machine's WebSub store, as in collect_all_feeds
+    cutoff = datetime.now() - timedelta(hours=params["hours_back"])
+    for source_name in params["pushed"]:
+        articles.extend(websub.pushed_articles(source_name, cutoff))
+
+    articles.sort(key=lambda x: x["published"], reverse=True)
+    return articles, sort_by_engagement(tweets), raises
+
+
+def run_summary(run_id: str, db_path: str = WORKQUEUE_DB_PATH) -> Dict[str, int]:
+    """Task counts by status for one run"""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (run_id,))
+        return {status: count for status, count in rows}
+    finally:
+        conn.close()
+
+
+def failed_tasks(run_id: str, db_path: str = WORKQUEUE_DB_PATH) -> List[Dict]:
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT kind, name, attempts, last_error FROM tasks WHERE run_id = ? AND status = 'failed' ORDER BY id",
+            (run_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def prune_queue(db_path: str = WORKQUEUE_DB_PATH) -> int:
+    """Drop runs older than the retention window"""
+    cutoff = (datetime.now() - RETENTION).isoformat()
+    conn = connect(db_path)
+    try:
+        with conn:
+            old = [row["run_id"] for row in conn.execute("SELECT run_id FROM runs WHERE created < ?", (cutoff,))]
+            for table in ("results", "tasks", "runs"):
+                conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(r,) for r in old])
+    finally:
+        conn.close()
+    return len(old)
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Collection worker")
+    parser.add_argument("--run", help="Only serve this run and exit once it is settled")
+    parser.add_argument("--worker-id", help="Name recorded on leased tasks (default host:pid)")
+    args = parser.parse_args()
+    done = run_worker(args.run, args.worker_id)
+    print(f"Worker finished: {done} tasks completed")
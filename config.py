@@ -69,3 +69,123 @@ CATEGORIES = {
     "crypto": CRYPTO_KEYWORDS,
     "ai": AI_KEYWORDS,
 }
+
+# Email digest subscription profiles
+# Recipients opt in with "email:profile" in EMAIL_RECIPIENTS (plain addresses get "all").
+#   categories: keep articles tagged with any of these categories
+#   keywords:   keep articles mentioning any of these terms
+#   raises:     include the DefiLlama funding rounds section
+#   min_raise:  minimum round size in $M
+#   investors:  keep rounds with any of these investors (also used as article keywords)
+#   sections:   sections to include, in order
+DIGEST_SECTIONS = ["raises", "funding", "regulatory", "trending"]
+
+DIGEST_PROFILES = {
+    "all": {},
+    "ai": {"categories": ["ai"], "raises": False},
+    "crypto": {"categories": ["crypto"]},
+    "big_raises": {"min_raise": 10, "sections": ["raises", "funding"]},
+    "paradigm": {"investors": ["paradigm"], "sections": ["raises", "funding"]},
+}
+
+# Site profiles (processing/profiles.py): one collection pass fans out to a
+# dashboard under docs/<profile>/, a digest and a Sheet per profile.
+#   feeds:       sources to keep (RSS names, "defillama", "twitter"); all if unset
+#   extra_feeds: feeds only this profile wants, collected in the shared pass but shown
+#                only to the profiles listing them (never in the main outputs)
+#   keywords:    extra classification keywords per category (funding, regulatory, crypto, ai)
+#   min_raise:   smallest round in $M to show
+#   sections:    dashboard cards, from raises, funding, regulatory, crypto, ai, trends, trending
+#   outputs:     dashboard, email (recipients_env) and sheets (spreadsheet_env) targets
+SITE_PROFILES = {
+    "ai": {
+        "title": "AI",
+        "feeds": ["techcrunch_ai", "venturebeat_ai", "mit_tech_review", "wired_ai",
+                  "openai_blog", "anthropic_news", "deepmind", "hn_front", "twitter"],
+        "keywords": {"ai": ["inference", "gpu", "foundation model"]},
+        "sections": ["funding", "ai", "regulatory"],
+        "outputs": {
+            "dashboard": {},
+            "email": {"recipients_env": "AI_EMAIL_RECIPIENTS"},
+            "sheets": {"spreadsheet_env": "AI_SPREADSHEET_ID"},
+        },
+    },
+    "crypto": {
+        "title": "Crypto",
+        "feeds": ["the_block", "coindesk", "cointelegraph", "decrypt", "blockworks", "messari",
+                  "unchained", "techcrunch_crypto", "sec_press", "defillama", "twitter"],
+        "sections": ["raises", "funding", "regulatory", "crypto", "trends"],
+        "outputs": {
+            "dashboard": {},
+            "email": {"recipients_env": "CRYPTO_EMAIL_RECIPIENTS"},
+            "sheets": {"spreadsheet_env": "CRYPTO_SPREADSHEET_ID"},
+        },
+    },
+    "lp": {
+        "title": "LP",
+        "feeds": ["a16z_crypto", "a16z_main", "paradigm", "variant", "polychain",
+                  "the_block", "techcrunch_ai", "defillama"],
+        "keywords": {"funding": ["fund ii", "fund iii", "new fund", "closes fund", "lps"]},
+        "min_raise": 10,
+        "sections": ["raises", "funding", "trends"],
+        "outputs": {
+            "dashboard": {},
+            "email": {"recipients_env": "LP_EMAIL_RECIPIENTS"},
+        },
+    },
+}
+
+# Relevance scoring (processing/scoring.py)
+# score = (source + keyword hits + coverage + engagement + amount) * recency decay
+SCORING_WEIGHTS = {
+    "source": 1.0,             # multiplier on SOURCE_WEIGHTS
+    "categories": {"funding": 1.5, "regulatory": 1.0, "crypto": 0.5, "ai": 0.5},
+    "coverage": 1.5,           # per log(1 + outlets covering the same raise)
+    "engagement": 1.0,         # tweet likes+retweets relative to the account's average
+    "amount": 0.8,             # per log(1 + round size in $M)
+    "half_life_hours": 24.0,   # recency decay
+}
+
+# Per-source weights (unlisted sources count as 1.0)
+SOURCE_WEIGHTS = {
+    "the_block": 1.3,
+    "coindesk": 1.2,
+    "techcrunch_ai": 1.2,
+    "techcrunch_crypto": 1.2,
+    "blockworks": 1.1,
+    "sec_press": 1.3,
+    "hn_front": 0.6,
+    "defillama": 1.5,
+}
+
+# Investor name variants folded into one node of the co-investment graph
+# (processing/investors.py); keys and values are normalized names
+INVESTOR_ALIASES = {
+    "a16z": "andreessen horowitz",
+    "a16z crypto": "andreessen horowitz",
+    "a16z speedrun": "andreessen horowitz",
+    "andreessen horowitz a16z": "andreessen horowitz",
+    "paradigm capital": "paradigm",
+    "dragonfly capital": "dragonfly",
+    "dragonfly capital partners": "dragonfly",
+    "polychain": "polychain capital",
+    "binance labs": "yzi labs",
+    "multicoin": "multicoin capital",
+    "pantera": "pantera capital",
+}
+
+# Web app scheduler (scheduler.py): one job per collector and per output
+#   every:     fixed cadence, on a grid aligned to midnight so runs never drift
+#   at:        daily wall-clock time (HH:MM, server local time)
+#   after:     run once any of these collectors stores changed items, debounce later
+#   budget:    Twitter reads per month; the cadence is derived from it (see scheduler.twitter_interval)
+#   jitter:    fraction of the cadence to randomly delay each run by
+#   catch_up:  "once" runs a missed slot late (at most grace late), "skip" waits for the next slot
+SCHEDULE = {
+    "rss": {"every": "15m", "jitter": 0.1, "catch_up": "once"},
+    "defillama": {"every": "1h", "jitter": 0.1, "catch_up": "once"},
+    "twitter": {"budget": 10000, "jitter": 0.05, "catch_up": "once"},
+    "dashboard": {"after": ["rss", "defillama", "twitter"], "debounce": "1m"},
+    "sheets": {"after": ["rss", "defillama", "twitter"], "debounce": "10m"},
+    "email": {"at": "08:00", "catch_up": "once", "grace": "4h"},
+}
@@ -0,0 +1,130 @@
+"""
+Run deadline - a time budget shared by every fetch in a run
+Set with `main.py --deadline 90s` or RUN_DEADLINE. While a deadline is set,
+fetches cap their timeouts at the time remaining, and sources not reached
+in time are skipped. Skipped sources are recorded as missed, and outputs are
+built from whatever arrived, with the missed sources marked stale on the
+dashboard. With no deadline, every helper falls back to its usual
+behaviour.
+
+Each run owns a Deadline object. start() binds it to the calling thread,
+so concurrent runs (the scheduler's jobs, a /run request) do not share a
+budget; the module-level helpers act on the current thread's run.
+"""
+import re
+import time
+import threading
+from typing import List, Dict, Optional
+
+# Smallest timeout handed to a fetch, so a nearly spent budget still gets a real attempt
+MIN_TIMEOUT = 1.0
+
+DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$", re.IGNORECASE)
+UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# Chunk size for reading streamed response bodies between deadline checks
+READ_CHUNK = 64 * 1024
+
+_local = threading.local()
+
+
+def parse_duration(text: str) -> float:
+    """Seconds in "90s", "2m", "1.5h", "500ms" or a bare number of seconds"""
+    match = DURATION_RE.match(str(text))
+    if not match:
+        raise ValueError(f"invalid duration {text!r} (expected e.g. 90s, 2m, 1h)")
+    return float(match.group(1)) * UNIT_SECONDS[(match.group(2) or "s").lower()]
+
+
+class Deadline:
+    """One run's time budget and the sources it missed"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.at = time.monotonic() + seconds if seconds is not None else None
+        self._missed: Dict[str, str] = {}
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one"""
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def timeout(self, default: float) -> float:
+        """A fetch timeout: default, capped at the time left in the run"""
+        left = self.remaining()
+        if left is None:
+            return default
+        return max(MIN_TIMEOUT, min(default, left))
+
+    def miss(self, source: str, reason: str = "missed the run deadline"):
+        """Record a source whose data did not arrive in time"""
+        self._missed.setdefault(source, reason)
+
+    def missed(self) -> List[Dict[str, str]]:
+        """Sources recorded by miss(), in the order they were missed"""
+        return [{"source": source, "reason": reason} for source, reason in self._missed.items()]
+
+
+def current() -> Deadline:
+    """The deadline of the run on this thread (an unbounded one outside a run)
+
+    Hand it to any other thread doing the run's work, e.g. a fetch pool.
+    """
+    run = getattr(_local, "run", None)
+    if run is None:
+        run = _local.run = Deadline()
+    return run
+
+
+def start(seconds: Optional[float]) -> Deadline:
+    """Begin a run on this thread with a budget of seconds (None: no deadline)"""
+    _local.run = Deadline(seconds)
+    return _local.run
+
+
+def clear():
+    """Drop the deadline once collection is over; missed sources stay recorded on the run's Deadline"""
+    current().at = None
+
+
+def remaining() -> Optional[float]:
+    return current().remaining()
+
+
+def expired() -> bool:
+    return current().expired()
+
+
+def timeout(default: float) -> float:
+    return current().timeout(default)
+
+
+def miss(source: str, reason: str = "missed the run deadline"):
+    current().miss(source, reason)
+
+
+def missed() -> List[Dict[str, str]]:
+    return current().missed()
+
+
+def read_body(response, seconds: float, run: Optional[Deadline] = None) -> bytes:
+    """Body of a streamed response (requests stream=True), read in chunks
+
+    Socket timeouts only bound the wait for each read, so a server dripping
+    bytes could hold a fetch forever. This gives up with a TimeoutError once
+    seconds have passed or the run deadline expires between chunks.
+    """
+    run = run or current()
+    stop_at = time.monotonic() + run.timeout(seconds)
+    chunks = []
+    try:
+        for chunk in response.iter_content(READ_CHUNK):
+            chunks.append(chunk)
+            if time.monotonic() >= stop_at or run.expired():
+                raise TimeoutError(f"body not read within {seconds:g}s or the run deadline")
+    finally:
+        response.close()
+    return b"".join(chunks)
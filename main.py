@@ -7,29 +7,85 @@ import os
 import argparse
 from dotenv import load_dotenv
 
-from collectors import collect_all_feeds, fetch_recent_raises, collect_twitter_feed, format_tweet_for_digest
-from outputs import push_articles_to_sheet, push_raises_to_sheet, send_digest_email, generate_dashboard
+import config
+import collectors
+import deadline
+import profiling
+from profiling import stage
+from outputs import index_items
+from outputs.snapshots import save_snapshot, load_snapshot
+from outputs.outbox import (
+    run_handler, enqueue_run, deliver_run, drain_outbox, replay_run, outbox_status, prune_outbox,
+)
 
 load_dotenv()
 
 
-def run_aggregator(
-    hours_back: int = 24,
-    raises_days: int = 7,
-    push_sheets: bool = True,
-    send_email: bool = True,
-    dry_run: bool = False,
-    include_twitter: bool = True,
-    build_dashboard: bool = True,
-):
-    """Main aggregator function"""
-    print("=" * 50)
-    print("Frontier Tech News Aggregator")
-    print("=" * 50)
+def deliver_output(run_id: str, output: str, articles, raises, options: dict):
+    """Deliver one output through the outbox, or directly if the outbox is unavailable"""
+    if run_id:
+        deliver_run(run_id, output)
+        return
+    try:
+        run_handler(output, articles, raises, options)
+    except Exception as e:
+        print(f"      Error: {e}")
 
+
+def profile_targets(push_sheets: bool, send_email: bool, build_dashboard: bool, sheets_mode: str = None) -> dict:
+    """Outbox targets ("output:profile" -> options) for every site profile's enabled outputs"""
+    targets = {}
+    for name, profile in config.SITE_PROFILES.items():
+        outputs = profile.get("outputs", {})
+        if build_dashboard and "dashboard" in outputs:
+            targets[f"dashboard:{name}"] = {
+                "profile": name, "output_dir": os.path.join("docs", name),
+                "sections": profile.get("sections"), "title": profile.get("title", name),
+            }
+        recipients = os.getenv(outputs.get("email", {}).get("recipients_env", ""), "")
+        if send_email and "email" in outputs and recipients:
+            targets[f"email:{name}"] = {"profile": name, "recipients": recipients}
+        spreadsheet_id = os.getenv(outputs.get("sheets", {}).get("spreadsheet_env", ""), "")
+        if push_sheets and "sheets" in outputs and spreadsheet_id:
+            targets[f"sheets:{name}"] = {"profile": name, "spreadsheet_id": spreadsheet_id, "mode": sheets_mode}
+    return targets
+
+
+def deliver_profiles(run_id: str, kind: str, targets: dict, articles, raises):
+    """Deliver every site profile's variant of one output kind"""
+    for output, options in targets.items():
+        if output.startswith(f"{kind}:"):
+            print(f"      Profile '{options['profile']}'...")
+            deliver_output(run_id, output, articles, raises, options)
+
+
+def run_outbox_command(args) -> bool:
+    """Handle the outbox maintenance flags; returns True if one was given"""
+    if args.outbox_status:
+        for entry in outbox_status():
+            error = f" - {entry['last_error']}" if entry["last_error"] else ""
+            print(f"  {entry['run_id']}  {entry['output']:<16} {entry['status']:<9} "
+                  f"attempts={entry['attempts']}{error}")
+        return True
+    if args.drain_outbox:
+        stats = drain_outbox(force=True)
+        pruned = prune_outbox()
+        print(f"Outbox drained: {stats['delivered']} delivered, {stats['failed']} failed, {pruned} old runs pruned")
+        return True
+    if args.replay_outbox:
+        outputs = args.outputs.split(",") if args.outputs else None
+        stats = replay_run(args.replay_outbox, outputs)
+        print(f"Replay finished: {stats['delivered']} delivered, {stats['failed']} failed")
+        return True
+    return False
+
+
+def collect_items(hours_back: int = 24, raises_days: int = 7, include_twitter: bool = True):
+    """Run every collector and return (articles incl. tweets, raises)"""
     # Collect RSS feeds
-    print(f"\n[1/6] Collecting RSS feeds (last {hours_back}h)...")
-    articles = collect_all_feeds(hours_back=hours_back)
+    print(f"\n[1/7] Collecting RSS feeds (last {hours_back}h)...")
+    with stage("collect:rss"):
+        articles = collectors.collect_all_feeds(hours_back=hours_back)
     print(f"      Found {len(articles)} articles")
 
     funding_news = [a for a in articles if a["is_funding"]]
@@ -38,72 +94,264 @@ def run_aggregator(
     print(f"      - Regulatory news: {len(regulatory_news)}")
 
     # Collect DefiLlama raises
-    print(f"\n[2/6] Fetching DefiLlama raises (last {raises_days} days)...")
-    raises = fetch_recent_raises(days_back=raises_days)
+    print(f"\n[2/7] Fetching DefiLlama raises (last {raises_days} days)...")
+    with stage("collect:defillama"):
+        raises = collectors.fetch_recent_raises(days_back=raises_days)
     print(f"      Found {len(raises)} funding rounds")
 
     # Collect Twitter feed
-    tweets = []
     if include_twitter:
-        print(f"\n[3/6] Collecting Twitter feed (last {hours_back}h)...")
-        raw_tweets = collect_twitter_feed(hours_back=hours_back)
-        tweets = [format_tweet_for_digest(t) for t in raw_tweets]
+        print(f"\n[3/7] Collecting Twitter feed (last {hours_back}h)...")
+        with stage("collect:twitter"):
+            raw_tweets = collectors.collect_twitter_feed(hours_back=hours_back)
+        tweets = [collectors.format_tweet_for_digest(t) for t in raw_tweets]
         deal_tweets = [t for t in tweets if t["is_funding"]]
         print(f"      Found {len(tweets)} tweets ({len(deal_tweets)} deal-related)")
         # Merge tweets into articles
         articles.extend(tweets)
     else:
-        print("\n[3/6] Skipping Twitter (disabled or not configured)")
+        print("\n[3/7] Skipping Twitter (disabled or not configured)")
+
+    return articles, raises
+
+
+def collect_distributed(hours_back: int = 24, raises_days: int = 7, include_twitter: bool = True, workers: int = 4):
+    """Collect through the work queue with `workers` local processes (0 = external workers only)"""
+    from collectors import workqueue
+
+    run_id = workqueue.enqueue_collection(hours_back, raises_days, include_twitter)
+    summary = workqueue.run_summary(run_id)
+    print(f"\n[1-3/7] Queued collection run {run_id}: {sum(summary.values())} tasks, {workers} local workers")
+    processes = workqueue.start_workers(run_id, workers)
+    settled = False
+    try:
+        with stage("collect:queue"):
+            settled = workqueue.wait_for_run(run_id)
+    finally:
+        for process in processes:
+            if not settled:
+                process.terminate()
+            process.wait()
+    if not settled:
+        cancelled = workqueue.cancel_run(run_id)
+        print(f"      Stopped waiting for workers, cancelled {len(cancelled)} unfinished tasks")
+        for task in cancelled:
+            deadline.miss(task["name"] if task["kind"] != "twitter" else f"@{task['name']}",
+                          "missed the run deadline" if deadline.expired() else "workers timed out")
+
+    articles, raw_tweets, raises = workqueue.gather_run(run_id)
+    summary = workqueue.run_summary(run_id)
+    print(f"      Tasks: {summary.get('done', 0)} done, {summary.get('failed', 0)} failed, "
+          f"{summary.get('cancelled', 0)} cancelled")
+    for task in workqueue.failed_tasks(run_id):
+        print(f"      - {task['kind']} {task['name']} ({task['attempts']} attempts): {task['last_error']}")
+        if deadline.expired():
+            deadline.miss(task["name"] if task["kind"] != "twitter" else f"@{task['name']}")
+    workqueue.prune_queue()
+
+    tweets = [collectors.format_tweet_for_digest(t) for t in raw_tweets]
+    print(f"      Found {len(articles)} articles, {len(raises)} funding rounds, {len(tweets)} tweets")
+    articles.extend(tweets)
+    return articles, raises
 
-    if dry_run:
-        print("\n[DRY RUN] Skipping outputs")
-        print("\n--- Top Funding News ---")
-        for a in funding_news[:5]:
-            print(f"  [{a['source']}] {a['title']}")
-        print("\n--- Top Raises ---")
-        for r in raises[:5]:
-            print(f"  {r['project']} - {r['amount']} ({r['round']})")
-        if tweets:
-            print("\n--- Top Tweets ---")
-            for t in tweets[:5]:
-                print(f"  [{t['source']}] {t['title']}")
-        return
+
+def prepare_items(articles, raises):
+    """Canonicalize links, fold headline deals into the raises and link raises to their coverage, in place"""
+    # NumPy-backed processing is only needed for an actual run, not the outbox commands
+    from processing import link_raises, extract_deals, merge_deals, canonicalize_items
+
+    # Canonical URL keys (tracking params stripped, redirects resolved) and duplicate folding
+    with stage("process:urls"):
+        canonical = canonicalize_items(articles, raises)
+    print(f"\n      Canonicalized links: {canonical['resolved']} redirects resolved, "
+          f"{canonical['duplicates']} duplicate articles merged")
+
+    # Pull structured deals out of funding headlines/tweets and fold them into the raises
+    with stage("process:deals"):
+        deals = extract_deals(articles)
+        merged = merge_deals(raises, deals)
+    print(f"\n      Extracted {len(deals)} deals from headlines "
+          f"({merged['added']} new rounds, {merged['enriched']} DefiLlama rounds enriched)")
+
+    # Cross-reference raises with the articles and tweets covering them
+    with stage("process:linking"):
+        links = link_raises(articles, raises)
+    print(f"      Linked {links} articles/tweets to funding rounds")
+
+
+def update_indexes(articles, raises):
+    """Add prepared items to the search index, funding rollups, investor graph and trend sketches"""
+    from processing import update_rollups, update_investor_graph, update_trending
+
+    print("\n[4/7] Updating search index, funding rollups, investor graph and trending topics...")
+    try:
+        with stage("index:search"):
+            index_items(articles, raises)
+    except Exception as e:
+        print(f"      Error: {e}")
+    try:
+        with stage("index:rollups"):
+            added = update_rollups(raises)
+        print(f"      Rolled up {added} new funding rounds")
+    except Exception as e:
+        print(f"      Error: {e}")
+    try:
+        with stage("index:investors"):
+            added = update_investor_graph(raises)
+        print(f"      Added {added} investor participations to the co-investment graph")
+    except Exception as e:
+        print(f"      Error: {e}")
+    try:
+        with stage("index:trending"):
+            added = update_trending(articles)
+        print(f"      Counted terms from {added} new items for trending topics")
+    except Exception as e:
+        print(f"      Error: {e}")
+
+
+def run_outputs(
+    articles,
+    raises,
+    push_sheets: bool = True,
+    send_email: bool = True,
+    build_dashboard: bool = True,
+    sheets_mode: str = None,
+    stale: list = None,
+):
+    """Deliver the enabled outputs from already prepared and indexed items
+
+    The outputs-only entry point: run_aggregator calls it after collecting,
+    the scheduler's output jobs call it with the items its collector jobs
+    prepared, so nothing is collected, canonicalized or indexed again.
+    """
+    # Queue every enabled output in the durable outbox, then deliver each one.
+    # Failed deliveries stay queued for `--drain-outbox` instead of a full re-collection.
+    spreadsheet_id = os.getenv("SPREADSHEET_ID")
+    targets = {}
+    if push_sheets and spreadsheet_id:
+        targets["sheets"] = {"spreadsheet_id": spreadsheet_id, "mode": sheets_mode}
+    if send_email:
+        targets["email"] = {}
+    if build_dashboard:
+        targets["dashboard"] = {"output_dir": "docs"}
+    # Site profiles fan out from the same collected items: rendering only, no extra fetching
+    targets.update(profile_targets(push_sheets, send_email, build_dashboard, sheets_mode))
+    if stale:
+        for output, options in targets.items():
+            if output.split(":")[0] == "dashboard":
+                options["stale"] = stale
+
+    run_id = None
+    if targets:
+        try:
+            run_id = enqueue_run(articles, raises, targets)
+        except Exception as e:
+            print(f"\n      Outbox unavailable, delivering directly: {e}")
 
     # Push to Google Sheets
     if push_sheets:
-        spreadsheet_id = os.getenv("SPREADSHEET_ID")
+        print("\n[5/7] Pushing to Google Sheets...")
         if spreadsheet_id:
-            print("\n[4/6] Pushing to Google Sheets...")
-            try:
-                push_articles_to_sheet(articles, spreadsheet_id, "News")
-                push_raises_to_sheet(raises, spreadsheet_id, "Funding Rounds")
-            except Exception as e:
-                print(f"      Error: {e}")
+            deliver_output(run_id, "sheets", articles, raises, targets["sheets"])
         else:
-            print("\n[4/6] Skipping Sheets (SPREADSHEET_ID not set)")
+            print("      Skipping main Sheet (SPREADSHEET_ID not set)")
+        deliver_profiles(run_id, "sheets", targets, articles, raises)
     else:
-        print("\n[4/6] Skipping Sheets (disabled)")
+        print("\n[5/7] Skipping Sheets (disabled)")
 
     # Send email digest
     if send_email:
-        print("\n[5/6] Sending email digest...")
-        try:
-            send_digest_email(articles, raises)
-        except Exception as e:
-            print(f"      Error: {e}")
+        print("\n[6/7] Sending email digest...")
+        deliver_output(run_id, "email", articles, raises, targets["email"])
+        deliver_profiles(run_id, "email", targets, articles, raises)
     else:
-        print("\n[5/6] Skipping email (disabled)")
+        print("\n[6/7] Skipping email (disabled)")
 
     # Generate dashboard
     if build_dashboard:
-        print("\n[6/6] Generating dashboard...")
+        print("\n[7/7] Generating dashboard...")
+        deliver_output(run_id, "dashboard", articles, raises, targets["dashboard"])
+        deliver_profiles(run_id, "dashboard", targets, articles, raises)
+    else:
+        print("\n[7/7] Skipping dashboard (disabled)")
+
+    if run_id:
+        print(f"\nOutbox run: {run_id}")
+
+
+def run_aggregator(
+    hours_back: int = 24,
+    raises_days: int = 7,
+    push_sheets: bool = True,
+    send_email: bool = True,
+    dry_run: bool = False,
+    include_twitter: bool = True,
+    build_dashboard: bool = True,
+    sheets_mode: str = None,
+    from_snapshot: str = None,
+    workers: int = None,
+    deadline_seconds: float = None,
+):
+    """Main aggregator function
+
+    deadline_seconds bounds collection and link resolution: sources not
+    fetched in time are skipped and marked stale on the dashboard.
+    """
+    print("=" * 50)
+    print("Frontier Tech News Aggregator")
+    print("=" * 50)
+
+    budget = deadline.start(deadline_seconds)
+
+    if from_snapshot:
+        # Replay a stored run: no network access needed for collection
+        print(f"\n[1-3/7] Loading snapshot '{from_snapshot}'...")
+        with stage("snapshot:load"):
+            snapshot = load_snapshot(from_snapshot)
+        articles, raises = snapshot["articles"], snapshot["raises"]
+        print(f"      Loaded {snapshot['header']['id']}: {len(articles)} articles, {len(raises)} funding rounds")
+    else:
+        if workers is None:
+            articles, raises = collect_items(hours_back, raises_days, include_twitter)
+        else:
+            articles, raises = collect_distributed(hours_back, raises_days, include_twitter, workers)
+        stale = budget.missed()
+        if stale:
+            print(f"\n      Not collected in time ({len(stale)} sources, marked stale): "
+                  f"{', '.join(s['source'] for s in stale)}")
         try:
-            generate_dashboard(articles, raises)
+            with stage("snapshot:save"):
+                snapshot_id = save_snapshot(articles, raises, {"hours_back": hours_back, "raises_days": raises_days})
+            print(f"\n      Saved snapshot {snapshot_id}")
         except Exception as e:
-            print(f"      Error: {e}")
-    else:
-        print("\n[6/6] Skipping dashboard (disabled)")
+            print(f"\n      Error saving snapshot: {e}")
+
+    prepare_items(articles, raises)
 
+    # Outputs are always produced, from whatever arrived in time
+    stale = budget.missed()
+    deadline.clear()
+
+    tweets = [a for a in articles if "twitter" in a.get("categories", [])]
+    funding_news = [a for a in articles if a["is_funding"] and "twitter" not in a.get("categories", [])]
+
+    if dry_run:
+        print("\n[DRY RUN] Skipping outputs")
+        print("\n--- Top Funding News ---")
+        for a in funding_news[:5]:
+            print(f"  [{a['source']}] {a['title']}")
+        print("\n--- Top Raises ---")
+        for r in raises[:5]:
+            print(f"  {r['project']} - {r['amount']} ({r['round']})")
+        if tweets:
+            print("\n--- Top Tweets ---")
+            for t in tweets[:5]:
+                print(f"  [{t['source']}] {t['title']}")
+        return
+
+    # Update the full-text search index, the funding rollups, the co-investment graph and the trend sketches
+    update_indexes(articles, raises)
+    run_outputs(articles, raises, push_sheets, send_email, build_dashboard, sheets_mode, stale)
     print("\nDone!")
 
 
@@ -112,22 +360,64 @@ def main():
     parser.add_argument("--hours", type=int, default=24, help="Hours back to fetch news")
     parser.add_argument("--raises-days", type=int, default=7, help="Days back for funding rounds")
     parser.add_argument("--no-sheets", action="store_true", help="Skip Google Sheets push")
+    parser.add_argument("--sheets-mode", choices=["sync", "replace"],
+                        help="Sheets write mode: sync appends/patches rows, replace rewrites the tab "
+                             "(default: SHEETS_SYNC_MODE or sync)")
     parser.add_argument("--no-email", action="store_true", help="Skip email digest")
     parser.add_argument("--dry-run", action="store_true", help="Collect only, no outputs")
     parser.add_argument("--no-twitter", action="store_true", help="Skip Twitter collection")
     parser.add_argument("--no-dashboard", action="store_true", help="Skip dashboard generation")
 
+    parser.add_argument("--from-snapshot", metavar="ID",
+                        help="Feed a stored run snapshot (id, YYYY-MM-DD or 'latest') to the outputs "
+                             "instead of collecting")
+    parser.add_argument("--drain-outbox", action="store_true",
+                        help="Retry undelivered outputs from the outbox without collecting")
+    parser.add_argument("--replay-outbox", metavar="RUN_ID",
+                        help="Deliver a stored run's outputs again ('latest' for the newest run)")
+    parser.add_argument("--outputs", help="Comma-separated outputs to replay (sheets,email,dashboard)")
+    parser.add_argument("--outbox-status", action="store_true", help="List recent outbox deliveries")
+    parser.add_argument("--deadline", type=deadline.parse_duration, metavar="DURATION",
+                        default=os.getenv("RUN_DEADLINE"),
+                        help="Time budget for collection, e.g. 90s or 5m (or set RUN_DEADLINE); late sources "
+                             "are skipped and marked stale")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="Collect through the work queue with N local worker processes "
+                             "(0: rely on `--worker` processes elsewhere)")
+    parser.add_argument("--worker", action="store_true",
+                        help="Serve collection tasks from the work queue until stopped")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage CPU/memory and write a report to data/profiles/ (or set PROFILE=1)")
+
     args = parser.parse_args()
 
-    run_aggregator(
-        hours_back=args.hours,
-        raises_days=args.raises_days,
-        push_sheets=not args.no_sheets,
-        send_email=not args.no_email,
-        dry_run=args.dry_run,
-        include_twitter=not args.no_twitter,
-        build_dashboard=not args.no_dashboard,
-    )
+    if args.profile or os.getenv("PROFILE") == "1":
+        profiling.enable()
+    try:
+        if run_outbox_command(args):
+            return
+        if args.worker:
+            from collectors.workqueue import run_worker
+            run_worker()
+            return
+
+        run_aggregator(
+            hours_back=args.hours,
+            raises_days=args.raises_days,
+            push_sheets=not args.no_sheets,
+            send_email=not args.no_email,
+            dry_run=args.dry_run,
+            include_twitter=not args.no_twitter,
+            build_dashboard=not args.no_dashboard,
+            sheets_mode=args.sheets_mode,
+            from_snapshot=args.from_snapshot,
+            workers=args.workers,
+            deadline_seconds=args.deadline,
+        )
+    finally:
+        report = profiling.finish()
+        if report:
+            print(f"\nProfile report: {report}")
 
 
 if __name__ == "__main__":
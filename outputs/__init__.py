@@ -1,3 +1,31 @@
-from .google_sheets import push_articles_to_sheet, push_raises_to_sheet
-from .email_digest import send_digest_email
-from .dashboard import generate_dashboard
+"""
+Output backends
+Each backend is imported on first use, so runs with Sheets or email disabled
+never load the Google API client or SMTP code.
+"""
+import importlib
+
+# Exported name -> submodule that provides it
+_BACKENDS = {
+    "push_articles_to_sheet": ".google_sheets",
+    "push_raises_to_sheet": ".google_sheets",
+    "push_to_sheets": ".google_sheets",
+    "send_digest_email": ".email_digest",
+    "generate_dashboard": ".dashboard",
+    "index_items": ".search_index",
+    "search_items": ".search_index",
+}
+
+__all__ = list(_BACKENDS)
+
+
+def __getattr__(name):
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_BACKENDS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
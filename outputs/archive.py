@@ -0,0 +1,361 @@
+"""
+Incremental per-day archive and static search index for the dashboard
+Only days that receive new items are rewritten, and search shards are
+partitioned by month so past months never change once they are complete
+"""
+import os
+import re
+import json
+import html
+from typing import List, Dict, Iterable
+
+from processing.linking import raise_key
+from processing.urls import canonicalize_url
+
+ARCHIVE_DIR = "archive"
+SEARCH_DIR = "search"
+SEARCH_SHARDS = 16
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "with",
+}
+
+# Fields kept per archived item (summaries are dropped to keep day files small)
+ARTICLE_FIELDS = ("title", "link", "source", "published", "categories", "is_funding", "is_regulatory")
+RAISE_FIELDS = ("project", "amount", "round", "category", "lead_investors", "chains", "date")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens (mirrored in search.js)"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def shard_for(token: str) -> int:
+    """FNV-1a hash of the token's UTF-8 bytes, bucketed into a shard number"""
+    h = 0x811C9DC5
+    for b in token.encode("utf-8"):
+        h ^= b
+        h = (h * 0x01000193) & 0xFFFFFFFF
+    return h % SEARCH_SHARDS
+
+
+def article_key(article: Dict) -> str:
+    # Archived articles predate url_key, so fall back to canonicalizing the stored link
+    return article.get("url_key") or canonicalize_url(article.get("link", "")) or article.get("title", "")
+
+
+def _article_text(article: Dict) -> str:
+    return " ".join([article.get("title", ""), article.get("source", ""), " ".join(article.get("categories", []))])
+
+
+def _raise_text(raise_data: Dict) -> str:
+    # DefiLlama sends null for unknown fields
+    return " ".join([
+        raise_data.get("project") or "",
+        raise_data.get("round") or "",
+        raise_data.get("category") or "",
+        " ".join(raise_data.get("lead_investors") or []),
+        " ".join(raise_data.get("chains") or []),
+    ])
+
+
+def _load_json(path: str, default):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return default
+
+
+def _write_json(path: str, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+
+
+def _write_if_changed(path: str, content: str):
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _group_by_day(items: Iterable[Dict], date_field: str) -> Dict[str, List[Dict]]:
+    days: Dict[str, List[Dict]] = {}
+    for item in items:
+        day = (item.get(date_field) or "")[:10]
+        if len(day) == 10:
+            days.setdefault(day, []).append(item)
+    return days
+
+
+def render_day_page(day: str, data: Dict) -> str:
+    """Render a static archive page for one day"""
+    esc = html.escape
+    rows = []
+    for r in data["raises"]:
+        investors = ", ".join((r.get("lead_investors") or [])[:3]) or "Undisclosed"
+        rows.append(
+            f'<div class="item"><strong>{esc(r.get("project") or "")}</strong> '
+            f'<span class="amount">{esc(r.get("amount") or "Undisclosed")}</span>'
+            f'<div class="meta">{esc(r.get("round") or "Unknown")} · {esc(investors)}</div></div>'
+        )
+    raises_html = "\n".join(rows) or "<p>No raises recorded.</p>"
+
+    rows = []
+    for a in data["articles"]:
+        tags = ""
+        if a.get("is_funding"):
+            tags += '<span class="tag funding">funding</span>'
+        if a.get("is_regulatory"):
+            tags += '<span class="tag regulatory">regulatory</span>'
+        rows.append(
+            f'<div class="item"><a href="{esc(a["link"])}" target="_blank">{esc(a["title"])}</a>'
+            f'<div class="meta">{tags}<span>{esc(a["source"])}</span> · {esc(a["published"][11:16])}</div></div>'
+        )
+    articles_html = "\n".join(rows) or "<p>No articles recorded.</p>"
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Frontier Tech Archive - {day}</title>
+    <link rel="stylesheet" href="archive.css">
+</head>
+<body>
+    <div class="container">
+        <p><a href="index.html">&larr; Archive</a> · <a href="../index.html">Dashboard</a></p>
+        <h1>{day}</h1>
+        <h2>Funding Rounds ({len(data["raises"])})</h2>
+{raises_html}
+        <h2>Articles ({len(data["articles"])})</h2>
+{articles_html}
+    </div>
+</body>
+</html>
+"""
+
+
+def render_archive_index(manifest: Dict) -> str:
+    """Render the archive landing page listing every archived day"""
+    rows = []
+    for day in sorted(manifest["days"], reverse=True):
+        counts = manifest["days"][day]
+        rows.append(
+            f'<div class="item"><a href="{day}.html">{day}</a>'
+            f'<div class="meta">{counts["articles"]} articles · {counts["raises"]} raises</div></div>'
+        )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Frontier Tech Archive</title>
+    <link rel="stylesheet" href="archive.css">
+</head>
+<body>
+    <div class="container">
+        <p><a href="../index.html">&larr; Dashboard</a></p>
+        <h1>Archive</h1>
+{chr(10).join(rows)}
+    </div>
+</body>
+</html>
+"""
+
+
+ARCHIVE_CSS = """body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+       background: #1a1a2e; color: #e4e4e4; margin: 0; }
+.container { max-width: 900px; margin: 0 auto; padding: 20px; }
+h1 { color: #e94560; }
+h2 { color: #4ade80; font-size: 1.1rem; border-bottom: 1px solid #333; padding-bottom: 8px; margin-top: 30px; }
+a { color: #fff; text-decoration: none; }
+a:hover { color: #e94560; }
+.item { padding: 10px 0; border-bottom: 1px solid rgba(255, 255, 255, 0.05); }
+.meta { font-size: 0.8rem; color: #888; margin-top: 4px; }
+.amount { color: #4ade80; font-weight: bold; margin-left: 8px; }
+.tag { display: inline-block; padding: 1px 6px; border-radius: 4px; font-size: 0.7rem; margin-right: 5px; }
+.tag.funding { background: rgba(74, 222, 128, 0.2); color: #4ade80; }
+.tag.regulatory { background: rgba(245, 158, 11, 0.2); color: #f59e0b; }
+"""
+
+
+SEARCH_JS = """// Client-side search over the static index built by outputs/archive.py
+(function () {
+  var SHARDS = %(shards)d;
+  var STOP = new Set(%(stopwords)s);
+  var base = document.currentScript.src.replace(/search\\.js.*$/, "");
+  var cache = {};
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (t) {
+      return t.length > 1 && !STOP.has(t);
+    });
+  }
+
+  function shardFor(token) {
+    var h = 0x811c9dc5;
+    var bytes = new TextEncoder().encode(token);
+    for (var i = 0; i < bytes.length; i++) {
+      h ^= bytes[i];
+      h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return h %% SHARDS;
+  }
+
+  function getJSON(path) {
+    if (!cache[path]) {
+      cache[path] = fetch(base + path).then(function (r) { return r.ok ? r.json() : {}; });
+    }
+    return cache[path];
+  }
+
+  function pad(n) { return (n < 10 ? "0" : "") + n; }
+
+  function search(query) {
+    var tokens = tokenize(query);
+    if (!tokens.length) return Promise.resolve([]);
+    return getJSON("archive/index.json").then(function (manifest) {
+      var months = (manifest.months || []).slice().sort().reverse();
+      return Promise.all(months.map(function (month) {
+        return Promise.all(tokens.map(function (t) {
+          return getJSON("search/" + month + "/" + pad(shardFor(t)) + ".json").then(function (s) { return s[t] || []; });
+        })).then(function (lists) {
+          return lists.reduce(function (acc, refs) {
+            var keep = new Set(refs);
+            return acc.filter(function (r) { return keep.has(r); });
+          });
+        });
+      }));
+    }).then(function (perMonth) {
+      var refs = [].concat.apply([], perMonth).sort().reverse().slice(0, 50);
+      return Promise.all(refs.map(function (ref) {
+        var day = ref.slice(0, 10), kind = ref.charAt(11), idx = +ref.slice(12);
+        return getJSON("archive/data/" + day + ".json").then(function (data) {
+          var item = (kind === "r" ? data.raises : data.articles)[idx];
+          return item ? { day: day, kind: kind, item: item } : null;
+        });
+      }));
+    }).then(function (hits) { return hits.filter(Boolean); });
+  }
+
+  function render(hits, el) {
+    if (!hits.length) { el.innerHTML = "<p class='article-meta'>No matches.</p>"; return; }
+    el.innerHTML = "";
+    hits.forEach(function (h) {
+      var div = document.createElement("div");
+      div.className = "article";
+      var a = document.createElement("a");
+      var meta = document.createElement("div");
+      meta.className = "article-meta";
+      if (h.kind === "r") {
+        a.textContent = h.item.project + " - " + h.item.amount + " (" + (h.item.round || "Unknown") + ")";
+        a.href = base + "archive/" + h.day + ".html";
+        meta.textContent = "raise · " + h.day;
+      } else {
+        a.textContent = h.item.title;
+        a.href = h.item.link;
+        a.target = "_blank";
+        meta.textContent = h.item.source + " · " + h.day;
+      }
+      div.appendChild(a);
+      div.appendChild(meta);
+      el.appendChild(div);
+    });
+  }
+
+  window.addEventListener("DOMContentLoaded", function () {
+    var box = document.getElementById("search-box");
+    var out = document.getElementById("search-results");
+    if (!box || !out) return;
+    var timer;
+    box.addEventListener("input", function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        if (!box.value.trim()) { out.innerHTML = ""; return; }
+        search(box.value).then(function (hits) { render(hits, out); });
+      }, 200);
+    });
+  });
+})();
+"""
+
+
+def update_archive(articles: List[Dict], raises: List[Dict], output_dir: str = "docs") -> List[str]:
+    """Merge new items into the per-day archive and search index, returning the days rewritten"""
+    archive_dir = os.path.join(output_dir, ARCHIVE_DIR)
+    data_dir = os.path.join(archive_dir, "data")
+    manifest_path = os.path.join(archive_dir, "index.json")
+    manifest = _load_json(manifest_path, {"days": {}, "months": []})
+
+    article_days = _group_by_day(articles, "published")
+    raise_days = _group_by_day(raises, "date")
+
+    changed_days = []
+    # Postings added this run, grouped by (month, shard) so each shard file is touched once
+    new_postings: Dict[tuple, Dict[str, List[str]]] = {}
+
+    for day in sorted(set(article_days) | set(raise_days)):
+        path = os.path.join(data_dir, f"{day}.json")
+        data = _load_json(path, {"articles": [], "raises": []})
+        seen_articles = {article_key(a) for a in data["articles"]}
+        seen_raises = {raise_key(r) for r in data["raises"]}
+        added = []
+
+        for article in article_days.get(day, []):
+            key = article_key(article)
+            if key in seen_articles:
+                continue
+            seen_articles.add(key)
+            data["articles"].append({f: article.get(f) for f in ARTICLE_FIELDS})
+            added.append((f"{day}/a{len(data['articles']) - 1}", _article_text(article)))
+
+        for raise_data in raise_days.get(day, []):
+            key = raise_key(raise_data)
+            if key in seen_raises:
+                continue
+            seen_raises.add(key)
+            data["raises"].append({f: raise_data.get(f) for f in RAISE_FIELDS})
+            added.append((f"{day}/r{len(data['raises']) - 1}", _raise_text(raise_data)))
+
+        if not added:
+            continue
+
+        changed_days.append(day)
+        _write_json(path, data)
+        with open(os.path.join(archive_dir, f"{day}.html"), "w") as f:
+            f.write(render_day_page(day, data))
+        manifest["days"][day] = {"articles": len(data["articles"]), "raises": len(data["raises"])}
+
+        month = day[:7]
+        for ref, text in added:
+            for token in set(tokenize(text)):
+                bucket = new_postings.setdefault((month, shard_for(token)), {})
+                bucket.setdefault(token, []).append(ref)
+
+    for (month, shard), postings in new_postings.items():
+        path = os.path.join(output_dir, SEARCH_DIR, month, f"{shard:02d}.json")
+        index = _load_json(path, {})
+        for token, refs in postings.items():
+            index.setdefault(token, []).extend(refs)
+        _write_json(path, index)
+
+    if changed_days:
+        manifest["months"] = sorted({day[:7] for day in manifest["days"]})
+        _write_json(manifest_path, manifest)
+        with open(os.path.join(archive_dir, "index.html"), "w") as f:
+            f.write(render_archive_index(manifest))
+
+    os.makedirs(archive_dir, exist_ok=True)
+    _write_if_changed(os.path.join(archive_dir, "archive.css"), ARCHIVE_CSS)
+    _write_if_changed(
+        os.path.join(output_dir, "search.js"),
+        SEARCH_JS % {"shards": SEARCH_SHARDS, "stopwords": json.dumps(sorted(STOPWORDS))},
+    )
+
+    print(f"Archive updated: {len(changed_days)} day(s) rewritten")
+    return changed_days
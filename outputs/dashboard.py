@@ -3,29 +3,191 @@ Generate static HTML dashboard for news aggregator
 Outputs to docs/ folder for GitHub Pages deployment
 """
 import os
+import json
+from html import escape
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from processing.scoring import rank_sections
+from processing.rollups import funding_trends
+from processing.trending import trending_topics, CURRENT_DAYS, BASELINE_DAYS
+from .archive import update_archive
+
+
+def _weekly_chart(ai: List[Dict], crypto: List[Dict], width: int = 360, height: int = 90) -> str:
+    """Inline SVG of weekly funding totals, AI stacked on crypto"""
+    peak = max([a["total"] + c["total"] for a, c in zip(ai, crypto)] + [1.0])
+    bar = width / len(ai)
+    rects = []
+    for i, (a, c) in enumerate(zip(ai, crypto)):
+        x = i * bar + 1
+        h_crypto = c["total"] / peak * height
+        h_ai = a["total"] / peak * height
+        rects.append(
+            f'<rect x="{x:.1f}" y="{height - h_crypto:.1f}" width="{bar - 2:.1f}" height="{h_crypto:.1f}" fill="#8b5cf6">'
+            f'<title>Week of {c["week"]}: crypto ${c["total"]:,.0f}M ({c["count"]} rounds)</title></rect>'
+            f'<rect x="{x:.1f}" y="{height - h_crypto - h_ai:.1f}" width="{bar - 2:.1f}" height="{h_ai:.1f}" fill="#06b6d4">'
+            f'<title>Week of {a["week"]}: AI ${a["total"]:,.0f}M ({a["count"]} rounds)</title></rect>'
+        )
+    return (f'<svg class="chart" viewBox="0 0 {width} {height}" width="100%" height="{height}" '
+            f'preserveAspectRatio="none">{"".join(rects)}</svg>')
+
+
+def _trends_card(trends: Dict) -> str:
+    """Funding trends card built from the precomputed rollups"""
+    html = f"""
+            <!-- Funding Trends -->
+            <div class="card trends">
+                <h2>📊 Funding Trends</h2>
+                <div class="trend-label">Weekly raised, last 12 weeks
+                    (<span style="color:#06b6d4">AI</span> / <span style="color:#8b5cf6">crypto</span>)</div>
+                {_weekly_chart(trends["weekly_ai"], trends["weekly_crypto"])}
+                <div class="trend-row">
+"""
+    for days, stats in trends["windows"].items():
+        s = stats[0] if stats else {"count": 0, "total": 0, "p50": None}
+        median = f"${s['p50']:,.1f}M median" if s["p50"] else "no disclosed amounts"
+        html += f"""
+                    <div class="trend-window"><strong>{days}d</strong> · {s['count']} rounds ·
+                        ${s['total']:,.0f}M · {median}</div>
+"""
+    html += """
+                </div>
+                <div class="trend-label">Top categories (30d)</div>
+"""
+    for s in trends["top_categories"]:
+        html += f"""
+                <div class="trend-item">{s['value']} <span>{s['count']} · ${s['total']:,.0f}M</span></div>
+"""
+    html += """
+                <div class="trend-label">Round momentum (7d vs prior 7d)</div>
+"""
+    for m in trends["round_momentum"]:
+        html += f"""
+                <div class="trend-item">{m['value']} <span>{m['current']} ({m['change']:+d})</span></div>
+"""
+    html += """
+            </div>
+"""
+    return html
 
 
-def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str = "docs") -> str:
-    """Generate a static HTML dashboard"""
+def _trending_card(topics: List[Dict]) -> str:
+    """Trending terms card built from the precomputed trend sketches"""
+    html = f"""
+            <!-- Trending -->
+            <div class="card trending">
+                <h2>🔥 Trending</h2>
+                <div class="trend-label">Mentions in the last {CURRENT_DAYS * 24}h vs the {BASELINE_DAYS} days before</div>
+"""
+    for t in topics:
+        related = f' <em class="related">{escape(", ".join(t["related"]))}</em>' if t["related"] else ""
+        html += f"""
+                <div class="trend-item">{escape(t['term'])}{related} <span>{t['count']} items · {t['lift']:.1f}× usual</span></div>
+"""
+    if not topics:
+        html += """
+                <div class="trend-item">Nothing unusual right now</div>
+"""
+    html += """
+            </div>
+"""
+    return html
+
+
+DASHBOARD_SECTIONS = ["raises", "funding", "regulatory", "crypto", "ai", "trends", "trending"]
+
+# Content hash and timestamps, kept out of index.html so an unchanged page stays byte-identical
+FRESHNESS_FILE = "freshness.json"
+
+# Adds "checked" time from freshness.json when it is newer than the page's content
+FRESHNESS_JS = """
+    <script>
+    fetch("freshness.json", {cache: "no-store"}).then(r => r.json()).then(f => {
+        if (f.updated) {
+            document.getElementById("last-updated").textContent = new Date(f.updated).toLocaleString(
+                undefined, {dateStyle: "long", timeStyle: "short"});
+        }
+        if (f.checked && f.updated && f.checked > f.updated) {
+            document.getElementById("last-checked").textContent =
+                " · no changes as of " + new Date(f.checked).toLocaleString();
+        }
+    }).catch(() => {});
+    </script>
+"""
+
 
+def read_freshness(output_dir: str = "docs") -> Dict:
+    path = os.path.join(output_dir, FRESHNESS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_freshness(output_dir: str = "docs", content_hash: Optional[str] = None, changed: bool = True):
+    """Record a build (changed) or a check that found nothing new in freshness.json"""
+    freshness = read_freshness(output_dir)
+    now = datetime.now().isoformat(timespec="seconds")
+    if changed:
+        freshness.update({"content_hash": content_hash, "updated": now})
+    freshness["checked"] = now
     os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, FRESHNESS_FILE), "w") as f:
+        json.dump(freshness, f, indent=2, sort_keys=True)
+
 
-    funding_articles = [a for a in articles if a.get("is_funding")][:15]
-    regulatory_articles = [a for a in articles if a.get("is_regulatory")][:15]
-    crypto_articles = [a for a in articles if "crypto" in a.get("categories", [])][:15]
-    ai_articles = [a for a in articles if "ai" in a.get("categories", [])][:15]
-    top_raises = raises[:15]
+def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str = "docs",
+                       archive: bool = True, sections: Optional[List[str]] = None,
+                       title: Optional[str] = None, stale: Optional[List[Dict]] = None,
+                       content_hash: Optional[str] = None) -> str:
+    """Generate a static HTML dashboard, plus the per-day archive and search index
 
-    last_updated = datetime.now().strftime("%B %d, %Y at %H:%M")
+    sections picks which cards to show (default: all of DASHBOARD_SECTIONS);
+    title is appended to the page heading, e.g. for a site profile. stale
+    lists sources ({"source", "reason"}) missing from this run, shown as a
+    notice under the heading. content_hash identifies the items rendered and
+    is stored in freshness.json for skip-if-unchanged checks.
+    """
+    sections = sections or DASHBOARD_SECTIONS
+    heading = f"Frontier Tech Dashboard · {title}" if title else "Frontier Tech Dashboard"
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    if archive:
+        update_archive(articles, raises, output_dir)
+
+    ranked = rank_sections(articles, raises, k=15)
+    funding_articles = ranked["funding"]
+    regulatory_articles = ranked["regulatory"]
+    crypto_articles = ranked["crypto"]
+    ai_articles = ranked["ai"]
+    top_raises = ranked["raises"]
+
+    try:
+        trends = funding_trends()
+    except Exception as e:
+        print(f"Error loading funding rollups: {e}")
+        trends = None
+    try:
+        topics = trending_topics(limit=10)
+    except Exception as e:
+        print(f"Error loading trending topics: {e}")
+        topics = None
+
+    # The build time is filled in from freshness.json, so identical content renders identical HTML
+    stale_notice = ""
+    if stale:
+        names = ", ".join(escape(s["source"]) for s in stale)
+        stale_notice = (f'<p class="stale" title="{escape(stale[0]["reason"])}">'
+                        f'Stale: {names} did not arrive in time for this update</p>')
 
     html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Frontier Tech Dashboard</title>
+    <title>{heading}</title>
     <meta http-equiv="refresh" content="1800"> <!-- Auto-refresh every 30 min -->
     <style>
         * {{
@@ -67,6 +229,12 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
             font-size: 0.9rem;
         }}
 
+        .stale {{
+            color: #f0a500;
+            font-size: 0.85rem;
+            margin-top: 6px;
+        }}
+
         .stats {{
             display: flex;
             justify-content: center;
@@ -174,6 +342,15 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
             margin-top: 3px;
         }}
 
+        .raise-details a.coverage {{
+            color: #888;
+            text-decoration: underline;
+        }}
+
+        .deal {{
+            color: #4ade80;
+        }}
+
         .tag {{
             display: inline-block;
             padding: 2px 8px;
@@ -185,6 +362,60 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
         .tag.funding {{ background: rgba(74, 222, 128, 0.2); color: #4ade80; }}
         .tag.regulatory {{ background: rgba(245, 158, 11, 0.2); color: #f59e0b; }}
 
+        .card.trends h2 {{ color: #e94560; }}
+        .card.trending h2 {{ color: #f97316; }}
+
+        .chart {{
+            margin: 8px 0 12px;
+        }}
+
+        .trend-label {{
+            color: #888;
+            font-size: 0.8rem;
+            margin-top: 10px;
+        }}
+
+        .trend-window, .trend-item {{
+            font-size: 0.85rem;
+            padding: 4px 0;
+        }}
+
+        .trend-item span {{
+            color: #888;
+            float: right;
+        }}
+
+        .trend-item em.related {{
+            color: #888;
+            font-size: 0.75rem;
+            font-style: normal;
+        }}
+
+        .search {{
+            max-width: 600px;
+            margin: 20px auto 0;
+        }}
+
+        .search input {{
+            width: 100%;
+            padding: 10px 14px;
+            border-radius: 8px;
+            border: 1px solid #333;
+            background: rgba(255, 255, 255, 0.05);
+            color: #e4e4e4;
+            font-size: 1rem;
+        }}
+
+        .search a.archive-link {{
+            color: #888;
+            font-size: 0.85rem;
+        }}
+
+        #search-results {{
+            text-align: left;
+            margin-top: 10px;
+        }}
+
         @media (max-width: 768px) {{
             .grid {{
                 grid-template-columns: 1fr;
@@ -198,12 +429,14 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
             }}
         }}
     </style>
-</head>
+    <script src="search.js" defer></script>
+{FRESHNESS_JS}</head>
 <body>
     <div class="container">
         <header>
-            <h1>Frontier Tech Dashboard</h1>
-            <p class="updated">Last updated: {last_updated}</p>
+            <h1>{heading}</h1>
+            <p class="updated">Last updated: <span id="last-updated">–</span><span id="last-checked"></span></p>
+            {stale_notice}
             <div class="stats">
                 <div class="stat">
                     <div class="stat-number">{len(articles)}</div>
@@ -222,78 +455,84 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
                     <div class="stat-label">Regulatory</div>
                 </div>
             </div>
+            <div class="search">
+                <input id="search-box" type="search" placeholder="Search the archive...">
+                <p><a class="archive-link" href="archive/index.html">Browse archive by day</a></p>
+                <div id="search-results"></div>
+            </div>
         </header>
 
         <div class="grid">
+"""
+
+    if "raises" in sections:
+        html += """
             <!-- Funding Rounds -->
             <div class="card funding">
                 <h2>💰 Crypto Funding Rounds</h2>
 """
-
-    for r in top_raises:
-        investors = ", ".join(r.get("lead_investors", [])[:2]) or "Undisclosed"
-        html += f"""
+        for r in top_raises:
+            investors = ", ".join(r.get("lead_investors", [])[:2]) or "Undisclosed"
+            coverage = ""
+            if r.get("coverage"):
+                first = r["coverage"][0]
+                coverage = (f'<div class="raise-details">📰 {r["coverage_count"]} covering · '
+                            f'<a class="coverage" href="{first["link"]}" target="_blank">{first["source"]}</a></div>')
+            html += f"""
                 <div class="raise">
                     <div>
                         <div class="raise-project">{r['project']}</div>
                         <div class="raise-details">{r['round']} · {investors}</div>
+                        {coverage}
                     </div>
                     <div class="raise-amount">{r['amount']}</div>
                 </div>
 """
-
-    html += """
+        html += """
             </div>
+"""
 
+    if "funding" in sections:
+        html += """
             <!-- Funding News -->
             <div class="card funding">
                 <h2>📈 Funding News</h2>
 """
-
-    for a in funding_articles:
-        source = a.get('source', 'unknown')
-        date = a.get('published', '')[:10]
-        html += f"""
+        for a in funding_articles:
+            source = a.get('source', 'unknown')
+            date = a.get('published', '')[:10]
+            deal = ""
+            if a.get("round"):
+                deal = f' · <span class="deal">{a["round"]["amount"]} {a["round"]["round"]}</span>'
+            html += f"""
                 <div class="article">
                     <a href="{a['link']}" target="_blank">{a['title']}</a>
                     <div class="article-meta">
-                        <span class="source">{source}</span> · {date}
+                        <span class="source">{source}</span> · {date}{deal}
                     </div>
                 </div>
 """
-
-    html += """
+        html += """
             </div>
-
-            <!-- Regulatory -->
-            <div class="card regulatory">
-                <h2>⚖️ Regulatory & Policy</h2>
 """
 
-    for a in regulatory_articles:
-        source = a.get('source', 'unknown')
-        date = a.get('published', '')[:10]
+    # Plain article cards: (section, css class, heading, items)
+    article_cards = [
+        ("regulatory", "regulatory", "⚖️ Regulatory & Policy", regulatory_articles),
+        ("crypto", "crypto", "🔗 Crypto & Web3", crypto_articles[:10]),
+        ("ai", "ai", "🤖 AI & Machine Learning", ai_articles[:10]),
+    ]
+    for section, css_class, card_heading, items in article_cards:
+        if section not in sections:
+            continue
         html += f"""
-                <div class="article">
-                    <a href="{a['link']}" target="_blank">{a['title']}</a>
-                    <div class="article-meta">
-                        <span class="source">{source}</span> · {date}
-                    </div>
-                </div>
+            <div class="card {css_class}">
+                <h2>{card_heading}</h2>
 """
-
-    html += """
-            </div>
-
-            <!-- Crypto -->
-            <div class="card crypto">
-                <h2>🔗 Crypto & Web3</h2>
-"""
-
-    for a in crypto_articles[:10]:
-        source = a.get('source', 'unknown')
-        date = a.get('published', '')[:10]
-        html += f"""
+        for a in items:
+            source = a.get('source', 'unknown')
+            date = a.get('published', '')[:10]
+            html += f"""
                 <div class="article">
                     <a href="{a['link']}" target="_blank">{a['title']}</a>
                     <div class="article-meta">
@@ -301,29 +540,17 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
                     </div>
                 </div>
 """
-
-    html += """
+        html += """
             </div>
-
-            <!-- AI -->
-            <div class="card ai">
-                <h2>🤖 AI & Machine Learning</h2>
 """
 
-    for a in ai_articles[:10]:
-        source = a.get('source', 'unknown')
-        date = a.get('published', '')[:10]
-        html += f"""
-                <div class="article">
-                    <a href="{a['link']}" target="_blank">{a['title']}</a>
-                    <div class="article-meta">
-                        <span class="source">{source}</span> · {date}
-                    </div>
-                </div>
-"""
+    if trends and "trends" in sections:
+        html += _trends_card(trends)
+
+    if topics is not None and "trending" in sections:
+        html += _trending_card(topics)
 
     html += """
-            </div>
         </div>
     </div>
 </body>
@@ -333,6 +560,7 @@ def generate_dashboard(articles: List[Dict], raises: List[Dict], output_dir: str
     output_path = os.path.join(output_dir, "index.html")
     with open(output_path, "w") as f:
         f.write(html)
+    write_freshness(output_dir, content_hash)
 
     print(f"Dashboard generated: {output_path}")
     return output_path
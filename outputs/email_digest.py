@@ -1,21 +1,42 @@
 """
 Email digest - send daily summary of top news
+Each recipient gets the slice of the digest matching their subscription profile
 """
 import os
+import time
 import smtplib
+from html import escape
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional
+import config
 
+SMTP_HOST = os.getenv("EMAIL_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("EMAIL_SMTP_SSL", "true").lower() == "true"
 
-def create_digest_html(articles: List[Dict], raises: List[Dict]) -> str:
-    """Create HTML email digest"""
-    funding_articles = [a for a in articles if a.get("is_funding")][:10]
-    regulatory_articles = [a for a in articles if a.get("is_regulatory")][:10]
-    top_raises = raises[:10]
+# Minimum seconds between messages on the shared connection
+SEND_INTERVAL = float(os.getenv("EMAIL_SEND_INTERVAL", "0.2"))
+# Reconnect after this many messages (Gmail drops long-lived sessions around 100)
+MAX_MESSAGES_PER_CONNECTION = 90
+SEND_RETRIES = 3
+ITEMS_PER_SECTION = 10
 
-    html = f"""
+SECTION_TITLES = {
+    "raises": "Crypto Funding Rounds (DefiLlama)",
+    "funding": "Funding News",
+    "regulatory": "Regulatory & Industry News",
+    "trending": "Trending",
+}
+SECTION_EMPTY = {
+    "raises": "No new raises in the past week.",
+    "funding": "No funding news today.",
+    "regulatory": "No regulatory news today.",
+    "trending": "Nothing unusual today.",
+}
+
+DIGEST_HEAD = """
     <html>
     <head>
         <style>
@@ -31,81 +52,304 @@ def create_digest_html(articles: List[Dict], raises: List[Dict]) -> str:
     </head>
     <body>
         <h1>Frontier Tech Daily Digest</h1>
-        <p style="color: #666;">{datetime.now().strftime('%B %d, %Y')}</p>
+        <p style="color: #666;">{date}</p>
+"""
+
+DIGEST_FOOT = """
+        <hr>
+        <p style="color: #999; font-size: 11px;">Generated by your News Aggregator</p>
+    </body>
+    </html>
+    """
+
+
+def _article_text(article: Dict) -> str:
+    return (article.get("title", "") + " " + article.get("summary", "")).lower()
 
-        <h2>Crypto Funding Rounds (DefiLlama)</h2>
+
+def select_sections(articles: List[Dict], raises: List[Dict], profile: Optional[Dict] = None,
+                    trending: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+    """Pick the items each digest section shows for a subscription profile
+
+    trending is the current trending_topics() list, shared by every profile.
     """
+    profile = profile or {}
+    categories = set(profile.get("categories", []))
+    investors = [i.lower() for i in profile.get("investors", [])]
+    keywords = [k.lower() for k in profile.get("keywords", [])] + investors
+    min_raise = profile.get("min_raise", 0)
+
+    def wants_article(a: Dict) -> bool:
+        if categories and not categories & set(a.get("categories", [])):
+            return False
+        if keywords and not any(k in _article_text(a) for k in keywords):
+            return False
+        return True
+
+    def wants_raise(r: Dict) -> bool:
+        if r.get("amount_raw", 0) < min_raise:
+            return False
+        if investors:
+            names = " ".join(r.get("all_investors") or r.get("lead_investors", [])).lower()
+            return any(i in names for i in investors)
+        return True
 
-    if top_raises:
-        for r in top_raises:
-            investors = ", ".join(r.get("lead_investors", [])[:2]) or "Undisclosed"
-            html += f"""
+    selected = [a for a in articles if wants_article(a)]
+    sections = {}
+    for section in profile.get("sections", config.DIGEST_SECTIONS):
+        if section == "raises":
+            sections["raises"] = [r for r in raises if wants_raise(r)][:ITEMS_PER_SECTION] if profile.get("raises", True) else None
+        elif section == "funding":
+            sections["funding"] = [a for a in selected if a.get("is_funding")][:ITEMS_PER_SECTION]
+        elif section == "regulatory":
+            sections["regulatory"] = [a for a in selected if a.get("is_regulatory")][:ITEMS_PER_SECTION]
+        elif section == "trending":
+            sections["trending"] = trending[:ITEMS_PER_SECTION] if trending is not None else None
+    return {k: v for k, v in sections.items() if v is not None}
+
+
+def _raise_fragment(r: Dict) -> Tuple[str, str]:
+    investors = ", ".join(r.get("lead_investors", [])[:2]) or "Undisclosed"
+    html = f"""
             <div class="article">
                 <strong>{r['project']}</strong> - <span class="amount">{r['amount']}</span> ({r['round']})
                 <br><span class="source">Led by: {investors} | {r['category']}</span>
             </div>
             """
-    else:
-        html += "<p>No new raises in the past week.</p>"
+    text = f"- {r['project']} - {r['amount']} ({r['round']})\n  Led by: {investors} | {r['category']}\n"
+    return html, text
+
 
-    html += "<h2>Funding News</h2>"
-    if funding_articles:
-        for a in funding_articles:
-            html += f"""
+def _trending_fragment(t: Dict) -> Tuple[str, str]:
+    related = f" | also {', '.join(t['related'])}" if t["related"] else ""
+    html = f"""
             <div class="article">
-                <a href="{a['link']}">{a['title']}</a>
-                <br><span class="source">{a['source']} | {a['published'][:10]}</span>
+                <strong>{escape(t['term'])}</strong>
+                <br><span class="source">{t['count']} recent items | {t['lift']:.1f}x usual{escape(related)}</span>
             </div>
             """
-    else:
-        html += "<p>No funding news today.</p>"
+    text = f"- {t['term']}\n  {t['count']} recent items | {t['lift']:.1f}x usual{related}\n"
+    return html, text
+
 
-    html += "<h2>Regulatory & Industry News</h2>"
-    if regulatory_articles:
-        for a in regulatory_articles:
-            html += f"""
+def _article_fragment(a: Dict) -> Tuple[str, str]:
+    html = f"""
             <div class="article">
                 <a href="{a['link']}">{a['title']}</a>
                 <br><span class="source">{a['source']} | {a['published'][:10]}</span>
             </div>
             """
-    else:
-        html += "<p>No regulatory news today.</p>"
+    text = f"- {a['title']}\n  {a['source']} | {a['published'][:10]}\n  {a['link']}\n"
+    return html, text
 
-    html += """
-        <hr>
-        <p style="color: #999; font-size: 11px;">Generated by your News Aggregator</p>
-    </body>
-    </html>
-    """
-    return html
 
+class DigestRenderer:
+    """Renders each item's HTML/text fragment once and assembles digests per profile"""
 
-def send_digest_email(articles: List[Dict], raises: List[Dict]):
-    """Send the digest email via Gmail SMTP"""
-    sender = os.getenv("EMAIL_SENDER")
-    password = os.getenv("EMAIL_PASSWORD")
-    recipients = os.getenv("EMAIL_RECIPIENTS", "").split(",")
+    def __init__(self, articles: List[Dict], raises: List[Dict]):
+        self.articles = articles
+        self.raises = raises
+        self.date = datetime.now().strftime('%B %d, %Y')
+        self._fragments: Dict[int, Tuple[str, str]] = {}
+        self._trending: Optional[List[Dict]] = None
+        self._trending_loaded = False
 
-    if not all([sender, password, recipients[0]]):
-        print("Email not configured - skipping send")
-        return
+    @property
+    def trending(self) -> Optional[List[Dict]]:
+        """Trending topics from the stored trend sketches, loaded once per renderer (None if unavailable)"""
+        if not self._trending_loaded:
+            self._trending_loaded = True
+            try:
+                from processing.trending import trending_topics
+                self._trending = trending_topics(limit=ITEMS_PER_SECTION)
+            except Exception as e:
+                print(f"Error loading trending topics: {e}")
+        return self._trending
+
+    def fragment(self, section: str, item: Dict) -> Tuple[str, str]:
+        key = id(item)
+        if key not in self._fragments:
+            if section == "raises":
+                self._fragments[key] = _raise_fragment(item)
+            elif section == "trending":
+                self._fragments[key] = _trending_fragment(item)
+            else:
+                self._fragments[key] = _article_fragment(item)
+        return self._fragments[key]
+
+    def render(self, profile: Optional[Dict] = None) -> Tuple[str, str]:
+        """Return (html, plain text) for a profile"""
+        html = [DIGEST_HEAD.format(date=self.date)]
+        text = [f"Frontier Tech Daily Digest\n{self.date}\n"]
+
+        for section, items in select_sections(self.articles, self.raises, profile, self.trending).items():
+            title = SECTION_TITLES[section]
+            html.append(f"\n        <h2>{title}</h2>\n    ")
+            text.append(f"\n{title}\n{'=' * len(title)}\n")
+            if not items:
+                html.append(f"<p>{SECTION_EMPTY[section]}</p>")
+                text.append(SECTION_EMPTY[section] + "\n")
+            for item in items:
+                item_html, item_text = self.fragment(section, item)
+                html.append(item_html)
+                text.append(item_text)
+
+        html.append(DIGEST_FOOT)
+        text.append("\n--\nGenerated by your News Aggregator\n")
+        return "".join(html), "".join(text)
+
+
+def create_digest_html(articles: List[Dict], raises: List[Dict], profile: Optional[Dict] = None) -> str:
+    """Create HTML email digest"""
+    return DigestRenderer(articles, raises).render(profile)[0]
+
+
+def create_digest_text(articles: List[Dict], raises: List[Dict], profile: Optional[Dict] = None) -> str:
+    """Create the plain-text alternative of the digest"""
+    return DigestRenderer(articles, raises).render(profile)[1]
+
+
+def parse_recipients(value: str) -> List[Tuple[str, str]]:
+    """Parse "a@x.com,b@y.com:ai" into (address, profile name) pairs"""
+    recipients = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, _, profile = entry.partition(":")
+        profile = profile.strip() or "all"
+        if profile not in config.DIGEST_PROFILES:
+            print(f"Unknown digest profile '{profile}' for {address} - using 'all'")
+            profile = "all"
+        recipients.append((address.strip(), profile))
+    return recipients
+
+
+class SMTPPool:
+    """One reusable SMTP session with throttling, reconnects and per-message retry"""
+
+    def __init__(self, sender: str, password: str, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 use_ssl: bool = SMTP_USE_SSL, send_interval: float = SEND_INTERVAL,
+                 max_per_connection: int = MAX_MESSAGES_PER_CONNECTION, retries: int = SEND_RETRIES):
+        self.sender = sender
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.send_interval = send_interval
+        self.max_per_connection = max_per_connection
+        self.retries = retries
+        self._server = None
+        self._sent_on_connection = 0
+        self._last_send = 0.0
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.password:
+            try:
+                server.login(self.sender, self.password)
+            except (smtplib.SMTPException, OSError):
+                server.close()
+                raise
+        self._server = server
+        self._sent_on_connection = 0
 
+    def close(self):
+        """QUIT the session; a connection that is already broken just has its socket closed"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+    def _drop(self):
+        """Close the socket of a failed connection without talking to the server"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, recipient: str, message: str):
+        """Send one message, reconnecting and retrying with backoff on failure"""
+        for attempt in range(self.retries):
+            wait = self.send_interval - (time.monotonic() - self._last_send)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                if self._server is None or self._sent_on_connection >= self.max_per_connection:
+                    self.close()
+                    self._connect()
+                self._server.sendmail(self.sender, [recipient], message)
+                self._sent_on_connection += 1
+                self._last_send = time.monotonic()
+                return
+            except smtplib.SMTPRecipientsRefused:
+                raise
+            except (smtplib.SMTPException, OSError):
+                self._drop()
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+
+def build_digest_message(sender: str, recipient: str, html: str, text: str) -> str:
+    """MIME message with plain-text and HTML alternatives"""
     msg = MIMEMultipart("alternative")
     msg["Subject"] = f"Frontier Tech Digest - {datetime.now().strftime('%b %d')}"
     msg["From"] = sender
-    msg["To"] = ", ".join(recipients)
+    msg["To"] = recipient
+    msg.attach(MIMEText(text, "plain"))
+    msg.attach(MIMEText(html, "html"))
+    return msg.as_string()
 
-    html_content = create_digest_html(articles, raises)
-    msg.attach(MIMEText(html_content, "html"))
 
+def send_digest_email(articles: List[Dict], raises: List[Dict], recipients: Optional[str] = None) -> List[str]:
+    """Send each recipient their profile's digest via SMTP (Gmail by default)
+
+    recipients overrides EMAIL_RECIPIENTS. Returns the addresses that could not
+    be delivered to.
+    """
+    sender = os.getenv("EMAIL_SENDER")
+    password = os.getenv("EMAIL_PASSWORD")
+    recipients = parse_recipients(recipients if recipients is not None else os.getenv("EMAIL_RECIPIENTS", ""))
+
+    if not all([sender, password, recipients]):
+        print("Email not configured - skipping send")
+        return []
+
+    renderer = DigestRenderer(articles, raises)
+    digests = {}
+    for _, profile in recipients:
+        if profile not in digests:
+            digests[profile] = renderer.render(config.DIGEST_PROFILES[profile])
+
+    sent, failed = [], []
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(sender, password)
-            server.sendmail(sender, recipients, msg.as_string())
-        print(f"Digest sent to {len(recipients)} recipients")
+        with SMTPPool(sender, password) as pool:
+            for address, profile in recipients:
+                html, text = digests[profile]
+                try:
+                    pool.send(address, build_digest_message(sender, address, html, text))
+                    sent.append(address)
+                except Exception as e:
+                    failed.append(f"{address}:{profile}")
+                    print(f"Error sending to {address}: {e}")
     except Exception as e:
         print(f"Error sending email: {e}")
+        failed = [f"{a}:{p}" for a, p in recipients if a not in sent]
+
+    print(f"Digest sent to {len(sent)} recipients ({len(digests)} profiles)"
+          + (f", {len(failed)} failed" if failed else ""))
+    return failed
 
 
 if __name__ == "__main__":
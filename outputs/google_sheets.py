@@ -2,25 +2,42 @@
 Google Sheets output - push aggregated news to a spreadsheet
 """
 import os
-from datetime import datetime
-from typing import List, Dict
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Callable, Optional
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+import google_auth_httplib2
+import httplib2
 import pickle
 
+from processing.linking import raise_key
+from processing.urls import url_keys
+
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+TOKEN_PATH = "token.pickle"
 
+# Refresh the access token this long before it expires, not on the first 401
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
 
-def get_sheets_service():
-    """Authenticate and return Google Sheets service"""
+# Optional override, e.g. the local stand-in in benchmarks/fake_sheets_server.py
+SHEETS_API_ENDPOINT = os.getenv("SHEETS_API_ENDPOINT")
+
+_client_lock = threading.Lock()
+_client: Dict = {"service": None, "credentials": None}
+_thread_http = threading.local()
+
+
+def _load_credentials():
+    """Load cached OAuth credentials, running the consent flow if there are none"""
     creds = None
-    token_path = "token.pickle"
     creds_file = os.getenv("GOOGLE_SHEETS_CREDENTIALS_FILE", "credentials.json")
 
-    if os.path.exists(token_path):
-        with open(token_path, "rb") as token:
+    if os.path.exists(TOKEN_PATH):
+        with open(TOKEN_PATH, "rb") as token:
             creds = pickle.load(token)
 
     if not creds or not creds.valid:
@@ -29,78 +46,256 @@ def get_sheets_service():
         else:
             flow = InstalledAppFlow.from_client_secrets_file(creds_file, SCOPES)
             creds = flow.run_local_server(port=0)
-        with open(token_path, "wb") as token:
+        with open(TOKEN_PATH, "wb") as token:
             pickle.dump(creds, token)
 
-    return build("sheets", "v4", credentials=creds)
+    return creds
 
 
-def push_articles_to_sheet(articles: List[Dict], spreadsheet_id: str, sheet_name: str = "News"):
-    """Push articles to Google Sheet"""
-    service = get_sheets_service()
+def _refresh_if_expiring(creds):
+    """Refresh and persist the token when it is close to expiry (caller holds the lock)"""
+    expiry = getattr(creds, "expiry", None)
+    if not expiry or not getattr(creds, "refresh_token", None):
+        return
+    if expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN:
+        creds.refresh(Request())
+        with open(TOKEN_PATH, "wb") as token:
+            pickle.dump(creds, token)
 
-    # Prepare header row
-    headers = ["Date", "Source", "Title", "Categories", "Funding?", "Regulatory?", "Link"]
-
-    # Prepare data rows
-    rows = [headers]
-    for article in articles:
-        rows.append([
-            article["published"][:10],  # Just the date
-            article["source"],
-            article["title"],
-            ", ".join(article.get("categories", [])),
-            "YES" if article.get("is_funding") else "",
-            "YES" if article.get("is_regulatory") else "",
-            article["link"],
-        ])
-
-    # Clear existing data and write new
-    range_name = f"{sheet_name}!A:G"
-    service.spreadsheets().values().clear(
-        spreadsheetId=spreadsheet_id,
-        range=range_name
-    ).execute()
-
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A1",
-        valueInputOption="RAW",
-        body={"values": rows}
-    ).execute()
-
-    print(f"Pushed {len(articles)} articles to Google Sheet")
-
-
-def push_raises_to_sheet(raises: List[Dict], spreadsheet_id: str, sheet_name: str = "Funding Rounds"):
-    """Push funding rounds to Google Sheet"""
+
+def _build_service(creds, endpoint: Optional[str] = None):
+    """Build a Sheets client whose requests use a per-thread authorized HTTP connection
+
+    httplib2 connections are not thread-safe, so each thread gets its own,
+    while the parsed discovery document is shared across the process.
+    """
+    def request_builder(http, *args, **kwargs):
+        if getattr(_thread_http, "http", None) is None:
+            _thread_http.http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        return HttpRequest(_thread_http.http, *args, **kwargs)
+
+    client_options = {"api_endpoint": endpoint} if endpoint else None
+    # static_discovery uses the discovery document bundled with google-api-python-client,
+    # so building the client never fetches it over the network
+    return build(
+        "sheets", "v4",
+        credentials=creds,
+        requestBuilder=request_builder,
+        static_discovery=True,
+        cache_discovery=False,
+        client_options=client_options,
+    )
+
+
+def get_sheets_service():
+    """Return the process-wide Google Sheets service, authenticating on first use"""
+    with _client_lock:
+        if _client["service"] is None:
+            creds = _load_credentials()
+            _client["credentials"] = creds
+            _client["service"] = _build_service(creds, SHEETS_API_ENDPOINT)
+        else:
+            _refresh_if_expiring(_client["credentials"])
+        return _client["service"]
+
+
+def use_local_sheets_endpoint(endpoint: str):
+    """Point the cached client at an unauthenticated local Sheets stand-in"""
+    from google.auth.credentials import AnonymousCredentials
+
+    creds = AnonymousCredentials()
+    with _client_lock:
+        _thread_http.http = None
+        _client["credentials"] = creds
+        _client["service"] = _build_service(creds, endpoint)
+
+
+ARTICLE_HEADERS = ["Date", "Source", "Title", "Categories", "Funding?", "Regulatory?", "Link"]
+RAISE_HEADERS = ["Date", "Project", "Amount", "Round", "Category", "Lead Investors", "Chains"]
+
+# "sync" keeps the tab as a growing log and only writes what changed;
+# "replace" clears the tab and rewrites every row (the original behaviour)
+SHEETS_SYNC_MODE = os.getenv("SHEETS_SYNC_MODE", "sync")
+
+
+def article_to_row(article: Dict) -> List[str]:
+    """Sheet row for an article"""
+    return [
+        article["published"][:10],  # Just the date
+        article["source"],
+        article["title"],
+        ", ".join(article.get("categories", [])),
+        "YES" if article.get("is_funding") else "",
+        "YES" if article.get("is_regulatory") else "",
+        article["link"],
+    ]
+
+
+def raise_to_row(r: Dict) -> List[str]:
+    """Sheet row for a funding round
+
+    DefiLlama's null fields become "", which is what the Sheets API reads
+    back for an empty cell, so those rows diff as unchanged on the next sync.
+    """
+    return [
+        (r.get("date") or "")[:10],
+        r.get("project") or "",
+        r.get("amount") or "",
+        r.get("round") or "",
+        r.get("category") or "",
+        ", ".join((r.get("lead_investors") or [])[:3]),
+        ", ".join(r.get("chains") or []),
+    ]
+
+
+def article_row_keys(rows: List[List[str]]) -> List[str]:
+    """Articles are identified by the canonical key of their link, so tracking-parameter or redirect variants match
+
+    The redirect cache is read once for all the rows, not once per row.
+    """
+    keys = url_keys(row[6] for row in rows)
+    return [keys[row[6]] for row in rows]
+
+
+def raise_row_keys(rows: List[List[str]]) -> List[str]:
+    """Raises are identified like everywhere else (processing.linking.raise_key): project + date + round"""
+    return [raise_key({"project": row[1], "date": row[0], "round": row[3]}) for row in rows]
+
+
+def _column_letter(index: int) -> str:
+    return chr(ord("A") + index)
+
+
+def _tab_range(sheet_name: str, headers: List[str]) -> str:
+    return f"{sheet_name}!A:{_column_letter(len(headers) - 1)}"
+
+
+def build_row_index(values: List[List[str]], width: int,
+                    keys_fn: Callable[[List[List[str]]], List[str]]) -> Dict[str, Tuple[int, List[str]]]:
+    """Map row key -> (1-based row number, padded row values), skipping the header"""
+    padded = [(list(row) + [""] * width)[:width] for row in values[1:]]
+    return {key: (row_number, row) for row_number, (key, row) in enumerate(zip(keys_fn(padded), padded), start=2)}
+
+
+def diff_row_ranges(sheet_name: str, row_number: int, old: List[str], new: List[str]) -> List[Dict]:
+    """Ranges covering runs of changed cells in one row"""
+    ranges = []
+    start = None
+    for col in range(len(new) + 1):
+        changed = col < len(new) and str(old[col]) != str(new[col])
+        if changed and start is None:
+            start = col
+        elif not changed and start is not None:
+            ranges.append({
+                "range": f"{sheet_name}!{_column_letter(start)}{row_number}:{_column_letter(col - 1)}{row_number}",
+                "values": [new[start:col]],
+            })
+            start = None
+    return ranges
+
+
+def plan_sheet_sync(values: List[List[str]], sheet_name: str, headers: List[str],
+                    rows: List[List[str]], keys_fn: Callable[[List[List[str]]], List[str]]) -> Tuple[List[Dict], int, int]:
+    """Work out the range writes that bring a tab up to date with rows
+
+    Rows with unseen keys are written below the last used row (oldest first, so
+    the tab reads as a chronological log); known rows only get their changed
+    cells patched. Columns beyond the managed ones (analyst notes) are never
+    touched. Returns (value ranges, rows appended, rows patched).
+    """
+    index = build_row_index(values, len(headers), keys_fn)
+
+    new_rows = {}
+    updates = []
+    patched = 0
+    for key, row in zip(keys_fn(rows), rows):
+        if key in index:
+            row_number, old = index[key]
+            ranges = diff_row_ranges(sheet_name, row_number, old, row)
+            if ranges:
+                updates.extend(ranges)
+                index[key] = (row_number, row)
+                patched += 1
+        else:
+            new_rows[key] = row
+
+    if not values:
+        updates.append({"range": f"{sheet_name}!A1", "values": [headers]})
+
+    if new_rows:
+        first_row = max(len(values), 1) + 1
+        last_row = first_row + len(new_rows) - 1
+        updates.append({
+            "range": f"{sheet_name}!A{first_row}:{_column_letter(len(headers) - 1)}{last_row}",
+            "values": sorted(new_rows.values(), key=lambda row: row[0]),
+        })
+
+    return updates, len(new_rows), patched
+
+
+def push_tabs(spreadsheet_id: str, tabs: List[Tuple[str, List[str], List[List[str]], Callable]],
+              mode: str = SHEETS_SYNC_MODE) -> Dict[str, Tuple[int, int]]:
+    """Write several tabs with one batched read and one batched write
+
+    tabs holds (sheet name, headers, rows, row keys function) tuples. Returns
+    sheet name -> (rows appended, rows patched); replace mode reports every
+    row as appended.
+    """
     service = get_sheets_service()
+    values_api = service.spreadsheets().values()
+    data = []
+    stats = {}
+
+    if mode == "replace":
+        values_api.batchClear(
+            spreadsheetId=spreadsheet_id,
+            body={"ranges": [_tab_range(name, headers) for name, headers, _, _ in tabs]},
+        ).execute()
+        for name, headers, rows, _ in tabs:
+            data.append({"range": f"{name}!A1", "values": [headers] + rows})
+            stats[name] = (len(rows), 0)
+    else:
+        current = values_api.batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[_tab_range(name, headers) for name, headers, _, _ in tabs],
+        ).execute()
+        for (name, headers, rows, keys_fn), value_range in zip(tabs, current.get("valueRanges", [])):
+            updates, appended, patched = plan_sheet_sync(value_range.get("values", []), name, headers, rows, keys_fn)
+            data.extend(updates)
+            stats[name] = (appended, patched)
+
+    if data:
+        values_api.batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={"valueInputOption": "RAW", "data": data},
+        ).execute()
+
+    return stats
 
-    headers = ["Date", "Project", "Amount", "Round", "Category", "Lead Investors", "Chains"]
-
-    rows = [headers]
-    for r in raises:
-        rows.append([
-            r["date"][:10],
-            r["project"],
-            r["amount"],
-            r["round"],
-            r["category"],
-            ", ".join(r.get("lead_investors", [])[:3]),
-            ", ".join(r.get("chains", [])),
-        ])
-
-    range_name = f"{sheet_name}!A:G"
-    service.spreadsheets().values().clear(
-        spreadsheetId=spreadsheet_id,
-        range=range_name
-    ).execute()
-
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A1",
-        valueInputOption="RAW",
-        body={"values": rows}
-    ).execute()
-
-    print(f"Pushed {len(raises)} funding rounds to Google Sheet")
+
+def push_to_sheets(articles: List[Dict], raises: List[Dict], spreadsheet_id: str,
+                   news_sheet: str = "News", raises_sheet: str = "Funding Rounds",
+                   mode: str = SHEETS_SYNC_MODE):
+    """Push articles and funding rounds to their tabs in a single batched write"""
+    stats = push_tabs(spreadsheet_id, [
+        (news_sheet, ARTICLE_HEADERS, [article_to_row(a) for a in articles], article_row_keys),
+        (raises_sheet, RAISE_HEADERS, [raise_to_row(r) for r in raises], raise_row_keys),
+    ], mode)
+    for name, (appended, patched) in stats.items():
+        print(f"Synced {name} to Google Sheet: {appended} new, {patched} updated")
+
+
+def push_articles_to_sheet(articles: List[Dict], spreadsheet_id: str, sheet_name: str = "News",
+                           mode: str = SHEETS_SYNC_MODE):
+    """Push articles to Google Sheet"""
+    rows = [article_to_row(a) for a in articles]
+    appended, patched = push_tabs(spreadsheet_id, [(sheet_name, ARTICLE_HEADERS, rows, article_row_keys)], mode)[sheet_name]
+    print(f"Synced articles to Google Sheet: {appended} new, {patched} updated")
+
+
+def push_raises_to_sheet(raises: List[Dict], spreadsheet_id: str, sheet_name: str = "Funding Rounds",
+                         mode: str = SHEETS_SYNC_MODE):
+    """Push funding rounds to Google Sheet"""
+    rows = [raise_to_row(r) for r in raises]
+    appended, patched = push_tabs(spreadsheet_id, [(sheet_name, RAISE_HEADERS, rows, raise_row_keys)], mode)[sheet_name]
+    print(f"Synced funding rounds to Google Sheet: {appended} new, {patched} updated")
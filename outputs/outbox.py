@@ -0,0 +1,373 @@
+"""
+Durable outbox for output deliveries
+Each run's collected payload is stored once; every enabled output (sheets,
+email, dashboard, plus "output:profile" entries for site profiles) gets an
+entry that is retried with backoff until it is delivered, so recovering from
+an outage never repeats upstream fetches. A delivery whose content hash
+matches the last one delivered for that output is skipped as unchanged.
+"""
+import os
+import json
+import zlib
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Callable
+
+from profiling import stage
+
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", os.path.join("data", "outbox.db"))
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = timedelta(minutes=2)
+# A claimed entry whose worker died is handed out again after this long
+CLAIM_TIMEOUT = timedelta(minutes=30)
+RETENTION = timedelta(days=14)
+# Left out of content hashes: counters that change between runs without changing what is shown
+# (publish dates are shown, so a corrected date is a change)
+VOLATILE_FIELDS = {"engagement", "metrics"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES payloads(run_id),
+    output TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt TEXT NOT NULL,
+    claimed_at TEXT,
+    delivered_at TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries(status, next_attempt);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    output TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    delivered_at TEXT NOT NULL
+);
+"""
+
+
+class DeliveryError(Exception):
+    """Raised by a handler when only part of a delivery succeeded
+
+    options carries what is left to do (e.g. the recipients that failed),
+    which replaces the entry's options for the next attempt.
+    """
+
+    def __init__(self, message: str, options: Optional[Dict] = None):
+        super().__init__(message)
+        self.options = options
+
+
+def connect(db_path: str = OUTBOX_DB_PATH) -> sqlite3.Connection:
+    """Open the outbox database, creating the schema on first use"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _deliver_sheets(articles: List[Dict], raises: List[Dict], options: Dict):
+    from .google_sheets import push_to_sheets
+    kwargs = {"mode": options["mode"]} if options.get("mode") else {}
+    push_to_sheets(articles, raises, options["spreadsheet_id"], **kwargs)
+
+
+def _deliver_email(articles: List[Dict], raises: List[Dict], options: Dict):
+    from .email_digest import send_digest_email
+    failed = send_digest_email(articles, raises, recipients=options.get("recipients"))
+    if failed:
+        raise DeliveryError(f"{len(failed)} recipient(s) failed", {**options, "recipients": ",".join(failed)})
+
+
+def _deliver_dashboard(articles: List[Dict], raises: List[Dict], options: Dict):
+    from .dashboard import generate_dashboard
+    generate_dashboard(articles, raises, options.get("output_dir", "docs"),
+                       sections=options.get("sections"), title=options.get("title"), stale=options.get("stale"),
+                       content_hash=options.get("content_hash"))
+
+
+# Outputs that render the trending topics (processing/trending.py) besides their items
+TRENDING_OUTPUTS = {"dashboard", "email"}
+
+DELIVERY_HANDLERS: Dict[str, Callable[[List[Dict], List[Dict], Dict], None]] = {
+    "sheets": _deliver_sheets,
+    "email": _deliver_email,
+    "dashboard": _deliver_dashboard,
+}
+
+
+def _semantic(value):
+    if isinstance(value, dict):
+        return {k: _semantic(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_semantic(v) for v in value]
+    return value
+
+
+def content_hash(articles: List[Dict], raises: List[Dict], options: Dict) -> str:
+    """Hash of what an output would show: its items and options, minus volatile fields"""
+    data = json.dumps([_semantic(articles), _semantic(raises), options], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _trending_state() -> Optional[List]:
+    """Trending terms the dashboard and digest would show; they move with the window, not only with new items"""
+    try:
+        from processing.trending import trending_topics
+        return [[t["key"], t["count"]] for t in trending_topics()]
+    except Exception:
+        return None
+
+
+def last_hash(output: str, options: Dict, conn: Optional[sqlite3.Connection]) -> Optional[str]:
+    """Content hash of the output's last successful delivery"""
+    if output.split(":")[0] == "dashboard":
+        # Stored beside the page, so it is versioned with docs/ (CI checkouts have no outbox)
+        from .dashboard import read_freshness
+        return read_freshness(options.get("output_dir", "docs")).get("content_hash")
+    if conn is None:
+        return None
+    row = conn.execute("SELECT hash FROM fingerprints WHERE output = ?", (output,)).fetchone()
+    return row["hash"] if row else None
+
+
+def run_handler(output: str, articles: List[Dict], raises: List[Dict], options: Dict,
+                conn: Optional[sqlite3.Connection] = None, force: bool = False) -> bool:
+    """Call an output's handler unless its content is unchanged; returns False if skipped
+
+    Site profile entries ("dashboard:ai") get that profile's view of the
+    items; the main outputs leave out profile-only extra feeds. conn (the outbox) remembers content hashes; force delivers anyway.
+    """
+    handler = DELIVERY_HANDLERS[output.split(":")[0]]
+    if options.get("profile"):
+        import config
+        from processing.profiles import profile_items
+        articles, raises = profile_items(articles, raises, config.SITE_PROFILES[options["profile"]])
+    else:
+        from processing.profiles import main_items
+        articles, raises = main_items(articles, raises)
+
+    hashed = options
+    if output.split(":")[0] in TRENDING_OUTPUTS:
+        hashed = {**options, "trending": _trending_state()}
+    digest = content_hash(articles, raises, hashed)
+    if not force and digest == last_hash(output, options, conn):
+        print(f"      {output}: unchanged since last delivery, skipped")
+        if output.split(":")[0] == "dashboard":
+            from .dashboard import write_freshness
+            write_freshness(options.get("output_dir", "docs"), changed=False)
+        return False
+
+    with stage(f"output:{output}"):
+        handler(articles, raises, {**options, "content_hash": digest})
+    if conn is not None:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO fingerprints (output, hash, delivered_at) VALUES (?, ?, ?)",
+                         (output, digest, _now()))
+    return True
+
+
+def enqueue_run(articles: List[Dict], raises: List[Dict], outputs: Dict[str, Dict],
+                db_path: str = OUTBOX_DB_PATH) -> str:
+    """Store a run's payload and one pending delivery per output, returning the run id"""
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    data = zlib.compress(json.dumps({"articles": articles, "raises": raises}).encode())
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("INSERT INTO payloads (run_id, created, data) VALUES (?, ?, ?)", (run_id, _now(), data))
+            conn.executemany(
+                "INSERT INTO deliveries (run_id, output, options, next_attempt) VALUES (?, ?, ?, ?)",
+                [(run_id, output, json.dumps(options), _now()) for output, options in outputs.items()],
+            )
+    finally:
+        conn.close()
+    return run_id
+
+
+def load_payload(run_id: str, conn: sqlite3.Connection) -> Dict:
+    row = conn.execute("SELECT data FROM payloads WHERE run_id = ?", (run_id,)).fetchone()
+    return json.loads(zlib.decompress(row["data"]))
+
+
+def _claim(conn: sqlite3.Connection, delivery_id: int, force: bool = False) -> bool:
+    """Atomically mark an entry as being delivered, so concurrent workers skip it"""
+    stale = (datetime.now() - CLAIM_TIMEOUT).isoformat()
+    statuses = "('pending', 'failed', 'delivered', 'unchanged')" if force else "('pending')"
+    with conn:
+        cursor = conn.execute(
+            f"UPDATE deliveries SET status = 'delivering', claimed_at = ? "
+            f"WHERE id = ? AND (status IN {statuses} OR (status = 'delivering' AND claimed_at < ?))",
+            (_now(), delivery_id, stale),
+        )
+    return cursor.rowcount == 1
+
+
+def _attempt(conn: sqlite3.Connection, entry: sqlite3.Row, payloads: Dict[str, Dict], force: bool = False) -> bool:
+    """Run one delivery attempt and record the outcome (unchanged content counts as delivered)"""
+    if entry["run_id"] not in payloads:
+        payloads[entry["run_id"]] = load_payload(entry["run_id"], conn)
+    payload = payloads[entry["run_id"]]
+    options = json.loads(entry["options"])
+    attempts = entry["attempts"] + 1
+
+    try:
+        sent = run_handler(entry["output"], payload["articles"], payload["raises"], options, conn, force)
+    except Exception as e:
+        if isinstance(e, DeliveryError) and e.options is not None:
+            options = e.options
+        status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+        next_attempt = (datetime.now() + BACKOFF_BASE * 2 ** (attempts - 1)).isoformat()
+        with conn:
+            conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, next_attempt = ?, options = ?, "
+                "last_error = ?, claimed_at = NULL WHERE id = ?",
+                (status, attempts, next_attempt, json.dumps(options), str(e), entry["id"]),
+            )
+        print(f"      Error ({entry['output']}, attempt {attempts}): {e}")
+        return False
+
+    with conn:
+        conn.execute(
+            "UPDATE deliveries SET status = ?, attempts = ?, delivered_at = ?, "
+            "last_error = NULL, claimed_at = NULL WHERE id = ?",
+            ("delivered" if sent else "unchanged", attempts, _now(), entry["id"]),
+        )
+    return True
+
+
+def deliver_run(run_id: str, output: str, db_path: str = OUTBOX_DB_PATH) -> bool:
+    """Deliver one output of a run right away (used inline by run_aggregator)"""
+    conn = connect(db_path)
+    try:
+        entry = conn.execute(
+            "SELECT * FROM deliveries WHERE run_id = ? AND output = ?", (run_id, output)
+        ).fetchone()
+        if entry is None or not _claim(conn, entry["id"]):
+            return False
+        return _attempt(conn, entry, {})
+    finally:
+        conn.close()
+
+
+def _supersede(conn: sqlite3.Connection, entry: sqlite3.Row) -> bool:
+    """Retire an entry if a newer run has already delivered (or queued) the same output
+
+    Sending it late would put older content back on the dashboard or sheet,
+    or send a stale digest.
+    """
+    newer = conn.execute(
+        "SELECT 1 FROM deliveries WHERE output = ? AND run_id > ? "
+        "AND status IN ('pending', 'delivering', 'delivered', 'unchanged') LIMIT 1",
+        (entry["output"], entry["run_id"]),
+    ).fetchone()
+    if newer is None:
+        return False
+    with conn:
+        conn.execute(
+            "UPDATE deliveries SET status = 'superseded', claimed_at = NULL WHERE id = ? AND status IN ('pending', 'failed')",
+            (entry["id"],),
+        )
+    return True
+
+
+def drain_outbox(force: bool = False, db_path: str = OUTBOX_DB_PATH) -> Dict[str, int]:
+    """Attempt every pending delivery that is due (all pending/failed ones if force)
+
+    Entries for outputs a newer run has delivered or queued are marked
+    superseded instead.
+    """
+    conn = connect(db_path)
+    payloads: Dict[str, Dict] = {}
+    stats = {"delivered": 0, "failed": 0}
+    try:
+        if force:
+            rows = conn.execute(
+                "SELECT * FROM deliveries WHERE status IN ('pending', 'failed') ORDER BY id"
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM deliveries WHERE status = 'pending' AND next_attempt <= ? ORDER BY id", (_now(),)
+            ).fetchall()
+        for entry in rows:
+            if _supersede(conn, entry):
+                print(f"Skipping {entry['output']} for run {entry['run_id']}: superseded by a newer run")
+                continue
+            if entry["status"] == "failed" and force:
+                with conn:
+                    conn.execute("UPDATE deliveries SET status = 'pending' WHERE id = ?", (entry["id"],))
+            if not _claim(conn, entry["id"]):
+                continue
+            print(f"Delivering {entry['output']} for run {entry['run_id']}...")
+            stats["delivered" if _attempt(conn, entry, payloads) else "failed"] += 1
+    finally:
+        conn.close()
+    return stats
+
+
+def replay_run(run_id: str, outputs: Optional[List[str]] = None, db_path: str = OUTBOX_DB_PATH) -> Dict[str, int]:
+    """Deliver a stored run's outputs again, whatever their current state"""
+    conn = connect(db_path)
+    payloads: Dict[str, Dict] = {}
+    stats = {"delivered": 0, "failed": 0}
+    try:
+        if run_id == "latest":
+            row = conn.execute("SELECT run_id FROM payloads ORDER BY run_id DESC LIMIT 1").fetchone()
+            if row is None:
+                print("Outbox is empty")
+                return stats
+            run_id = row["run_id"]
+        for entry in conn.execute("SELECT * FROM deliveries WHERE run_id = ? ORDER BY id", (run_id,)).fetchall():
+            if outputs and entry["output"] not in outputs and entry["output"].split(":")[0] not in outputs:
+                continue
+            if not _claim(conn, entry["id"], force=True):
+                continue
+            print(f"Replaying {entry['output']} for run {run_id}...")
+            stats["delivered" if _attempt(conn, entry, payloads, force=True) else "failed"] += 1
+    finally:
+        conn.close()
+    return stats
+
+
+def outbox_status(limit: int = 20, db_path: str = OUTBOX_DB_PATH) -> List[Dict]:
+    """Most recent deliveries, newest first"""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT run_id, output, status, attempts, next_attempt, delivered_at, last_error "
+            "FROM deliveries ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def prune_outbox(db_path: str = OUTBOX_DB_PATH) -> int:
+    """Drop runs older than the retention window whose deliveries are all settled"""
+    cutoff = (datetime.now() - RETENTION).isoformat()
+    conn = connect(db_path)
+    try:
+        with conn:
+            old = [row["run_id"] for row in conn.execute(
+                "SELECT run_id FROM payloads WHERE created < ? AND run_id NOT IN "
+                "(SELECT run_id FROM deliveries WHERE status IN ('pending', 'delivering'))", (cutoff,)
+            )]
+            conn.executemany("DELETE FROM deliveries WHERE run_id = ?", [(r,) for r in old])
+            conn.executemany("DELETE FROM payloads WHERE run_id = ?", [(r,) for r in old])
+    finally:
+        conn.close()
+    return len(old)
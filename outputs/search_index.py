@@ -0,0 +1,205 @@
+"""
+Full-text search index over collected items, backed by SQLite FTS5
+Each run appends only items it has not indexed before; queries are ranked with BM25
+"""
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+
+from processing.linking import raise_key
+
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join("data", "search.db"))
+
+# BM25 column weights: title, body, source, people (investors / category / chains)
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 4.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    source TEXT NOT NULL,
+    people TEXT NOT NULL,
+    link TEXT NOT NULL,
+    published TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_published ON documents(published);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, source, people,
+    content='documents', content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, body, source, people)
+    VALUES (new.id, new.title, new.body, new.source, new.people);
+END;
+"""
+
+QUERY_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def connect(db_path: str = SEARCH_DB_PATH, readonly: bool = False) -> sqlite3.Connection:
+    """Open the search database, creating the schema on first use"""
+    if readonly:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _article_row(article: Dict) -> tuple:
+    kind = "tweet" if "twitter" in article.get("categories", []) else "article"
+    return (
+        article.get("url_key") or article.get("link") or article.get("title", ""),
+        kind,
+        article.get("title", ""),
+        article.get("summary", ""),
+        article.get("source", ""),
+        ", ".join(article.get("categories", [])),
+        article.get("link", ""),
+        article.get("published", ""),
+    )
+
+
+def _raise_row(raise_data: Dict) -> tuple:
+    # DefiLlama sends null for unknown fields; one None here would fail the whole batch
+    category = raise_data.get("category") or ""
+    title = f"{raise_data.get('project') or ''} raises {raise_data.get('amount') or ''} ({raise_data.get('round') or ''})"
+    people = " ".join([
+        ", ".join(raise_data.get("all_investors") or raise_data.get("lead_investors") or []),
+        category,
+        ", ".join(raise_data.get("chains") or []),
+    ])
+    return (
+        raise_key(raise_data),
+        "raise",
+        title,
+        category,
+        raise_data.get("source") or "defillama",
+        people,
+        "",
+        raise_data.get("date") or "",
+    )
+
+
+def index_items(articles: List[Dict], raises: List[Dict], db_path: str = SEARCH_DB_PATH) -> int:
+    """Add items not yet in the index, returning how many were added"""
+    rows = [_article_row(a) for a in articles] + [_raise_row(r) for r in raises]
+    conn = connect(db_path)
+    try:
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO documents (key, kind, title, body, source, people, link, published) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = max(cursor.rowcount, 0)
+    finally:
+        conn.close()
+    print(f"Search index: {added} new items")
+    return added
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: all terms required, last term as a prefix"""
+    terms = QUERY_TERM_RE.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_items(
+    query: str,
+    limit: int = 20,
+    kind: Optional[str] = None,
+    days: Optional[int] = None,
+    db_path: str = SEARCH_DB_PATH,
+    conn: Optional[sqlite3.Connection] = None,
+) -> List[Dict]:
+    """Return BM25-ranked matches with highlighted snippets"""
+    match = build_match_query(query)
+    if not match or not os.path.exists(db_path):
+        return []
+
+    sql = (
+        "SELECT d.kind, d.title, d.source, d.link, d.published, "
+        "snippet(documents_fts, -1, '<b>', '</b>', '…', 24) AS snippet, "
+        "bm25(documents_fts, ?, ?, ?, ?) AS score "
+        "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+        "WHERE documents_fts MATCH ?"
+    )
+    params: list = [*BM25_WEIGHTS, match]
+    if kind:
+        sql += " AND d.kind = ?"
+        params.append(kind)
+    if days:
+        sql += " AND d.published >= ?"
+        params.append((datetime.now() - timedelta(days=days)).isoformat())
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path, readonly=True)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    return [
+        {
+            "kind": row["kind"],
+            "title": row["title"],
+            "source": row["source"],
+            "link": row["link"],
+            "published": row["published"],
+            "snippet": row["snippet"],
+            "score": round(-row["score"], 6),
+        }
+        for row in rows
+    ]
+
+
+if __name__ == "__main__":
+    # Benchmark run: index synthetic items and time queries
+    import sys
+    import time
+    import random
+    import tempfile
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    # Zipf-like vocabulary so term selectivity resembles real headlines
+    vocab = [f"term{i}" for i in range(20_000)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    batch = []
+    start = time.perf_counter()
+    for i in range(n):
+        batch.append({"title": " ".join(random.choices(vocab, weights, k=10)), "link": f"https://example.com/{i}",
+                      "source": "bench", "published": "2026-01-01T00:00:00",
+                      "summary": " ".join(random.choices(vocab, weights, k=50))})
+        if len(batch) == 50_000:
+            index_items(batch, [], path)
+            batch = []
+    if batch:
+        index_items(batch, [], path)
+    print(f"Indexed {n} items in {time.perf_counter() - start:.1f}s")
+
+    conn = connect(path, readonly=True)
+    for q in ["term50", "term500", "term20 term300", "term1234", "term19"]:
+        start = time.perf_counter()
+        results = search_items(q, db_path=path, conn=conn)
+        print(f"  {q!r}: {len(results)} results in {(time.perf_counter() - start) * 1000:.1f}ms")
@@ -0,0 +1,79 @@
+"""
+Run snapshots - persist each run's collected items for offline replay
+Snapshots are gzip JSONL files (one header line, then one item per line)
+listed in an append-only index ordered by run time.
+"""
+import os
+import json
+import gzip
+from datetime import datetime
+from typing import List, Dict, Optional
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+INDEX_FILE = "index.jsonl"
+
+
+def save_snapshot(articles: List[Dict], raises: List[Dict], meta: Optional[Dict] = None,
+                  snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    """Write a run's items to a compressed snapshot and return its id"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    created = datetime.now()
+    # Microseconds, so two runs within one second (scheduler jobs, tests) do not overwrite each other
+    snapshot_id = created.strftime("%Y%m%dT%H%M%S%f")
+    filename = f"{snapshot_id}.jsonl.gz"
+
+    header = {"id": snapshot_id, "created": created.isoformat(), "articles": len(articles),
+              "raises": len(raises), **(meta or {})}
+    path = os.path.join(snapshot_dir, filename)
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(json.dumps(header) + "\n")
+        for article in articles:
+            f.write(json.dumps({"type": "article", **article}) + "\n")
+        for raise_data in raises:
+            f.write(json.dumps({"type": "raise", **raise_data}) + "\n")
+
+    with open(os.path.join(snapshot_dir, INDEX_FILE), "a") as f:
+        f.write(json.dumps({**header, "file": filename, "bytes": os.path.getsize(path)}) + "\n")
+    return snapshot_id
+
+
+def list_snapshots(snapshot_dir: str = SNAPSHOT_DIR) -> List[Dict]:
+    """Index entries, oldest first"""
+    path = os.path.join(snapshot_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def resolve_snapshot(ref: str, snapshot_dir: str = SNAPSHOT_DIR) -> Dict:
+    """Find a snapshot by id, 'latest', or a date (YYYY-MM-DD, latest run that day)"""
+    entries = list_snapshots(snapshot_dir)
+    if not entries:
+        raise FileNotFoundError(f"No snapshots in {snapshot_dir}")
+    if ref == "latest":
+        return entries[-1]
+    prefix = ref.replace("-", "")
+    matches = [e for e in entries if e["id"].startswith(prefix)]
+    if not matches:
+        raise FileNotFoundError(f"No snapshot matching '{ref}'")
+    return matches[-1]
+
+
+def load_snapshot(ref: str, snapshot_dir: str = SNAPSHOT_DIR) -> Dict:
+    """Load a snapshot's header, articles and raises"""
+    entry = resolve_snapshot(ref, snapshot_dir)
+    articles, raises = [], []
+    with gzip.open(os.path.join(snapshot_dir, entry["file"]), "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        for line in f:
+            item = json.loads(line)
+            kind = item.pop("type")
+            (articles if kind == "article" else raises).append(item)
+    return {"header": header, "articles": articles, "raises": raises}
+
+
+if __name__ == "__main__":
+    # List snapshots
+    for entry in list_snapshots():
+        print(f"  {entry['id']}  {entry['articles']:>5} articles  {entry['raises']:>4} raises  {entry['bytes']:>8} bytes")
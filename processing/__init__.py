@@ -0,0 +1,48 @@
+"""
+Processing
+Each step is imported on first use, so importing one helper (e.g. url_key
+for the Sheets backend) does not load NumPy and every other step with it.
+"""
+import importlib
+
+# Exported name -> submodule that provides it
+_BACKENDS = {
+    "link_raises": ".linking",
+    "raise_key": ".linking",
+    "ItemFeatures": ".scoring",
+    "score_items": ".scoring",
+    "rank_sections": ".scoring",
+    "extract_deal": ".deals",
+    "extract_deals": ".deals",
+    "merge_deals": ".deals",
+    "update_rollups": ".rollups",
+    "window_stats": ".rollups",
+    "weekly_series": ".rollups",
+    "momentum": ".rollups",
+    "funding_trends": ".rollups",
+    "profile_items": ".profiles",
+    "main_items": ".profiles",
+    "canonicalize_url": ".urls",
+    "canonicalize_items": ".urls",
+    "url_key": ".urls",
+    "url_keys": ".urls",
+    "update_investor_graph": ".investors",
+    "load_graph": ".investors",
+    "investor_key": ".investors",
+    "update_trending": ".trending",
+    "trending_topics": ".trending",
+}
+
+__all__ = list(_BACKENDS)
+
+
+def __getattr__(name):
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_BACKENDS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
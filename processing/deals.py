@@ -0,0 +1,216 @@
+"""
+Structured deal extraction from funding headlines and tweets
+"X raises $20M Series A led by Paradigm" -> project, amount, round, investors.
+All clauses are matched by one precompiled pattern in a single scan per item;
+the resulting records have the same shape as DefiLlama raises and are merged
+into them.
+"""
+import re
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from .linking import tokenize, MAX_DAYS_APART, _days_apart
+
+DEAL_RE = re.compile(r"""
+    (?P<amount>
+        (?P<currency>US\$|\$|€|£|USD\s?|EUR\s?)
+        (?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d{1,4}(?:[.,]\d+)?)
+        \s?(?P<unit>k|m|mm|mn|b|bn|thousand|million|billion)\b
+    )
+  | (?P<round>\b(?:pre-seed|seed|series\s[a-h]\d?|strategic|angel|bridge|growth|
+                 private\s(?:sale|round)|public\s(?:sale|round)|ico|ido)\b)
+  | \bled\sby\s(?P<leads>(?:(?!\bwith\b)[^.;:()\n])+)
+  | \bparticipation\sfrom\s(?P<others>[^.;:()\n]+)
+""", re.IGNORECASE | re.VERBOSE)
+
+PROJECT_RE = re.compile(
+    r"^\s*(?P<project>[A-Z0-9][\w.&'\- ]{0,50}?)(?:,\s[^,]{1,60},)?\s+"
+    r"(?i:raises|raised|secures|secured|closes|closed|lands|nets|bags|announces|completes)\b"
+)
+
+# A funding verb or noun right before ("raises $20M", "a total of $20M") or after
+# ("$20M in funding", "$20M round") the amount; other amounts need a round or investors
+FUNDING_BEFORE_RE = re.compile(
+    r"\b(?:raise[sd]?|raising|secure[sd]?|closes|closed|lands|nets|bags|completes|"
+    r"funding|financing|investment|round)\b(?:\s+[\w-]+){0,3}\s*$",
+    re.IGNORECASE,
+)
+FUNDING_AFTER_RE = re.compile(
+    r"^\s*(?:in\s+)?(?:[\w-]+\s+){0,2}(?:funding|financing|round|raise|investment)\b",
+    re.IGNORECASE,
+)
+
+INVESTOR_SPLIT_RE = re.compile(r",\s*|\s+and\s+|\s*&\s*")
+INVESTOR_STOP_RE = re.compile(r"\s+(?:with|at|to|as|for|in|from|alongside)\s.*$|\s+(?:and\s+)?others?$", re.IGNORECASE)
+
+UNIT_TO_MILLIONS = {
+    "k": 0.001, "thousand": 0.001,
+    "m": 1.0, "mm": 1.0, "mn": 1.0, "million": 1.0,
+    "b": 1000.0, "bn": 1000.0, "billion": 1000.0,
+}
+CURRENCY_CODES = {"$": "USD", "us$": "USD", "usd": "USD", "€": "EUR", "eur": "EUR", "£": "GBP"}
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£"}
+
+
+def _split_investors(text: str) -> List[str]:
+    text = INVESTOR_STOP_RE.sub("", text.strip())
+    names = []
+    for part in INVESTOR_SPLIT_RE.split(text):
+        part = part.strip(" .'\"")
+        if part and len(part) <= 60 and part.lower() not in ("others", "other investors"):
+            names.append(part)
+    return names
+
+
+def _parse_number(text: str) -> float:
+    """"1,500" -> 1500 (thousands separator), "1,5" -> 1.5 (decimal comma)"""
+    head, _, tail = text.rpartition(",")
+    if head and tail.isdigit() and len(tail) <= 2:
+        return float(f"{head.replace(',', '')}.{tail}")
+    return float(text.replace(",", ""))
+
+
+def _format_amount(value: float, currency: str) -> str:
+    symbol = CURRENCY_SYMBOLS.get(currency, "")
+    if value >= 1000:
+        return f"{symbol}{value / 1000:g}B"
+    if value < 1:
+        return f"{symbol}{value * 1000:g}K"
+    return f"{symbol}{value:g}M"
+
+
+def extract_deal(item: Dict) -> Optional[Dict]:
+    """Structured deal record for a funding item, or None if it does not describe one"""
+    title = item.get("title", "")
+    project_match = PROJECT_RE.match(title)
+    if not project_match:
+        return None
+
+    amount = None
+    currency = None
+    round_name = None
+    leads: List[str] = []
+    others: List[str] = []
+    funding_amount = False
+
+    # Round keywords count only in the title; summaries mention other rounds too
+    title_end = len(title)
+    text = title + ". " + item.get("summary", "")
+    for m in DEAL_RE.finditer(text):
+        if m.group("amount") and amount is None:
+            currency = CURRENCY_CODES.get(m.group("currency").strip().lower(), "USD")
+            number = _parse_number(m.group("number"))
+            amount = number * UNIT_TO_MILLIONS[m.group("unit").lower()]
+            funding_amount = bool(
+                FUNDING_BEFORE_RE.search(text, max(0, m.start() - 40), m.start())
+                or FUNDING_AFTER_RE.match(text[m.end():m.end() + 30])
+            )
+        elif m.group("round") and round_name is None and m.start() < title_end:
+            round_name = m.group("round").title().replace("Pre-Seed", "Pre-seed")
+            if round_name.lower().startswith("series "):
+                round_name = "Series " + round_name[7:].upper()
+        elif m.group("leads") and not leads:
+            leads = _split_investors(m.group("leads"))
+        elif m.group("others") and not others:
+            others = _split_investors(m.group("others"))
+
+    if amount is None and round_name is None:
+        return None
+
+    return {
+        "project": project_match.group("project").strip(),
+        "amount": _format_amount(amount, currency) if amount is not None else "Undisclosed",
+        # amount_raw is in $M everywhere (filters, scoring, rollups); other currencies stay unset
+        "amount_raw": amount if amount is not None and currency == "USD" else 0,
+        "currency": currency or "USD",
+        "round": round_name or "Unknown",
+        "category": "",
+        "lead_investors": leads,
+        "all_investors": leads + [o for o in others if o not in leads],
+        "date": item.get("published", ""),
+        "source": f"news:{item.get('source', '')}",
+        "chains": [],
+        "link": item.get("link", ""),
+        "origin": item.get("origin", "main"),
+        # Enough evidence to stand as a raise on its own, not just enrich one
+        "confirmed": bool(round_name or leads or others or funding_amount),
+    }
+
+
+def extract_deals(articles: List[Dict]) -> List[Dict]:
+    """Extract deals from every funding article/tweet, attaching each as item["deal"]"""
+    deals = []
+    for article in articles:
+        if not article.get("is_funding"):
+            continue
+        deal = extract_deal(article)
+        if deal:
+            article["deal"] = deal
+            deals.append(deal)
+    return deals
+
+
+def merge_deals(raises: List[Dict], deals: List[Dict]) -> Dict[str, int]:
+    """Fold extracted deals into the raises list
+
+    A deal for a project already in raises (same normalized name, close in
+    time) fills in missing amount/round/investors; otherwise, if it names a
+    round or investors or its amount sits next to a funding verb, it is added
+    as a new raise. Returns counts of enriched and added records.
+    """
+    by_name: Dict[tuple, Dict] = {}
+    for raise_data in raises:
+        by_name.setdefault(tuple(tokenize(raise_data.get("project", ""))), raise_data)
+
+    stats = {"enriched": 0, "added": 0}
+    for deal in deals:
+        key = tuple(tokenize(deal["project"]))
+        existing = by_name.get(key)
+        if existing and _days_apart(existing.get("date", ""), deal["date"]) <= MAX_DAYS_APART:
+            changed = False
+            if existing.get("amount", "Undisclosed") == "Undisclosed" and deal["amount"] != "Undisclosed":
+                existing["amount"], existing["amount_raw"] = deal["amount"], deal["amount_raw"]
+                changed = True
+            if existing.get("round") in (None, "", "Unknown") and deal["round"] != "Unknown":
+                existing["round"] = deal["round"]
+                changed = True
+            for field in ("lead_investors", "all_investors"):
+                missing = [i for i in deal[field] if i not in existing.get(field, [])]
+                if missing:
+                    existing[field] = existing.get(field, []) + missing
+                    changed = True
+            stats["enriched"] += changed
+        elif not existing and deal["confirmed"]:
+            raises.append(deal)
+            by_name[key] = deal
+            stats["added"] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    # Benchmark run: extraction throughput on synthetic headlines
+    import time
+    import random
+
+    templates = [
+        "{p} raises ${n}M Series A led by Paradigm and a16z crypto",
+        "{p} secures €{n} million seed round led by Dragonfly, with participation from Coinbase Ventures",
+        "{p} closes $1.{n}B growth round",
+        "{p} raises {n}M in strategic funding",
+        "Markets rally as {p} token jumps {n}%",
+    ]
+    items = [{
+        "title": random.choice(templates).format(p=f"Project{i}", n=random.randint(1, 99)),
+        "summary": "The round was led by Polychain Capital with participation from Jump Crypto and others. " * 3,
+        "published": datetime.now().isoformat(), "source": "bench", "link": f"https://example.com/{i}",
+        "is_funding": True,
+    } for i in range(50_000)]
+
+    start = time.perf_counter()
+    deals = extract_deals(items)
+    elapsed = time.perf_counter() - start
+    print(f"Extracted {len(deals)} deals from {len(items)} items in {elapsed * 1000:.0f}ms "
+          f"({len(items) / elapsed:,.0f} items/s)")
+    for deal in deals[:4]:
+        print(f"  {deal['project']}: {deal['amount']} {deal['round']} led by {deal['lead_investors']} "
+              f"(+{deal['all_investors'][len(deal['lead_investors']):]})")
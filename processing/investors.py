@@ -0,0 +1,416 @@
+"""
+Investor co-investment graph built from every funding round collected
+Investor names are normalized (case, punctuation, legal suffixes,
+config.INVESTOR_ALIASES) into one node per fund. Rounds and their
+participants are added incrementally to SQLite. Queries run on an in-memory
+graph: CSR adjacency (indptr/indices) with per-edge shared-deal count, shared
+amount and last deal day, plus investor <-> deal CSR arrays for time-windowed
+activity. Top co-investors, ego networks, syndicate paths and newly active
+funds are answered in milliseconds over the full history.
+
+    python -m processing.investors "Dragonfly"      # co-investors from data/investors.db
+    python -m processing.investors --backfill       # load DefiLlama's full raise history
+    python -m processing.investors --bench 50000    # synthetic benchmark
+"""
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+from .linking import raise_key
+from .rollups import raise_sector, counted_raise
+
+INVESTOR_DB_PATH = os.getenv("INVESTOR_DB_PATH", os.path.join("data", "investors.db"))
+
+SECTORS = ["crypto", "ai"]
+
+PARENTHETICAL_RE = re.compile(r"\([^)]*\)")
+PUNCT_RE = re.compile(r"[^a-z0-9 ]+")
+LEGAL_SUFFIX_RE = re.compile(r"(?: (?:inc|llc|ltd|limited|lp|llp|gmbh|ag|sa|plc|corp|co))+$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS investors (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    project TEXT NOT NULL,
+    day TEXT NOT NULL,
+    amount REAL NOT NULL,
+    sector TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participants (
+    deal_id INTEGER NOT NULL,
+    investor_id INTEGER NOT NULL,
+    lead INTEGER NOT NULL,
+    PRIMARY KEY (deal_id, investor_id)
+);
+"""
+
+
+def connect(db_path: str = INVESTOR_DB_PATH) -> sqlite3.Connection:
+    """Open the investor database, creating the schema on first use"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def investor_key(name: str) -> str:
+    """Normalized investor name: "Dragonfly Capital Partners, LLC" -> "dragonfly" (via aliases)"""
+    import config
+
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    text = PARENTHETICAL_RE.sub(" ", text).replace("&", " and ")
+    text = " ".join(PUNCT_RE.sub(" ", text).split())
+    text = LEGAL_SUFFIX_RE.sub("", text)
+    if text.startswith("the "):
+        text = text[4:]
+    return config.INVESTOR_ALIASES.get(text, text)
+
+
+def update_investor_graph(raises: List[Dict], db_path: str = INVESTOR_DB_PATH) -> int:
+    """Add rounds and participants not stored before; returns how many participations were added
+
+    A round seen again with more investors (e.g. enriched from headlines) gains
+    the new participants. Like the rollups, only DefiLlama rounds are stored,
+    so a headline deal and the later DefiLlama record are not two deals.
+    """
+    conn = connect(db_path)
+    added = 0
+    try:
+        with conn:
+            ids: Dict[str, int] = {}
+            for raise_data in raises:
+                day = (raise_data.get("date") or "")[:10]
+                names = raise_data.get("all_investors") or raise_data.get("lead_investors") or []
+                if len(day) != 10 or not names or not counted_raise(raise_data):
+                    continue
+                key = raise_key(raise_data)
+                conn.execute(
+                    "INSERT OR IGNORE INTO deals (key, project, day, amount, sector) VALUES (?, ?, ?, ?, ?)",
+                    (key, raise_data.get("project", ""), day, float(raise_data.get("amount_raw") or 0),
+                     raise_sector(raise_data)),
+                )
+                deal_id = conn.execute("SELECT id FROM deals WHERE key = ?", (key,)).fetchone()[0]
+
+                leads = {investor_key(n) for n in raise_data.get("lead_investors", []) if n.strip()}
+                for name in names:
+                    inv_key = investor_key(name) if name.strip() else ""
+                    if not inv_key:
+                        continue
+                    if inv_key not in ids:
+                        conn.execute("INSERT OR IGNORE INTO investors (key, name) VALUES (?, ?)", (inv_key, name.strip()))
+                        ids[inv_key] = conn.execute("SELECT id FROM investors WHERE key = ?", (inv_key,)).fetchone()[0]
+                    added += conn.execute(
+                        "INSERT OR IGNORE INTO participants (deal_id, investor_id, lead) VALUES (?, ?, ?)",
+                        (deal_id, ids[inv_key], int(inv_key in leads)),
+                    ).rowcount
+    finally:
+        conn.close()
+    return added
+
+
+def graph_version(db_path: str = INVESTOR_DB_PATH) -> Optional[int]:
+    """Changes whenever participations are added (None if there is no graph yet); for caching loaded graphs"""
+    if not os.path.exists(db_path):
+        return None
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM participants").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """indptr and column indices for (rows, cols) pairs grouped by row"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
+
+
+class InvestorGraph:
+    """Co-investment graph over investors, with deal-level arrays for windowed queries"""
+
+    def __init__(self, names: List[str], keys: List[str], deal_day: np.ndarray, deal_amount: np.ndarray,
+                 deal_sector: np.ndarray, part_deal: np.ndarray, part_investor: np.ndarray, part_lead: np.ndarray):
+        self.names = names
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.deal_day = deal_day            # date ordinals
+        self.deal_amount = deal_amount      # $M
+        self.deal_sector = deal_sector      # index into SECTORS
+        n, m = len(names), len(deal_day)
+
+        # Investor -> deals and deal -> investors
+        self.inv_ptr, self.inv_deals = _csr(part_investor, part_deal, n)
+        self.deal_ptr, self.deal_investors = _csr(part_deal, part_investor, m)
+        self.deal_counts = np.diff(self.inv_ptr)
+        self.lead_counts = np.bincount(part_investor, weights=part_lead, minlength=n).astype(np.int64)
+
+        # Every ordered pair of co-participants: each participation repeated once per member of its deal
+        sizes = np.diff(self.deal_ptr)
+        owner = np.repeat(np.arange(m), sizes)
+        left = np.repeat(np.arange(len(self.deal_investors)), sizes[owner])
+        block_start = np.repeat(np.cumsum(sizes[owner]) - sizes[owner], sizes[owner])
+        right = self.deal_ptr[owner[left]] + (np.arange(len(left)) - block_start)
+        src, dst = self.deal_investors[left], self.deal_investors[right]
+        keep = src != dst
+        src, dst, pair_deal = src[keep], dst[keep], owner[left][keep]
+
+        codes, inverse = np.unique(src.astype(np.int64) * n + dst, return_inverse=True)
+        self.edge_count = np.bincount(inverse).astype(np.int64)
+        self.edge_amount = np.bincount(inverse, weights=self.deal_amount[pair_deal])
+        self.edge_last = np.zeros(len(codes), dtype=np.int64)
+        np.maximum.at(self.edge_last, inverse, self.deal_day[pair_deal])
+        edge_src = codes // n
+        self.indices = codes % n
+        self.indptr = np.searchsorted(edge_src, np.arange(n + 1))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edges(self) -> int:
+        return len(self.indices) // 2
+
+    def find(self, name: str) -> Optional[int]:
+        """Node for a name or alias; falls back to the busiest investor whose name contains it as whole words"""
+        key = investor_key(name)
+        if key in self.index:
+            return self.index[key]
+        if not key:
+            return None
+        matches = [i for k, i in self.index.items() if f" {key} " in f" {k} "]
+        return max(matches, key=lambda i: self.deal_counts[i]) if matches else None
+
+    def _window_mask(self, days: Optional[int], end: Optional[date], sector: Optional[str]) -> Optional[np.ndarray]:
+        if days is None and sector is None:
+            return None
+        mask = np.ones(len(self.deal_day), dtype=bool)
+        if days is not None:
+            stop = (end or date.today()).toordinal()
+            mask &= (self.deal_day > stop - days) & (self.deal_day <= stop)
+        if sector is not None:
+            mask &= self.deal_sector == SECTORS.index(sector)
+        return mask
+
+    def _node(self, i: int) -> Dict:
+        return {"name": self.names[i], "deals": int(self.deal_counts[i]), "leads": int(self.lead_counts[i])}
+
+    def _coinvestors(self, i: int, days: Optional[int], end: Optional[date],
+                     sector: Optional[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Neighbours of node i with shared deal counts and $M, from the adjacency or a deal window"""
+        mask = self._window_mask(days, end, sector)
+        if mask is None:
+            lo, hi = self.indptr[i], self.indptr[i + 1]
+            return self.indices[lo:hi], self.edge_count[lo:hi], self.edge_amount[lo:hi]
+        deals = self.inv_deals[self.inv_ptr[i]:self.inv_ptr[i + 1]]
+        deals = deals[mask[deals]]
+        sizes = np.diff(self.deal_ptr)[deals]
+        starts = np.repeat(self.deal_ptr[deals], sizes)
+        offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        members = self.deal_investors[starts + offsets]
+        counts = np.bincount(members, minlength=len(self))
+        amounts = np.bincount(members, weights=np.repeat(self.deal_amount[deals], sizes), minlength=len(self))
+        counts[i] = 0
+        others = np.flatnonzero(counts)
+        return others, counts[others], amounts[others]
+
+    def top_coinvestors(self, name: str, k: int = 10, by: str = "count", days: Optional[int] = None,
+                        end: Optional[date] = None, sector: Optional[str] = None) -> List[Dict]:
+        """Funds sharing the most deals (or $M, by="amount") with name, optionally within a window/sector"""
+        i = self.find(name)
+        if i is None:
+            return []
+        others, counts, amounts = self._coinvestors(i, days, end, sector)
+        top = np.lexsort((-counts, -(counts if by == "count" else amounts)))[:k]
+        return [{**self._node(int(others[j])), "shared_deals": int(counts[j]),
+                 "shared_amount": round(float(amounts[j]), 2)} for j in top]
+
+    def ego_network(self, name: str, k: int = 20) -> Optional[Dict]:
+        """name, its k strongest co-investors and every edge among them"""
+        i = self.find(name)
+        if i is None:
+            return None
+        others, counts, amounts = self._coinvestors(i, None, None, None)
+        members = [i] + [int(others[j]) for j in np.lexsort((-amounts, -counts))[:k]]
+        member_set = np.array(sorted(members))
+        edges = []
+        for a in members:
+            lo, hi = self.indptr[a], self.indptr[a + 1]
+            inside = np.flatnonzero(np.isin(self.indices[lo:hi], member_set)) + lo
+            edges += [{"source": self.names[a], "target": self.names[int(self.indices[e])],
+                       "deals": int(self.edge_count[e]), "amount": round(float(self.edge_amount[e]), 2),
+                       "last": date.fromordinal(int(self.edge_last[e])).isoformat()}
+                      for e in inside if a < self.indices[e]]
+        return {"center": self.names[i], "nodes": [self._node(a) for a in members], "edges": edges}
+
+    def shortest_path(self, a: str, b: str, min_deals: int = 1) -> Optional[List[Dict]]:
+        """Fewest-hop syndicate chain from a to b over edges with at least min_deals shared deals
+
+        Among equally short paths, hops through stronger co-investment edges are
+        preferred. Returns one {"from", "to", "deals", "amount"} per hop, or None.
+        """
+        start, goal = self.find(a), self.find(b)
+        if start is None or goal is None:
+            return None
+        parent = np.full(len(self), -1, dtype=np.int64)
+        parent[start] = start
+        queue = deque([start])
+        while queue and parent[goal] == -1:
+            node = queue.popleft()
+            lo, hi = self.indptr[node], self.indptr[node + 1]
+            strong = np.flatnonzero(self.edge_count[lo:hi] >= min_deals)
+            for e in strong[np.argsort(-self.edge_count[lo:hi][strong], kind="stable")] + lo:
+                other = int(self.indices[e])
+                if parent[other] == -1:
+                    parent[other] = node
+                    queue.append(other)
+        if parent[goal] == -1:
+            return None
+
+        chain = [goal]
+        while chain[-1] != start:
+            chain.append(int(parent[chain[-1]]))
+        chain.reverse()
+        hops = []
+        for u, v in zip(chain, chain[1:]):
+            lo, hi = self.indptr[u], self.indptr[u + 1]
+            e = lo + int(np.searchsorted(self.indices[lo:hi], v))
+            hops.append({"from": self.names[u], "to": self.names[v], "deals": int(self.edge_count[e]),
+                         "amount": round(float(self.edge_amount[e]), 2)})
+        return hops
+
+    def active_investors(self, days: int = 30, sector: Optional[str] = None, end: Optional[date] = None,
+                         new_only: bool = False, k: int = 20) -> List[Dict]:
+        """Most active funds in the last `days` days; new_only keeps those with no earlier deal (in the sector)"""
+        stop = (end or date.today()).toordinal()
+        in_sector = self._window_mask(None, None, sector)
+        if in_sector is None:
+            in_sector = np.ones(len(self.deal_day), dtype=bool)
+        window = in_sector & (self.deal_day > stop - days) & (self.deal_day <= stop)
+        owner = np.repeat(np.arange(len(self)), self.deal_counts)
+        hits = window[self.inv_deals]
+        counts = np.bincount(owner[hits], minlength=len(self))
+        amounts = np.bincount(owner[hits], weights=self.deal_amount[self.inv_deals[hits]], minlength=len(self))
+        if new_only:
+            before = in_sector[self.inv_deals] & (self.deal_day[self.inv_deals] <= stop - days)
+            counts[np.bincount(owner[before], minlength=len(self)) > 0] = 0
+        candidates = np.flatnonzero(counts)
+        top = candidates[np.lexsort((-amounts[candidates], -counts[candidates]))][:k]
+        return [{**self._node(int(i)), "window_deals": int(counts[i]), "window_amount": round(float(amounts[i]), 2)}
+                for i in top]
+
+
+def load_graph(db_path: str = INVESTOR_DB_PATH) -> Optional[InvestorGraph]:
+    """The co-investment graph over everything stored, or None if nothing is stored yet"""
+    if not os.path.exists(db_path):
+        return None
+    conn = connect(db_path)
+    try:
+        investors = conn.execute("SELECT id, key, name FROM investors ORDER BY id").fetchall()
+        deals = conn.execute("SELECT id, day, amount, sector FROM deals ORDER BY id").fetchall()
+        parts = np.array(conn.execute("SELECT deal_id, investor_id, lead FROM participants").fetchall(),
+                         dtype=np.int64).reshape(-1, 3)
+    finally:
+        conn.close()
+    if not investors:
+        return None
+
+    # Database ids -> dense node and deal indices
+    inv_index = np.zeros(investors[-1][0] + 1, dtype=np.int64)
+    inv_index[[row[0] for row in investors]] = np.arange(len(investors))
+    deal_index = np.zeros((deals[-1][0] if deals else 0) + 1, dtype=np.int64)
+    deal_index[[row[0] for row in deals]] = np.arange(len(deals))
+    return InvestorGraph(
+        names=[row[2] for row in investors],
+        keys=[row[1] for row in investors],
+        deal_day=np.array([date.fromisoformat(row[1]).toordinal() for row in deals], dtype=np.int64),
+        deal_amount=np.array([row[2] for row in deals], dtype=np.float64),
+        deal_sector=np.array([SECTORS.index(row[3]) for row in deals], dtype=np.int64),
+        part_deal=deal_index[parts[:, 0]],
+        part_investor=inv_index[parts[:, 1]],
+        part_lead=parts[:, 2],
+    )
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Investor co-investment graph")
+    parser.add_argument("investor", nargs="?", help="Show co-investors and recent activity for this fund")
+    parser.add_argument("--backfill", action="store_true", help="Add DefiLlama's full raise history")
+    parser.add_argument("--bench", type=int, metavar="RAISES", help="Benchmark on synthetic rounds")
+    args = parser.parse_args()
+
+    if args.backfill:
+        from collectors.defillama_collector import fetch_recent_raises
+        raises = fetch_recent_raises(days_back=None)
+        print(f"Added {update_investor_graph(raises)} participations from {len(raises)} rounds")
+
+    if args.bench:
+        import random
+        import tempfile
+
+        random.seed(7)
+        # Power-law fund activity: a few funds are in many deals
+        funds = [f"Fund {i} Capital" for i in range(args.bench // 10)]
+        weights = [1 / (i + 1) ** 0.8 for i in range(len(funds))]
+        start_day = datetime(2020, 1, 1)
+        raises = [{
+            "project": f"Project {i}", "round": random.choice(["Seed", "Series A", "Strategic"]),
+            "date": (start_day + timedelta(days=random.randint(0, 2000))).isoformat(),
+            "amount_raw": round(random.lognormvariate(1.5, 1.2), 2),
+            "category": random.choice(["DeFi", "AI", "Infrastructure"]),
+            "lead_investors": [], "all_investors": random.choices(funds, weights, k=random.randint(1, 12)),
+        } for i in range(args.bench)]
+        for r in raises:
+            r["lead_investors"] = r["all_investors"][:1]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "investors.db")
+            t = time.perf_counter()
+            added = update_investor_graph(raises, db_path)
+            print(f"Stored {added} participations from {len(raises)} rounds in {(time.perf_counter() - t) * 1000:.0f}ms")
+            t = time.perf_counter()
+            graph = load_graph(db_path)
+            print(f"Built graph: {len(graph)} investors, {graph.edges} edges in {(time.perf_counter() - t) * 1000:.0f}ms")
+            end = date(2025, 6, 23)
+            queries = {
+                "top co-investors": lambda: graph.top_coinvestors("Fund 0", 10),
+                "top co-investors (90d, ai)": lambda: graph.top_coinvestors("Fund 0", 10, days=90, end=end, sector="ai"),
+                "ego network (k=20)": lambda: graph.ego_network("Fund 3", 20),
+                "shortest path": lambda: graph.shortest_path(funds[-1], funds[-2]),
+                "newly active (30d, ai)": lambda: graph.active_investors(30, "ai", end, new_only=True),
+            }
+            for label, query in queries.items():
+                query()
+                t = time.perf_counter()
+                for _ in range(20):
+                    query()
+                print(f"  {label:<28} {(time.perf_counter() - t) / 20 * 1000:7.2f}ms")
+        sys.exit(0)
+
+    graph = load_graph()
+    if graph is None:
+        print("No investor graph yet; run the aggregator or --backfill first")
+        sys.exit(0)
+    print(f"{len(graph)} investors, {graph.edges} co-investment edges")
+    if args.investor:
+        print(f"\nTop co-investors of {args.investor}:")
+        for c in graph.top_coinvestors(args.investor, 10):
+            print(f"  {c['name']:<32} {c['shared_deals']:>4} deals  ${c['shared_amount']:,.0f}M")
+    print("\nNewly active in AI (30d):")
+    for a in graph.active_investors(30, "ai", new_only=True, k=10):
+        print(f"  {a['name']:<32} {a['window_deals']:>4} deals  ${a['window_amount']:,.0f}M")
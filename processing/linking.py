@@ -0,0 +1,129 @@
+"""
+Link DefiLlama raises to the funding articles and deal tweets covering them
+Project names are indexed as normalized token n-grams, so each article is
+matched with one pass over its tokens instead of one scan per raise.
+"""
+import re
+from datetime import datetime
+from typing import List, Dict, Tuple, Set
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Trailing words that projects often drop in headlines ("Foo Protocol" -> "Foo")
+NAME_SUFFIXES = {"protocol", "labs", "network", "finance", "foundation", "inc", "dao", "xyz", "io", "app", "fi"}
+
+# Names too generic to link on their own
+AMBIGUOUS_NAMES = {
+    "bitcoin", "ethereum", "crypto", "defi", "ai", "web3", "chain", "token", "protocol", "network",
+    "wallet", "exchange", "bridge", "capital", "ventures", "unknown", "the", "layer", "open", "base",
+}
+
+MAX_NAME_TOKENS = 5
+# Articles more than this many days away from the round's date are not linked
+MAX_DAYS_APART = 14
+
+
+def raise_key(raise_data: Dict) -> str:
+    """Identity of a funding round across runs and stores: project, day and round"""
+    # DefiLlama sends null for unknown fields, so .get defaults are not enough
+    return "|".join([
+        raise_data.get("project") or "", (raise_data.get("date") or "")[:10], raise_data.get("round") or "",
+    ])
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def name_variants(project: str) -> List[Tuple[str, ...]]:
+    """Token sequences an article might use for a project name"""
+    tokens = tokenize(project)
+    variants = []
+    if tokens:
+        variants.append(tuple(tokens))
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens = tokens[:-1]
+        variants.append(tuple(tokens))
+    return [
+        v for v in variants
+        if len(v) <= MAX_NAME_TOKENS and not (len(v) == 1 and (len(v[0]) < 3 or v[0] in AMBIGUOUS_NAMES))
+    ]
+
+
+def build_name_index(raises: List[Dict]) -> Dict[Tuple[str, ...], List[int]]:
+    """Map each normalized name n-gram to the raises it identifies"""
+    index: Dict[Tuple[str, ...], List[int]] = {}
+    for i, raise_data in enumerate(raises):
+        for variant in name_variants(raise_data.get("project", "")):
+            entries = index.setdefault(variant, [])
+            if i not in entries:
+                entries.append(i)
+    return index
+
+
+def match_text(text: str, index: Dict[Tuple[str, ...], List[int]], max_len: int,
+               first_tokens: Set[str]) -> List[int]:
+    """Raise indices whose names occur in the text, in order of first mention"""
+    tokens = tokenize(text)
+    found = []
+    for start in range(len(tokens)):
+        if tokens[start] not in first_tokens:
+            continue
+        for length in range(1, min(max_len, len(tokens) - start) + 1):
+            for i in index.get(tuple(tokens[start:start + length]), ()):
+                if i not in found:
+                    found.append(i)
+    return found
+
+
+def _days_apart(a: str, b: str) -> float:
+    try:
+        da = datetime.fromisoformat(a.replace("Z", "+00:00")).replace(tzinfo=None)
+        db = datetime.fromisoformat(b.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return 0.0
+    return abs((da - db).total_seconds()) / 86400
+
+
+def link_raises(articles: List[Dict], raises: List[Dict]) -> int:
+    """Attach raises to the funding articles/tweets that mention them, and vice versa
+
+    Raises get "coverage" (title, link, source) and "coverage_count"; linked
+    articles get "round" with the structured data of the first matched raise.
+    Returns the number of links made.
+    """
+    for raise_data in raises:
+        raise_data["coverage"] = []
+        raise_data["coverage_count"] = 0
+
+    index = build_name_index(raises)
+    if not index:
+        return 0
+    max_len = max(len(k) for k in index)
+    first_tokens = {k[0] for k in index}
+
+    links = 0
+    for article in articles:
+        if not article.get("is_funding"):
+            continue
+        article.pop("round", None)
+        matches = match_text(article.get("title", "") + " " + article.get("summary", ""), index, max_len, first_tokens)
+        for i in matches:
+            raise_data = raises[i]
+            if _days_apart(article.get("published", ""), raise_data.get("date", "")) > MAX_DAYS_APART:
+                continue
+            raise_data["coverage"].append({
+                "title": article["title"],
+                "link": article["link"],
+                "source": article["source"],
+            })
+            raise_data["coverage_count"] += 1
+            if "round" not in article:
+                article["round"] = {
+                    "project": raise_data["project"],
+                    "amount": raise_data["amount"],
+                    "round": raise_data["round"],
+                    "lead_investors": raise_data.get("lead_investors", []),
+                }
+            links += 1
+    return links
@@ -0,0 +1,75 @@
+"""
+Site profiles - per-team views over one collection pass
+A profile (config.SITE_PROFILES) narrows the shared articles and raises to its
+feeds, re-tags them with its keyword overrides and drops small rounds, so each
+profile's dashboard, digest and Sheet cost rendering time only.
+
+Items from a profile's extra_feeds are tagged "origin": "extra" when
+collected. They are shown only to the profiles listing that feed, never in
+the main outputs.
+"""
+from typing import List, Dict, Tuple
+import config
+
+
+def profile_categories(profile: Dict) -> Dict[str, List[str]]:
+    """config.CATEGORIES extended with the profile's extra keywords"""
+    categories = {name: list(keywords) for name, keywords in config.CATEGORIES.items()}
+    for name, keywords in profile.get("keywords", {}).items():
+        categories[name] = categories.get(name, []) + [k.lower() for k in keywords]
+    return categories
+
+
+def is_extra(item: Dict) -> bool:
+    """Whether an article, or a round extracted from one, came from a profile-only extra feed"""
+    return item.get("origin") == "extra"
+
+
+def _extra_source(item: Dict) -> str:
+    source = item.get("source", "")
+    return source[len("news:"):] if source.startswith("news:") else source
+
+
+def main_items(articles: List[Dict], raises: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """The articles and raises the main (profile-less) outputs show: everything but extra feeds"""
+    return [a for a in articles if not is_extra(a)], [r for r in raises if not is_extra(r)]
+
+
+def wants_source(profile: Dict, article: Dict) -> bool:
+    if is_extra(article):
+        return article.get("source") in profile.get("extra_feeds", {})
+    feeds = profile.get("feeds")
+    if not feeds:
+        return True
+    if "twitter" in article.get("categories", []):
+        return "twitter" in feeds
+    return article.get("source") in feeds
+
+
+def wants_raise(profile: Dict, raise_data: Dict) -> bool:
+    if float(raise_data.get("amount_raw") or 0) < profile.get("min_raise", 0):
+        return False
+    if is_extra(raise_data):
+        return _extra_source(raise_data) in profile.get("extra_feeds", {})
+    feeds = profile.get("feeds")
+    if not feeds:
+        return True
+    source = raise_data.get("source", "defillama")
+    # Rounds extracted from headlines follow the feed they came from
+    if source.startswith("news:"):
+        return source[len("news:"):] in feeds
+    return "defillama" in feeds
+
+
+def profile_items(articles: List[Dict], raises: List[Dict], profile: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """The articles and raises a profile shows; shared items are copied before re-tagging"""
+    selected = [a for a in articles if wants_source(profile, a)]
+    if profile.get("keywords"):
+        from collectors.rss_collector import classify_article
+
+        categories = profile_categories(profile)
+        selected = [
+            a if "twitter" in a.get("categories", []) else classify_article(dict(a), categories)
+            for a in selected
+        ]
+    return selected, [r for r in raises if wants_raise(profile, r)]
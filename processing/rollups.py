@@ -0,0 +1,227 @@
+"""
+Incremental funding rollups - daily buckets per category, chain, lead investor
+Each bucket keeps a count, a sum and a log-scale histogram of round sizes, so
+rolling 7/30/90-day windows, percentiles and weekly series are answered by
+merging a few buckets instead of rescanning raise history.
+"""
+import os
+import math
+import sqlite3
+from datetime import timedelta, date
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+from .linking import raise_key
+
+ROLLUP_DB_PATH = os.getenv("ROLLUP_DB_PATH", os.path.join("data", "rollups.db"))
+
+# Amount histogram: log-spaced bins (in $M) from $10K to $100B, ~12% relative error
+SKETCH_MIN = 0.01
+SKETCH_GROWTH = 1.25
+SKETCH_BINS = math.ceil(math.log(1e5 / SKETCH_MIN) / math.log(SKETCH_GROWTH)) + 1
+
+DIMENSIONS = ["all", "sector", "category", "chain", "lead_investor", "round"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_raises (
+    key TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    day TEXT NOT NULL,
+    dim TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (dim, value, day)
+);
+CREATE INDEX IF NOT EXISTS buckets_day ON buckets(dim, day);
+"""
+
+
+def connect(db_path: str = ROLLUP_DB_PATH) -> sqlite3.Connection:
+    """Open the rollup database, creating the schema on first use"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def sketch_bin(amount: float) -> int:
+    return min(max(int(math.log(max(amount, SKETCH_MIN) / SKETCH_MIN) / math.log(SKETCH_GROWTH)), 0), SKETCH_BINS - 1)
+
+
+def sketch_quantile(sketch: np.ndarray, q: float) -> Optional[float]:
+    """Approximate quantile (in $M) from a merged histogram"""
+    total = sketch.sum()
+    if total == 0:
+        return None
+    i = int(np.searchsorted(np.cumsum(sketch), q * total))
+    return SKETCH_MIN * SKETCH_GROWTH ** (i + 0.5)
+
+
+def raise_sector(raise_data: Dict) -> str:
+    """AI vs crypto deal flow split"""
+    words = set((raise_data.get("category") or "").lower().replace("/", " ").split())
+    return "ai" if words & {"ai", "artificial", "ml"} else "crypto"
+
+
+def counted_raise(raise_data: Dict) -> bool:
+    """Whether a raise goes into the permanent stores: DefiLlama records only
+
+    A headline deal ("news:<feed>", processing/deals.py) is dated by its
+    article, so the DefiLlama record of the same round, arriving later under
+    its own date, would get a different raise_key and be counted twice.
+    """
+    return raise_data.get("source", "defillama") == "defillama"
+
+
+def raise_dimensions(raise_data: Dict) -> List[Tuple[str, str]]:
+    """(dimension, value) pairs a raise is counted under (DefiLlama's null fields count as empty)"""
+    pairs = [("all", "all"), ("sector", raise_sector(raise_data)), ("round", raise_data.get("round") or "Unknown")]
+    if raise_data.get("category"):
+        pairs.append(("category", raise_data["category"]))
+    pairs += [("chain", c) for c in raise_data.get("chains") or [] if c]
+    pairs += [("lead_investor", i.strip()) for i in raise_data.get("lead_investors") or [] if i and i.strip()]
+    return pairs
+
+
+def update_rollups(raises: List[Dict], db_path: str = ROLLUP_DB_PATH) -> int:
+    """Add raises not counted before to their daily buckets; returns how many were added"""
+    conn = connect(db_path)
+    try:
+        with conn:
+            fresh = []
+            for raise_data in raises:
+                day = (raise_data.get("date") or "")[:10]
+                if len(day) != 10 or not counted_raise(raise_data):
+                    continue
+                if conn.execute("INSERT OR IGNORE INTO seen_raises (key) VALUES (?)", (raise_key(raise_data),)).rowcount:
+                    fresh.append((day, raise_data))
+
+            # Accumulate in memory first so each touched bucket is read and written once
+            deltas: Dict[Tuple[str, str, str], List] = {}
+            for day, raise_data in fresh:
+                amount = float(raise_data.get("amount_raw") or 0)
+                for dim, value in raise_dimensions(raise_data):
+                    delta = deltas.setdefault((dim, value, day), [0, 0.0, np.zeros(SKETCH_BINS, dtype=np.uint32)])
+                    delta[0] += 1
+                    delta[1] += amount
+                    if amount > 0:
+                        delta[2][sketch_bin(amount)] += 1
+
+            for (dim, value, day), (count, total, sketch) in deltas.items():
+                row = conn.execute(
+                    "SELECT count, total, sketch FROM buckets WHERE dim = ? AND value = ? AND day = ?", (dim, value, day)
+                ).fetchone()
+                if row:
+                    count += row[0]
+                    total += row[1]
+                    sketch = sketch + np.frombuffer(row[2], dtype=np.uint32)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (day, dim, value, count, total, sketch) VALUES (?, ?, ?, ?, ?, ?)",
+                    (day, dim, value, count, total, sketch.astype(np.uint32).tobytes()),
+                )
+    finally:
+        conn.close()
+    return len(fresh)
+
+
+def _window(days: int, end: Optional[date]) -> Tuple[str, str]:
+    end = end or date.today()
+    return (end - timedelta(days=days - 1)).isoformat(), end.isoformat()
+
+
+def window_stats(dim: str, days: int = 30, end: Optional[date] = None, limit: int = 10,
+                 db_path: str = ROLLUP_DB_PATH) -> List[Dict]:
+    """Per-value count, total and amount percentiles over the last `days` days, largest totals first"""
+    start, stop = _window(days, end)
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT value, count, total, sketch FROM buckets WHERE dim = ? AND day BETWEEN ? AND ?", (dim, start, stop)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    merged: Dict[str, List] = {}
+    for value, count, total, sketch in rows:
+        entry = merged.setdefault(value, [0, 0.0, np.zeros(SKETCH_BINS, dtype=np.uint64)])
+        entry[0] += count
+        entry[1] += total
+        entry[2] += np.frombuffer(sketch, dtype=np.uint32)
+
+    stats = [
+        {"value": value, "count": count, "total": round(total, 2),
+         "p50": sketch_quantile(sketch, 0.5), "p90": sketch_quantile(sketch, 0.9)}
+        for value, (count, total, sketch) in merged.items()
+    ]
+    stats.sort(key=lambda s: (s["total"], s["count"]), reverse=True)
+    return stats[:limit]
+
+
+def weekly_series(dim: str = "all", value: str = "all", weeks: int = 12, end: Optional[date] = None,
+                  db_path: str = ROLLUP_DB_PATH) -> List[Dict]:
+    """Deal count and total per week (oldest first) for one dimension value"""
+    end = end or date.today()
+    start, stop = _window(weeks * 7, end)
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT day, count, total FROM buckets WHERE dim = ? AND value = ? AND day BETWEEN ? AND ?",
+            (dim, value, start, stop),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    series = [{"week": (end - timedelta(days=(weeks - i) * 7 - 1)).isoformat(), "count": 0, "total": 0.0}
+              for i in range(weeks)]
+    for day, count, total in rows:
+        i = weeks - 1 - (end - date.fromisoformat(day)).days // 7
+        series[i]["count"] += count
+        series[i]["total"] += total
+    return series
+
+
+def momentum(dim: str = "round", days: int = 7, end: Optional[date] = None, limit: int = 10,
+             db_path: str = ROLLUP_DB_PATH) -> List[Dict]:
+    """Deal counts in the last window vs the window before, biggest movers first"""
+    end = end or date.today()
+    current = {s["value"]: s["count"] for s in window_stats(dim, days, end, limit=10_000, db_path=db_path)}
+    previous = {s["value"]: s["count"] for s in
+                window_stats(dim, days, end - timedelta(days=days), limit=10_000, db_path=db_path)}
+    movers = [
+        {"value": v, "current": current.get(v, 0), "previous": previous.get(v, 0),
+         "change": current.get(v, 0) - previous.get(v, 0)}
+        for v in set(current) | set(previous)
+    ]
+    movers.sort(key=lambda m: (abs(m["change"]), m["current"]), reverse=True)
+    return movers[:limit]
+
+
+def funding_trends(db_path: str = ROLLUP_DB_PATH) -> Optional[Dict]:
+    """Everything the dashboard's trends card needs, or None if nothing is rolled up yet"""
+    if not os.path.exists(db_path):
+        return None
+    return {
+        "weekly_ai": weekly_series("sector", "ai", db_path=db_path),
+        "weekly_crypto": weekly_series("sector", "crypto", db_path=db_path),
+        "windows": {days: window_stats("all", days, db_path=db_path) for days in (7, 30, 90)},
+        "top_categories": window_stats("category", 30, limit=5, db_path=db_path),
+        "top_investors": window_stats("lead_investor", 30, limit=5, db_path=db_path),
+        "round_momentum": momentum("round", 7, limit=5, db_path=db_path),
+    }
+
+
+if __name__ == "__main__":
+    # Summary of the rolled-up history
+    for days in (7, 30, 90):
+        for s in window_stats("all", days):
+            print(f"Last {days}d: {s['count']} rounds, ${s['total']:,.0f}M total, median ${s['p50'] or 0:,.1f}M")
+    print("\nTop categories (30d):")
+    for s in window_stats("category", 30, limit=5):
+        print(f"  {s['value']:<20} {s['count']:>4} rounds  ${s['total']:,.0f}M")
+    print("\nRound momentum (7d vs prior 7d):")
+    for m in momentum("round", 7, limit=5):
+        print(f"  {m['value']:<20} {m['current']:>4} ({m['change']:+d})")
@@ -0,0 +1,144 @@
+"""
+Relevance scoring and per-section top-k ranking
+Item features are extracted once into NumPy arrays; scoring and top-k
+selection are then pure array operations, cheap enough to run per request.
+"""
+from datetime import datetime
+from typing import List, Dict, Optional
+import numpy as np
+import config
+
+CATEGORY_COLUMNS = ["funding", "regulatory", "crypto", "ai"]
+
+# Section name -> how membership is derived from the feature arrays
+SECTIONS = ["raises", "funding", "regulatory", "crypto", "ai"]
+
+# Weights the score divides by; zero or negative values are rejected
+DIVISOR_WEIGHTS = ("half_life_hours",)
+
+
+def _timestamp(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None).timestamp()
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+class ItemFeatures:
+    """Column arrays describing a batch of articles, tweets and raises"""
+
+    def __init__(self, articles: List[Dict], raises: List[Dict]):
+        self.items = list(articles) + list(raises)
+        n_articles = len(articles)
+        n = len(self.items)
+
+        self.is_raise = np.zeros(n, dtype=bool)
+        self.is_raise[n_articles:] = True
+
+        sources = [a.get("source", "") for a in articles] + ["defillama"] * len(raises)
+        self.source_weight = np.array([config.SOURCE_WEIGHTS.get(s, 1.0) for s in sources], dtype=np.float64)
+
+        self.categories = np.zeros((n, len(CATEGORY_COLUMNS)), dtype=np.float64)
+        for i, a in enumerate(articles):
+            cats = a.get("categories", [])
+            self.categories[i] = [bool(a.get("is_funding")), bool(a.get("is_regulatory")),
+                                  "crypto" in cats, "ai" in cats]
+        self.categories[n_articles:, 0] = 1.0  # every raise is funding news
+
+        self.coverage = np.array(
+            [1 if a.get("round") else 0 for a in articles] + [r.get("coverage_count", 0) for r in raises],
+            dtype=np.float64,
+        )
+        self.amount = np.array([0.0] * n_articles + [float(r.get("amount_raw") or 0) for r in raises])
+        self.timestamp = np.array(
+            [_timestamp(a.get("published", "")) for a in articles] + [_timestamp(r.get("date", "")) for r in raises]
+        )
+
+        # Tweet engagement relative to the posting account's average in this batch
+        engagement = np.array([float(a.get("engagement", 0)) for a in articles] + [0.0] * len(raises))
+        account_ids: Dict[str, int] = {}
+        accounts = np.array([account_ids.setdefault(s, len(account_ids)) for s in sources], dtype=np.int64)
+        totals = np.bincount(accounts, weights=engagement, minlength=len(account_ids))
+        counts = np.bincount(accounts, minlength=len(account_ids))
+        means = np.divide(totals, counts, out=np.zeros(len(totals)), where=totals > 0)
+        account_mean = means[accounts]
+        self.engagement = np.log1p(np.divide(engagement, account_mean, out=np.zeros_like(engagement),
+                                             where=account_mean > 0))
+
+    def __len__(self):
+        return len(self.items)
+
+    def section_mask(self, section: str) -> np.ndarray:
+        if section == "raises":
+            return self.is_raise
+        return ~self.is_raise & (self.categories[:, CATEGORY_COLUMNS.index(section)] > 0)
+
+
+def score_items(features: ItemFeatures, weights: Optional[Dict] = None, now: Optional[float] = None) -> np.ndarray:
+    """Relevance score per item; raises ValueError for a divisor weight that is not positive"""
+    w = {**config.SCORING_WEIGHTS, **(weights or {})}
+    for name in DIVISOR_WEIGHTS:
+        if not w[name] > 0:
+            raise ValueError(f"{name} must be positive")
+    category_weights = np.array([w["categories"].get(c, 0.0) for c in CATEGORY_COLUMNS])
+    now = datetime.now().timestamp() if now is None else now
+
+    base = (
+        w["source"] * features.source_weight
+        + features.categories @ category_weights
+        + w["coverage"] * np.log1p(features.coverage)
+        + w["engagement"] * features.engagement
+        + w["amount"] * np.log1p(features.amount)
+    )
+    age_hours = np.clip((now - features.timestamp) / 3600.0, 0.0, None)
+    decay = np.exp2(-age_hours / w["half_life_hours"])
+    return base * decay
+
+
+def top_k(scores: np.ndarray, mask: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest-scoring items within mask, best first"""
+    candidates = np.flatnonzero(mask)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def rank_sections(articles: List[Dict], raises: List[Dict], k: int = 15, weights: Optional[Dict] = None,
+                  features: Optional[ItemFeatures] = None) -> Dict[str, List[Dict]]:
+    """Top-k items for every dashboard section"""
+    features = features or ItemFeatures(articles, raises)
+    scores = score_items(features, weights)
+    return {
+        section: [features.items[i] for i in top_k(scores, features.section_mask(section), k)]
+        for section in SECTIONS
+    }
+
+
+if __name__ == "__main__":
+    # Benchmark run: score and rank synthetic candidates
+    import sys
+    import time
+    import random
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sources = list(config.SOURCE_WEIGHTS) + [f"@account{i}" for i in range(50)]
+    articles = [{
+        "title": f"Item {i}", "source": random.choice(sources), "published": f"2026-10-{random.randint(1, 19):02d}T12:00:00",
+        "categories": random.sample(["crypto", "ai", "funding", "regulatory"], 2), "is_funding": random.random() < 0.3,
+        "is_regulatory": random.random() < 0.2, "engagement": random.randint(0, 5000), "round": random.random() < 0.05,
+    } for i in range(n)]
+    raises = [{"project": f"P{i}", "amount_raw": random.randint(0, 200), "date": "2026-10-15T00:00:00",
+               "coverage_count": random.randint(0, 5)} for i in range(n // 50)]
+
+    start = time.perf_counter()
+    features = ItemFeatures(articles, raises)
+    extract_ms = (time.perf_counter() - start) * 1000
+
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        rank_sections(articles, raises, k=15, features=features)
+    rank_ms = (time.perf_counter() - start) * 1000 / runs
+
+    print(f"{len(features)} items: feature extraction {extract_ms:.0f}ms (once), "
+          f"score + top-15 for {len(SECTIONS)} sections {rank_ms:.1f}ms")
@@ -0,0 +1,330 @@
+"""
+Streaming trending-topics detection over everything collected
+Each ingested article or tweet adds its terms (words, two-word phrases,
+$cashtags and @handles, counted once per item) to a daily bucket. A bucket
+holds a count-min sketch of every term plus a Space-Saving heavy-hitters
+summary of the most frequent ones. Memory per day is fixed, and days past the
+baseline window are dropped. Trending terms are the current window's heavy
+hitters whose counts burst above what the baseline window's sketches predict
+for the same number of items. No history is rescanned.
+
+    python -m processing.trending             # current trending terms
+    python -m processing.trending --bench     # synthetic stream benchmark
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+TRENDING_DB_PATH = os.getenv("TRENDING_DB_PATH", os.path.join("data", "trending.db"))
+
+# Count-min sketch per day (128KB): overcount per row averages 1/8192 of the day's term mentions
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 8192
+# Terms tracked exactly (up to the Space-Saving error bound) per day
+HEAVY_HITTERS = 300
+# MinHash values kept per tracked term over the items mentioning it; terms agreeing
+# on at least SAME_STORY of them come from mostly the same items and are one trend
+SIGNATURE_SIZE = 4
+SAME_STORY = 2
+
+CURRENT_DAYS = 2           # today and yesterday, so a trend does not vanish at midnight
+BASELINE_DAYS = 14         # the days before that
+MIN_BASELINE_DAYS = 3      # less history than this and nothing is reported
+MIN_COUNT = 3              # items mentioning a term in the current window
+MIN_LIFT = 2.0             # current vs expected count
+
+TOKEN_RE = re.compile(r"[$@]?[A-Za-z][A-Za-z0-9]*(?:[-.'][A-Za-z0-9]+)*")
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each few for from further had has have having he her here
+    hers him his how i if in into is it its itself just me more most my no nor not now of off on once only or other
+    our ours out over own same she should so some such than that the their them then there these they this those
+    through to too under until up very was we were what when where which while who whom why will with would you
+    your yours via amid per vs yet
+    new says said say year years week weeks today day days now first last next one two three million billion
+    company companies report reports according announced announces launch launches update latest get gets make
+    makes made could may might back time read more post appeared continue full story news http https www com html
+    monday tuesday wednesday thursday friday saturday sunday january february march april may june july august
+    september october november december
+""".split())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    day TEXT PRIMARY KEY,
+    items INTEGER NOT NULL,
+    sketch BLOB NOT NULL,
+    heavy TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_day ON seen(day);
+"""
+
+
+def connect(db_path: str = TRENDING_DB_PATH) -> sqlite3.Connection:
+    """Open the trending database, creating the schema on first use"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def item_terms(text: str) -> Dict[str, str]:
+    """Normalized term -> display label for the words, bigrams, cashtags and handles in text"""
+    terms: Dict[str, str] = {}
+    previous = None
+    for token in TOKEN_RE.findall(text):
+        word = token.lower().strip(".'")
+        if token[0] in "$@":
+            terms.setdefault(word, token)
+            previous = None
+            continue
+        if word in STOPWORDS or len(word) < 3:
+            previous = None
+            continue
+        terms.setdefault(word, token)
+        if previous is not None:
+            terms.setdefault(f"{previous[0]} {word}", f"{previous[1]} {token}")
+        previous = (word, token)
+    return terms
+
+
+def _hash_rows(terms: List[str]) -> np.ndarray:
+    """Sketch column per (row, term): double hashing from one 64-bit digest per term"""
+    digests = np.array([int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "little")
+                        for t in terms], dtype=np.uint64)
+    h1, h2 = digests & np.uint64(0xFFFFFFFF), (digests >> np.uint64(32)) | np.uint64(1)
+    rows = np.arange(SKETCH_DEPTH, dtype=np.uint64)[:, None]
+    return ((h1[None, :] + rows * h2[None, :]) % np.uint64(SKETCH_WIDTH)).astype(np.int64)
+
+
+def sketch_estimate(sketch: np.ndarray, terms: List[str]) -> np.ndarray:
+    """Count-min estimates (never below the true count) for terms"""
+    if not terms:
+        return np.zeros(0, dtype=np.int64)
+    cols = _hash_rows(terms)
+    return sketch[np.arange(SKETCH_DEPTH)[:, None], cols].min(axis=0).astype(np.int64)
+
+
+def item_signature(key: str) -> List[int]:
+    """SIGNATURE_SIZE independent 32-bit hashes of an item key"""
+    digest = hashlib.blake2b(key.encode(), digest_size=4 * SIGNATURE_SIZE).digest()
+    return [int.from_bytes(digest[i:i + 4], "little") for i in range(0, len(digest), 4)]
+
+
+def _min_signature(a: List[int], b: List[int]) -> List[int]:
+    return list(map(min, a, b))
+
+
+def merge_heavy(heavy: Dict[str, List], counts: Dict[str, int], labels: Dict[str, str],
+                signatures: Dict[str, List[int]], capacity: int = HEAVY_HITTERS) -> Dict[str, List]:
+    """Space-Saving merge: term -> [count, error, label, MinHash signature], keeping the capacity largest counts
+
+    A term not yet monitored by a full summary may have been evicted before,
+    so it enters at the smallest monitored count, which is also its error bound.
+    """
+    floor = min(entry[0] for entry in heavy.values()) if len(heavy) >= capacity else 0
+    merged = {term: list(entry) for term, entry in heavy.items()}
+    for term, count in counts.items():
+        if term in merged:
+            merged[term][0] += count
+            merged[term][3] = _min_signature(merged[term][3], signatures[term])
+        else:
+            merged[term] = [floor + count, floor, labels[term], signatures[term]]
+    if len(merged) > capacity:
+        merged = dict(sorted(merged.items(), key=lambda kv: -kv[1][0])[:capacity])
+    return merged
+
+
+def _item_key(item: Dict) -> str:
+    return item.get("url_key") or item.get("link") or item.get("title", "")
+
+
+def update_trending(articles: List[Dict], today: Optional[date] = None, db_path: str = TRENDING_DB_PATH) -> int:
+    """Add items not counted before to their day's bucket and drop expired days; returns items added"""
+    today = today or date.today()
+    oldest = (today - timedelta(days=CURRENT_DAYS + BASELINE_DAYS - 1)).isoformat()
+    conn = connect(db_path)
+    added = 0
+    try:
+        with conn:
+            # Per day: items added, term -> items mentioning it, first label seen, MinHash over those items
+            days: Dict[str, Tuple[List[int], Dict[str, int], Dict[str, str], Dict[str, List[int]]]] = {}
+            for item in articles:
+                day = (item.get("published") or "")[:10] or today.isoformat()
+                if len(day) != 10 or not oldest <= day <= today.isoformat():
+                    continue
+                key = _item_key(item)
+                if not conn.execute("INSERT OR IGNORE INTO seen (key, day) VALUES (?, ?)", (key, day)).rowcount:
+                    continue
+                added += 1
+                signature = item_signature(key)
+                entry = days.setdefault(day, ([0], {}, {}, {}))
+                entry[0][0] += 1
+                for term, label in item_terms(f"{item.get('title', '')} {item.get('summary', '')}").items():
+                    entry[1][term] = entry[1].get(term, 0) + 1
+                    entry[2].setdefault(term, label)
+                    known = entry[3].get(term)
+                    entry[3][term] = _min_signature(known, signature) if known else signature
+
+            for day, (items, counts, labels, signatures) in days.items():
+                row = conn.execute("SELECT items, sketch, heavy FROM buckets WHERE day = ?", (day,)).fetchone()
+                if row:
+                    sketch = np.frombuffer(row[1], dtype=np.uint32).reshape(SKETCH_DEPTH, SKETCH_WIDTH).copy()
+                    heavy, total = json.loads(row[2]), row[0]
+                else:
+                    sketch, heavy, total = np.zeros((SKETCH_DEPTH, SKETCH_WIDTH), dtype=np.uint32), {}, 0
+                terms = list(counts)
+                if terms:
+                    cols = _hash_rows(terms)
+                    values = np.array([counts[t] for t in terms], dtype=np.uint32)
+                    for r in range(SKETCH_DEPTH):
+                        np.add.at(sketch[r], cols[r], values)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (day, items, sketch, heavy) VALUES (?, ?, ?, ?)",
+                    (day, total + items[0], sketch.tobytes(), json.dumps(merge_heavy(heavy, counts, labels, signatures))),
+                )
+
+            conn.execute("DELETE FROM buckets WHERE day < ?", (oldest,))
+            conn.execute("DELETE FROM seen WHERE day < ?", (oldest,))
+    finally:
+        conn.close()
+    return added
+
+
+def trending_topics(limit: int = 10, today: Optional[date] = None, db_path: str = TRENDING_DB_PATH) -> List[Dict]:
+    """Terms bursting in the last CURRENT_DAYS days vs the BASELINE_DAYS before, strongest first
+
+    Each result has the term, the items mentioning it in the current window,
+    the count the baseline predicts for as many items, the lift between them,
+    a Poisson-style burst score and up to 3 related terms from the same story.
+    """
+    if not os.path.exists(db_path):
+        return []
+    today = today or date.today()
+    split = (today - timedelta(days=CURRENT_DAYS - 1)).isoformat()
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT day, items, sketch, heavy FROM buckets WHERE day <= ?",
+                            (today.isoformat(),)).fetchall()
+    finally:
+        conn.close()
+
+    current_items = baseline_items = baseline_days = 0
+    current = np.zeros((SKETCH_DEPTH, SKETCH_WIDTH), dtype=np.uint64)
+    baseline = np.zeros((SKETCH_DEPTH, SKETCH_WIDTH), dtype=np.uint64)
+    candidates: Dict[str, List] = {}
+    for day, items, sketch, heavy in rows:
+        sketch = np.frombuffer(sketch, dtype=np.uint32).reshape(SKETCH_DEPTH, SKETCH_WIDTH)
+        if day >= split:
+            current += sketch
+            current_items += items
+            for term, entry in json.loads(heavy).items():
+                if term in candidates:
+                    candidates[term][3] = _min_signature(candidates[term][3], entry[3])
+                else:
+                    candidates[term] = entry
+        else:
+            baseline += sketch
+            baseline_items += items
+            baseline_days += 1
+    if baseline_days < MIN_BASELINE_DAYS or not current_items or not candidates:
+        return []
+
+    terms = list(candidates)
+    counts = sketch_estimate(current, terms)
+    expected = sketch_estimate(baseline, terms) * (current_items / baseline_items)
+    lift = (counts + 1) / (expected + 1)
+    score = (counts - expected) / np.sqrt(expected + 1)
+    # Ties go to phrases, then to names (capitalized labels, cashtags, handles)
+    is_phrase = np.array([" " in t for t in terms])
+    is_name = np.array([candidates[t][2] != t for t in terms])
+    order = np.lexsort((~is_name, ~is_phrase, -score))
+
+    passing = (counts >= MIN_COUNT) & (lift >= MIN_LIFT)
+    # A word mostly seen inside a bursting phrase is reported as the phrase
+    phrase_counts: Dict[str, int] = {}
+    for i in np.flatnonzero(passing):
+        if " " in terms[i]:
+            for word in terms[i].split(" "):
+                phrase_counts[word] = max(phrase_counts.get(word, 0), int(counts[i]))
+
+    results: List[Dict] = []
+    stories: List[Tuple[List[int], set]] = []    # per result: signature, words of every term folded in
+    for i in order:
+        if not passing[i] or phrase_counts.get(terms[i], 0) >= 0.8 * counts[i]:
+            continue
+        # Mostly the same items as a listed trend, or sharing a word with a much bigger one
+        # (e.g. "partners Hyperliquid"): the same story
+        words, signature = set(terms[i].split(" ")), candidates[terms[i]][3]
+        story = next((n for n, (listed, story_words) in enumerate(stories)
+                      if sum(x == y for x, y in zip(signature, listed)) >= SAME_STORY
+                      or words & story_words and counts[i] < 0.5 * results[n]["count"]), None)
+        if story is not None:
+            if len(results[story]["related"]) < 3 and not words & stories[story][1]:
+                results[story]["related"].append(candidates[terms[i]][2])
+            stories[story][1].update(words)
+            continue
+        if len(results) == limit:
+            break
+        results.append({"key": terms[i], "term": candidates[terms[i]][2], "count": int(counts[i]),
+                        "expected": round(float(expected[i]), 1), "lift": round(float(lift[i]), 1),
+                        "score": round(float(score[i]), 2), "related": []})
+        stories.append((signature, words))
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if "--bench" not in sys.argv:
+        for t in trending_topics(20):
+            print(f"  {t['term']:<32} {t['count']:>4} items  (expected {t['expected']:.1f}, {t['lift']:.1f}x)  "
+                  f"{', '.join(t['related'])}")
+        sys.exit(0)
+
+    import random
+    import tempfile
+
+    random.seed(3)
+    vocabulary = [f"topic{i}" for i in range(20_000)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    start = date(2026, 10, 1)
+
+    def make_items(day: date, count: int, burst: bool) -> List[Dict]:
+        items = []
+        for i in range(count):
+            words = random.choices(vocabulary, weights, k=25)
+            if burst and i % 5 == 0:
+                words += ["Hyperliquid", "HIP-3", "$HYPE"]
+            items.append({"title": " ".join(words[:10]), "summary": " ".join(words[10:]),
+                          "link": f"https://example.com/{day}/{i}", "published": f"{day.isoformat()}T12:00:00"})
+        return items
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "trending.db")
+        total = elapsed = 0.0
+        for offset in range(30):
+            day = start + timedelta(days=offset)
+            items = make_items(day, 2000, burst=offset == 29)
+            t = time.perf_counter()
+            update_trending(items, today=day, db_path=db_path)
+            elapsed += time.perf_counter() - t
+            total += len(items)
+        print(f"Ingested {total:,.0f} items over 30 days in {elapsed:.1f}s ({total / elapsed:,.0f} items/s), "
+              f"database {os.path.getsize(db_path) / 1e6:.1f}MB")
+        t = time.perf_counter()
+        trends = trending_topics(5, today=day, db_path=db_path)
+        print(f"Trending computed in {(time.perf_counter() - t) * 1000:.0f}ms:")
+        for trend in trends:
+            print(f"  {trend['term']:<20} {trend['count']:>5} items  (expected {trend['expected']:.1f}, "
+                  f"{trend['lift']:.1f}x)  related: {', '.join(trend['related'])}")
@@ -0,0 +1,247 @@
+"""
+URL canonicalization and redirect resolution
+Every item gets a "url_key": its link with tracking parameters stripped,
+host variants folded (www., m., twitter.com -> x.com) and feed-proxy or
+shortener redirects followed to the final article. Redirects are resolved
+with pooled HEAD requests and remembered in a persistent TTL cache, so each
+distinct URL is resolved once.
+"""
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Iterable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+
+import deadline
+
+URL_CACHE_PATH = os.getenv("URL_CACHE_PATH", os.path.join("data", "urls.db"))
+RESOLVED_TTL = timedelta(days=int(os.getenv("URL_CACHE_TTL_DAYS", "90")))
+# Failed resolutions are retried sooner
+FAILED_TTL = timedelta(days=1)
+RESOLVE_WORKERS = 8
+RESOLVE_TIMEOUT = 5
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "mkt_tok", "ncid", "cmpid", "sr_share", "smid", "spm", "guccounter", "guce_referrer",
+    "guce_referrer_sig", "__twitter_impression",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+# Parameters that are only tracking on particular hosts (elsewhere ?s= or ?t= can matter)
+HOST_TRACKING_PARAMS = {
+    "x.com": {"s", "t", "ref_src", "ref_url"},
+    "youtube.com": {"feature", "si"},
+    "medium.com": {"source"},
+}
+
+HOST_ALIASES = {
+    "twitter.com": "x.com",
+    "mobile.twitter.com": "x.com",
+    "mobile.x.com": "x.com",
+    "youtu.be": "youtube.com",
+}
+HOST_PREFIXES = ("www.", "m.", "amp.")
+
+# Hosts whose links are redirects to the real article
+REDIRECT_HOSTS = {
+    "feedproxy.google.com", "feeds.feedburner.com", "feedburner.com", "t.co", "bit.ly", "buff.ly", "ow.ly",
+    "dlvr.it", "trib.al", "lnkd.in", "tinyurl.com", "rss.app", "news.google.com", "zpr.io", "hubs.ly",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolved (
+    url TEXT PRIMARY KEY,
+    target TEXT,
+    resolved_at TEXT NOT NULL
+);
+"""
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalized form of a URL, without any network access"""
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+    host = HOST_ALIASES.get(host, host)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    host_params = HOST_TRACKING_PARAMS.get(host, set())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and k.lower() not in host_params
+        and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def needs_resolution(url: str) -> bool:
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return False
+    return host in REDIRECT_HOSTS or host.startswith("feeds.")
+
+
+def connect(db_path: str = URL_CACHE_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def cached_targets(urls: Iterable[str], db_path: str = URL_CACHE_PATH) -> Dict[str, Optional[str]]:
+    """Cache entries still within their TTL (target None = resolution failed recently)"""
+    urls = list(urls)
+    if not urls or not os.path.exists(db_path):
+        return {}
+    now = datetime.now()
+    found = {}
+    conn = connect(db_path)
+    try:
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for url, target, resolved_at in conn.execute(
+                f"SELECT url, target, resolved_at FROM resolved WHERE url IN ({placeholders})", chunk
+            ):
+                ttl = RESOLVED_TTL if target else FAILED_TTL
+                if now - datetime.fromisoformat(resolved_at) < ttl:
+                    found[url] = target
+    finally:
+        conn.close()
+    return found
+
+
+def _session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=RESOLVE_WORKERS, pool_maxsize=RESOLVE_WORKERS, max_retries=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "FrontierTechNews/1.0 (+link canonicalization)"
+    return session
+
+
+def _follow(session: requests.Session, url: str, budget: deadline.Deadline) -> Optional[str]:
+    """Final URL of a redirect chain; HEAD first, GET for servers that refuse HEAD"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=budget.timeout(RESOLVE_TIMEOUT))
+        if response.status_code in (403, 405, 501):
+            response = session.get(url, allow_redirects=True, timeout=budget.timeout(RESOLVE_TIMEOUT), stream=True)
+            response.close()
+        return response.url if response.status_code < 400 else None
+    except requests.RequestException:
+        return None
+
+
+def resolve_urls(urls: Iterable[str], db_path: str = URL_CACHE_PATH) -> Dict[str, str]:
+    """Final destination for each redirecting URL (others map to themselves)"""
+    urls = set(urls)
+    pending = {u for u in urls if needs_resolution(u)}
+    resolved = {u: u for u in urls - pending}
+
+    cached = cached_targets(pending, db_path)
+    for url, target in cached.items():
+        resolved[url] = target or url
+    pending -= set(cached)
+
+    # Past the run deadline, uncached redirects keep their original link
+    budget = deadline.current()
+    if pending and not budget.expired():
+        session = _session()
+        # Pool threads do not see this thread's run, so its deadline is handed over
+        with ThreadPoolExecutor(max_workers=RESOLVE_WORKERS) as pool:
+            results = dict(zip(pending, pool.map(lambda u: _follow(session, u, budget), pending)))
+        # Failures caused by a deadline-shortened timeout are not remembered
+        cut_short = budget.expired()
+        now = datetime.now().isoformat()
+        conn = connect(db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO resolved (url, target, resolved_at) VALUES (?, ?, ?)",
+                    [(url, target, now) for url, target in results.items() if target or not cut_short],
+                )
+        finally:
+            conn.close()
+        for url, target in results.items():
+            resolved[url] = target or url
+    return resolved
+
+
+def url_keys(urls: Iterable[str], db_path: str = URL_CACHE_PATH) -> Dict[str, str]:
+    """Canonical key for each stored URL, using only cached resolutions (no network), in one cache lookup"""
+    urls = set(urls)
+    cached = cached_targets([u for u in urls if needs_resolution(u)], db_path)
+    return {url: canonicalize_url(cached.get(url) or url) for url in urls}
+
+
+def url_key(url: str, db_path: str = URL_CACHE_PATH) -> str:
+    """Canonical key for one stored URL (see url_keys)"""
+    return url_keys([url], db_path)[url]
+
+
+def canonicalize_items(articles: List[Dict], raises: List[Dict], resolve: bool = True,
+                       db_path: str = URL_CACHE_PATH) -> Dict[str, int]:
+    """Give every item a url_key and fold duplicate articles into their first occurrence
+
+    Duplicates (the same story in two feeds, or behind two redirects) merge
+    their categories and flags into the kept article, which takes a main
+    feed's source over a profile-only extra feed's. articles is updated in
+    place. Returns counts of resolved redirects and removed duplicates.
+    """
+    links = [item.get("link", "") for item in articles + raises if item.get("link")]
+    targets = resolve_urls(links, db_path) if resolve else {}
+    for item in articles + raises:
+        link = item.get("link", "")
+        item["url_key"] = canonicalize_url(targets.get(link, link)) if link else ""
+
+    kept: Dict[str, Dict] = {}
+    unique = []
+    for article in articles:
+        key = article["url_key"]
+        first = kept.get(key) if key else None
+        if first is None:
+            if key:
+                kept[key] = article
+            unique.append(article)
+            continue
+        first["categories"] = first.get("categories", []) + [
+            c for c in article.get("categories", []) if c not in first.get("categories", [])
+        ]
+        first["is_funding"] = first.get("is_funding") or article.get("is_funding")
+        first["is_regulatory"] = first.get("is_regulatory") or article.get("is_regulatory")
+        # A story a main feed also carries is not hidden behind a profile-only extra feed
+        if first.get("origin") == "extra" and article.get("origin") != "extra":
+            first["source"], first["origin"] = article["source"], article.get("origin", "main")
+
+    removed = len(articles) - len(unique)
+    articles[:] = unique
+    return {"resolved": sum(1 for link in links if targets.get(link, link) != link), "duplicates": removed}
+
+
+if __name__ == "__main__":
+    # Canonicalize sample links
+    samples = [
+        "https://www.theblock.co/post/1234/foo-raises?utm_source=rss&utm_medium=rss",
+        "https://mobile.twitter.com/tier10k/status/1850000000000000000?s=20&t=abc",
+        "http://x.com/tier10k/status/1850000000000000000/",
+        "https://techcrunch.com/2026/10/19/foo/?guccounter=1#comments",
+    ]
+    for url in samples:
+        print(f"{url}\n  -> {canonicalize_url(url)}")
@@ -0,0 +1,416 @@
+"""
+Per-source scheduler for the web app
+Each collector and output is its own job (config.SCHEDULE). Collectors run
+on fixed cadences and store their latest items here. When they change, the
+collector job also prepares the combined items (canonical links, deals,
+linking) and indexes them, once. Outputs either follow the collectors,
+delivering the prepared items once any of them brings in changed items, or
+run at a wall-clock time.
+
+Interval and daily jobs run on a fixed grid of slots, so a slow run never
+pushes the next one back. Each slot is delayed by a jitter derived from the
+job and slot, so every process computes the same time. Slots are claimed in
+SQLite, so with several gunicorn workers each slot runs only once. A slot
+missed while the app was down is run late or skipped, per the job's
+catch-up policy.
+
+    python -m scheduler    # upcoming jobs
+"""
+import os
+import json
+import zlib
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import config
+import deadline
+from deadline import parse_duration
+
+SCHEDULER_DB_PATH = os.getenv("SCHEDULER_DB_PATH", os.path.join("data", "scheduler.db"))
+# Longest sleep between checks, so clock changes and new items are noticed
+TICK = timedelta(seconds=30)
+HOURS_BACK = 24
+RAISES_DAYS = 7
+COLLECTORS = ("rss", "defillama", "twitter")
+# Jobs that only run when their credentials are set
+REQUIRES = {"twitter": "TWITTER_BEARER_TOKEN", "sheets": "SPREADSHEET_ID", "email": "EMAIL_SENDER"}
+# Interval slots count from here, so cadences that do not divide a day stay evenly spaced
+GRID_ANCHOR = datetime(2024, 1, 1)
+# Tweets read per account per pass (fetch_user_tweets' max_results)
+TWEETS_PER_ACCOUNT = 10
+MIN_TWITTER_INTERVAL = timedelta(minutes=15)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    last_slot TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    status TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS collected (
+    source TEXT PRIMARY KEY,
+    collected_at TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prepared (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    sources TEXT NOT NULL,
+    built_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def connect(db_path: str = SCHEDULER_DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def twitter_interval(budget: int) -> timedelta:
+    """Cadence that spends a monthly read budget evenly across the tracked accounts"""
+    from collectors.twitter_collector import TWITTER_ACCOUNTS
+    passes = budget / (len(TWITTER_ACCOUNTS) * TWEETS_PER_ACCOUNT)
+    seconds = round(timedelta(days=30).total_seconds() / max(passes, 1))
+    return max(MIN_TWITTER_INTERVAL, timedelta(seconds=seconds))
+
+
+def enabled_jobs() -> Dict[str, Dict]:
+    """config.SCHEDULE minus jobs whose credentials are not configured"""
+    return {
+        name: spec for name, spec in config.SCHEDULE.items()
+        if name not in REQUIRES or os.getenv(REQUIRES[name])
+    }
+
+
+def _grid(spec: Dict, now: datetime) -> Tuple[timedelta, datetime]:
+    """(period, anchor) of an interval or daily job's slots"""
+    if "at" in spec:
+        hour, minute = (int(part) for part in spec["at"].split(":"))
+        return timedelta(days=1), now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if "budget" in spec:
+        return twitter_interval(spec["budget"]), GRID_ANCHOR
+    return timedelta(seconds=parse_duration(spec["every"])), GRID_ANCHOR
+
+
+def _jitter(name: str, slot: datetime, spec: Dict, period: timedelta) -> timedelta:
+    """Delay for one slot, the same in every process"""
+    fraction = spec.get("jitter", 0)
+    if not fraction:
+        return timedelta(0)
+    rng = random.Random(f"{name}:{slot.isoformat()}")
+    return timedelta(seconds=rng.uniform(0, fraction * period.total_seconds()))
+
+
+def next_run(name: str, spec: Dict, state: Optional[sqlite3.Row], now: datetime,
+             changes: Dict[str, str]) -> Optional[Tuple[str, datetime]]:
+    """(slot key, time to run) of a job's next run; None for a follower with nothing new
+
+    changes maps each collector to when its stored items last changed.
+    """
+    last = state["last_slot"] if state else None
+    if "after" in spec:
+        # The slot is the newest upstream change, so each change triggers one run
+        trigger = max((changes[s] for s in spec["after"] if s in changes), default=None)
+        if trigger is None or (last and trigger <= last):
+            return None
+        debounce = timedelta(seconds=parse_duration(spec.get("debounce", "0s")))
+        return trigger, datetime.fromisoformat(trigger) + debounce
+
+    period, anchor = _grid(spec, now)
+    current = anchor + ((now - anchor) // period) * period
+    if last and datetime.fromisoformat(last) >= current:
+        slot = current + period
+    else:
+        run_at = current + _jitter(name, current, spec, period)
+        late = now - run_at
+        grace = timedelta(seconds=parse_duration(spec["grace"])) if "grace" in spec else period
+        # A wall-clock job that has never run (fresh deploy) waits for its next time
+        policy = spec.get("catch_up", "once") if state or "at" not in spec else "skip"
+        on_time = late <= TICK
+        slot = current if on_time or (policy == "once" and late <= grace) else current + period
+    return slot.isoformat(), slot + _jitter(name, slot, spec, period)
+
+
+def claim(conn: sqlite3.Connection, name: str, slot: str) -> bool:
+    """Atomically take a slot, so only one process runs it"""
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO jobs (name) VALUES (?)", (name,))
+        cursor = conn.execute(
+            "UPDATE jobs SET last_slot = ?, started_at = ?, status = 'running', error = NULL "
+            "WHERE name = ? AND (last_slot IS NULL OR last_slot < ?)",
+            (slot, datetime.now().isoformat(), name, slot),
+        )
+    return cursor.rowcount == 1
+
+
+def claim_periodic(name: str, period: timedelta, db_path: str = SCHEDULER_DB_PATH) -> Tuple[bool, float]:
+    """Take the current slot of a fixed-period background task (e.g. WebSub renewals)
+
+    Returns whether this process got the slot (only one gunicorn worker
+    does) and the seconds until the next slot starts.
+    """
+    now = datetime.now()
+    slot = GRID_ANCHOR + ((now - GRID_ANCHOR) // period) * period
+    conn = connect(db_path)
+    try:
+        claimed = claim(conn, name, slot.isoformat())
+    finally:
+        conn.close()
+    return claimed, (slot + period - now).total_seconds()
+
+
+def _changes(conn: sqlite3.Connection) -> Dict[str, str]:
+    return {row["source"]: row["changed_at"] for row in conn.execute("SELECT source, changed_at FROM collected")}
+
+
+def upcoming(db_path: str = SCHEDULER_DB_PATH) -> List[Dict]:
+    """Every enabled job's next run and last outcome, soonest first"""
+    now = datetime.now()
+    conn = connect(db_path)
+    try:
+        states = {row["name"]: row for row in conn.execute("SELECT * FROM jobs")}
+        changes = _changes(conn)
+    finally:
+        conn.close()
+
+    plan = []
+    for name, spec in enabled_jobs().items():
+        state = states.get(name)
+        planned = next_run(name, spec, state, now, changes)
+        plan.append({
+            "job": name,
+            "next_run": planned[1].isoformat(timespec="seconds") if planned else None,
+            "slot": planned[0] if planned else None,
+            "cadence": describe(spec),
+            "last_started": state["started_at"] if state else None,
+            "last_finished": state["finished_at"] if state else None,
+            "status": state["status"] if state else None,
+            "error": state["error"] if state else None,
+        })
+    plan.sort(key=lambda job: job["next_run"] or "~")
+    return plan
+
+
+def describe(spec: Dict) -> str:
+    if "after" in spec:
+        return f"after {', '.join(spec['after'])} change (+{spec.get('debounce', '0s')})"
+    if "at" in spec:
+        return f"daily at {spec['at']}"
+    if "budget" in spec:
+        minutes = twitter_interval(spec["budget"]).total_seconds() / 60
+        return f"every {minutes:.0f}m ({spec['budget']} reads/month)"
+    return f"every {spec['every']}"
+
+
+def store_items(source: str, items: List[Dict], db_path: str = SCHEDULER_DB_PATH) -> bool:
+    """Save a collector's latest items; True if they differ from what was stored
+
+    An empty result (source down, or nothing in the window) keeps the previous
+    items rather than blanking the outputs.
+    """
+    from outputs.outbox import content_hash
+    digest = content_hash(items, [], {})
+    now = datetime.now().isoformat()
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT digest FROM collected WHERE source = ?", (source,)).fetchone()
+        changed = row is None or (items and row["digest"] != digest)
+        with conn:
+            if changed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO collected (source, collected_at, changed_at, digest, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (source, now, now, digest, zlib.compress(json.dumps(items).encode())),
+                )
+            elif items:
+                conn.execute("UPDATE collected SET collected_at = ? WHERE source = ?", (now, source))
+    finally:
+        conn.close()
+    return bool(changed)
+
+
+def add_items(source: str, items: List[Dict], db_path: str = SCHEDULER_DB_PATH) -> bool:
+    """Merge items that arrived between collector runs (WebSub pushes) into a source's stored items
+
+    Returns True if any were new, which marks the source changed so the
+    outputs following it rebuild without waiting for the next poll.
+    """
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT data FROM collected WHERE source = ?", (source,)).fetchone()
+    finally:
+        conn.close()
+    stored = json.loads(zlib.decompress(row["data"])) if row else []
+    links = {item.get("link") for item in stored}
+    new = [item for item in items if item.get("link") not in links]
+    if not new:
+        return False
+    merged = sorted(stored + new, key=lambda item: item.get("published", ""), reverse=True)
+    return store_items(source, merged, db_path)
+
+
+def load_items(db_path: str = SCHEDULER_DB_PATH) -> Tuple[List[Dict], List[Dict]]:
+    """(articles incl. tweets, raises) from the collectors' latest stored items"""
+    conn = connect(db_path)
+    try:
+        stored = {
+            row["source"]: json.loads(zlib.decompress(row["data"]))
+            for row in conn.execute("SELECT source, data FROM collected")
+        }
+    finally:
+        conn.close()
+    return stored.get("rss", []) + stored.get("twitter", []), stored.get("defillama", [])
+
+
+def _digests(conn: sqlite3.Connection) -> Dict[str, str]:
+    return {row["source"]: row["digest"] for row in conn.execute("SELECT source, digest FROM collected")}
+
+
+def prepared_items(db_path: str = SCHEDULER_DB_PATH) -> Tuple[List[Dict], List[Dict]]:
+    """(articles, raises) prepared and indexed from the stored items, rebuilt only when they changed
+
+    The prepared set records the digests it was built from, so an output job
+    that overtakes a collector job in another worker rebuilds it rather than
+    delivering stale items. Each rebuild also saves a run snapshot of the raw
+    items, which /api/top ranks and --from-snapshot replays.
+    """
+    from main import prepare_items, update_indexes
+    from outputs.snapshots import save_snapshot
+
+    conn = connect(db_path)
+    try:
+        sources = _digests(conn)
+        row = conn.execute("SELECT sources, data FROM prepared WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    if row and json.loads(row["sources"]) == sources:
+        data = json.loads(zlib.decompress(row["data"]))
+        return data["articles"], data["raises"]
+
+    articles, raises = load_items(db_path)
+    try:
+        snapshot_id = save_snapshot(articles, raises, {"hours_back": HOURS_BACK, "raises_days": RAISES_DAYS})
+        print(f"[Scheduler] Saved snapshot {snapshot_id}")
+    except Exception as e:
+        print(f"[Scheduler] Error saving snapshot: {e}")
+    prepare_items(articles, raises)
+    update_indexes(articles, raises)
+    data = zlib.compress(json.dumps({"articles": articles, "raises": raises}).encode())
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO prepared (id, sources, built_at, data) VALUES (1, ?, ?, ?)",
+                (json.dumps(sources), datetime.now().isoformat(), data),
+            )
+    finally:
+        conn.close()
+    return articles, raises
+
+
+def collect(source: str) -> List[Dict]:
+    import collectors
+    if source == "rss":
+        return collectors.collect_all_feeds(hours_back=HOURS_BACK)
+    if source == "defillama":
+        return collectors.fetch_recent_raises(days_back=RAISES_DAYS)
+    if source == "twitter":
+        return [collectors.format_tweet_for_digest(t) for t in collectors.collect_twitter_feed(hours_back=HOURS_BACK)]
+    raise ValueError(f"unknown collector {source!r}")
+
+
+def run_job(name: str, db_path: str = SCHEDULER_DB_PATH):
+    """Run one job: a collector stores (and prepares) its items, an output delivers the prepared items"""
+    if name in COLLECTORS:
+        budget = os.getenv("RUN_DEADLINE")
+        deadline.start(parse_duration(budget) if budget else None)
+        try:
+            items = collect(name)
+            changed = store_items(name, items, db_path)
+            print(f"[Scheduler] {name}: {len(items)} items{'' if changed else ', unchanged'}")
+            if changed:
+                prepared_items(db_path)
+        finally:
+            deadline.clear()
+        return
+
+    from main import run_outputs
+    articles, raises = prepared_items(db_path)
+    run_outputs(
+        articles,
+        raises,
+        push_sheets=name == "sheets",
+        send_email=name == "email",
+        build_dashboard=name == "dashboard",
+    )
+
+
+def _finish(conn: sqlite3.Connection, name: str, error: Optional[str]):
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET finished_at = ?, status = ?, error = ? WHERE name = ?",
+            (datetime.now().isoformat(), "failed" if error else "ok", error, name),
+        )
+
+
+def run_scheduler(stop: Optional[threading.Event] = None, db_path: str = SCHEDULER_DB_PATH):
+    """Run due jobs one at a time, forever (or until stop is set)"""
+    stop = stop or threading.Event()
+    print(f"[Scheduler] Jobs: {', '.join(f'{name} ({describe(spec)})' for name, spec in enabled_jobs().items())}")
+    while not stop.is_set():
+        now = datetime.now()
+        conn = connect(db_path)
+        try:
+            states = {row["name"]: row for row in conn.execute("SELECT * FROM jobs")}
+            changes = _changes(conn)
+            plan = []
+            for name, spec in enabled_jobs().items():
+                planned = next_run(name, spec, states.get(name), now, changes)
+                if planned:
+                    plan.append((planned[1], name, planned[0]))
+            plan.sort()
+
+            ran = False
+            for run_at, name, slot in plan:
+                if run_at > now:
+                    break
+                if not claim(conn, name, slot):
+                    continue
+                ran = True
+                print(f"[Scheduler] Running {name} (slot {slot})")
+                error = None
+                try:
+                    run_job(name, db_path)
+                except Exception as e:
+                    error = str(e)
+                    print(f"[Scheduler] {name} failed: {e}")
+                _finish(conn, name, error)
+        finally:
+            conn.close()
+
+        if ran:
+            # Outputs may have become due while the collectors ran
+            continue
+        wait = min([TICK] + [run_at - datetime.now() for run_at, _, _ in plan])
+        stop.wait(max(wait.total_seconds(), 0.5))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    print(f"{'job':<10} {'next run':<20} {'cadence':<45} {'last status'}")
+    for job in upcoming():
+        last = f"{job['status']} at {job['last_finished'][:19]}" if job["last_finished"] else "never run"
+        print(f"{job['job']:<10} {job['next_run'] or '(waiting)':<20} {job['cadence']:<45} {last}")
@@ -0,0 +1,22 @@
+import json
+
+from outputs.archive import update_archive, tokenize, shard_for
+
+RAISE = {
+    "project": "Acme", "amount": "$5M", "amount_raw": 5, "round": None, "category": None, "chains": None,
+    "lead_investors": ["Paradigm"], "all_investors": ["Paradigm"], "date": "2026-10-18T00:00:00",
+    "source": "defillama",
+}
+
+
+def test_raises_with_null_fields_are_archived(tmp_path):
+    assert update_archive([], [RAISE]) == ["2026-10-18"]
+    assert update_archive([], [RAISE]) == []
+
+    page = (tmp_path / "docs" / "archive" / "2026-10-18.html").read_text()
+    assert "<strong>Acme</strong>" in page
+    assert "Unknown · Paradigm" in page
+
+    [token] = tokenize("paradigm")
+    shard = json.loads((tmp_path / "docs" / "search" / "2026-10" / f"{shard_for(token):02d}.json").read_text())
+    assert shard[token] == ["2026-10-18/r0"]
@@ -0,0 +1,73 @@
+import pytest
+
+from processing.deals import extract_deal, merge_deals
+
+
+def item(title, summary=""):
+    return {"title": title, "summary": summary, "published": "2026-10-19T08:00:00+00:00",
+            "source": "the_block", "link": "https://example.com/post"}
+
+
+@pytest.mark.parametrize("title, amount, amount_raw", [
+    ("Acme raises $1,500 million in funding", "$1.5B", 1500),
+    ("Acme raises $20M Series A", "$20M", 20),
+    ("Acme raises $2.5B growth round", "$2.5B", 2500),
+    ("Acme raises $500K pre-seed", "$500K", 0.5),
+    ("Acme raises US$1,250.5 million", "$1.2505B", 1250.5),
+])
+def test_usd_amounts(title, amount, amount_raw):
+    deal = extract_deal(item(title))
+    assert deal["amount"] == amount
+    assert deal["amount_raw"] == pytest.approx(amount_raw)
+    assert deal["currency"] == "USD"
+
+
+@pytest.mark.parametrize("title, amount, currency", [
+    ("Acme raises €1,5M seed round", "€1.5M", "EUR"),
+    ("Acme secures £30 million seed", "£30M", "GBP"),
+    ("Acme raises EUR 2,000 million", "€2B", "EUR"),
+])
+def test_other_currencies_keep_amount_raw_unset(title, amount, currency):
+    deal = extract_deal(item(title))
+    assert (deal["amount"], deal["amount_raw"], deal["currency"]) == (amount, 0, currency)
+
+
+def test_round_and_investors():
+    deal = extract_deal(item(
+        "Acme raises $20M Series A led by Paradigm and a16z crypto",
+        "The round saw participation from Coinbase Ventures, Dragonfly and others.",
+    ))
+    assert deal["round"] == "Series A"
+    assert deal["lead_investors"] == ["Paradigm", "a16z crypto"]
+    assert deal["all_investors"] == ["Paradigm", "a16z crypto", "Coinbase Ventures", "Dragonfly"]
+    assert deal["confirmed"] is True
+
+
+def test_round_keywords_only_count_in_the_title():
+    deal = extract_deal(item("Acme announces $20M token buyback", "Acme closed its seed round in 2021."))
+    assert deal["round"] == "Unknown"
+    assert deal["confirmed"] is False
+
+    assert extract_deal(item("Acme announces mainnet", "Acme closed its seed round in 2021.")) is None
+
+
+def test_unconfirmed_deals_only_enrich_existing_raises():
+    existing = {"project": "Acme", "amount": "Undisclosed", "amount_raw": 0, "round": "Seed",
+                "date": "2026-10-18T00:00:00+00:00", "lead_investors": [], "all_investors": []}
+    raises = [existing]
+    deals = [
+        extract_deal(item("Acme announces $20M token buyback")),
+        extract_deal(item("Other Labs announces $5M token buyback")),
+    ]
+
+    assert merge_deals(raises, deals) == {"enriched": 1, "added": 0}
+    assert raises == [existing]
+    assert (existing["amount"], existing["amount_raw"]) == ("$20M", 20)
+
+
+def test_confirmed_deals_are_added():
+    raises = []
+    deal = extract_deal(item("Other Labs raises $5M seed round"))
+
+    assert merge_deals(raises, [deal]) == {"enriched": 0, "added": 1}
+    assert raises == [deal]
@@ -0,0 +1,90 @@
+import functools
+import smtplib
+
+import pytest
+
+from benchmarks.fake_smtp_server import start_fake_smtp_server
+from outputs import email_digest
+from outputs.email_digest import SMTPPool, build_digest_message
+
+ARTICLES = [{
+    "title": f"Acme {i} raises $5M seed", "link": f"https://example.com/{i}", "source": "test",
+    "published": "2026-10-18T08:00:00", "summary": "", "categories": ["crypto" if i % 2 else "ai"],
+    "is_funding": True, "is_regulatory": False,
+} for i in range(6)]
+RAISES = [{
+    "project": "Acme", "amount": "$5M", "amount_raw": 5, "round": "Seed", "category": "DeFi",
+    "lead_investors": ["Paradigm"], "all_investors": ["Paradigm"], "chains": [], "date": "2026-10-18T00:00:00",
+}]
+
+
+@pytest.fixture
+def smtp(request, monkeypatch):
+    # No retry backoff; the stand-in drops connections on purpose
+    monkeypatch.setattr(email_digest.time, "sleep", lambda seconds: None)
+    server, mailbox, port = start_fake_smtp_server(drop_every=getattr(request, "param", 0))
+    yield mailbox, functools.partial(SMTPPool, host="127.0.0.1", port=port, use_ssl=False, send_interval=0)
+    server.shutdown()
+    server.server_close()
+
+
+def message(recipient: str) -> str:
+    return build_digest_message("digest@example.com", recipient, "<p>hi</p>", "hi")
+
+
+@pytest.mark.parametrize("smtp", [3], indirect=True)
+def test_dropped_connections_are_retried_until_every_message_is_delivered(smtp):
+    mailbox, pool_factory = smtp
+    recipients = [f"user{i}@example.com" for i in range(10)]
+
+    with pool_factory("digest@example.com", "secret") as pool:
+        for recipient in recipients:
+            pool.send(recipient, message(recipient))
+
+    assert mailbox.dropped > 0
+    assert sorted(m["to"][0] for m in mailbox.messages) == sorted(recipients)
+    assert mailbox.connections == mailbox.dropped + 1
+
+
+def test_reconnect_closes_the_failed_connection(smtp):
+    mailbox, pool_factory = smtp
+    with pool_factory("digest@example.com", "secret") as pool:
+        pool.send("a@example.com", message("a@example.com"))
+        stalled = pool._server
+
+        def timeout(*args, **kwargs):
+            raise TimeoutError("timed out")
+        stalled.sendmail = timeout
+        pool.send("b@example.com", message("b@example.com"))
+
+        assert pool._server is not stalled
+        assert stalled.sock is None
+    assert [m["to"] for m in mailbox.messages] == [["a@example.com"], ["b@example.com"]]
+
+
+@pytest.mark.parametrize("smtp", [1], indirect=True)
+def test_send_gives_up_after_the_last_retry(smtp):
+    mailbox, pool_factory = smtp
+
+    pool = pool_factory("digest@example.com", "secret", retries=2)
+    with pytest.raises((smtplib.SMTPException, OSError)):
+        pool.send("a@example.com", message("a@example.com"))
+
+    assert pool._server is None
+    assert mailbox.dropped == 2
+    assert mailbox.messages == []
+
+
+@pytest.mark.parametrize("smtp", [4], indirect=True)
+def test_send_digest_email_delivers_each_profile_once_per_recipient(smtp, monkeypatch):
+    mailbox, pool_factory = smtp
+    monkeypatch.setattr(email_digest, "SMTPPool", pool_factory)
+    monkeypatch.setenv("EMAIL_SENDER", "digest@example.com")
+    monkeypatch.setenv("EMAIL_PASSWORD", "secret")
+    recipients = [f"user{i}@example.com:{'ai' if i % 2 else 'crypto'}" for i in range(8)]
+
+    failed = email_digest.send_digest_email(ARTICLES, RAISES, ",".join(recipients))
+
+    assert failed == []
+    assert mailbox.dropped > 0
+    assert sorted(m["to"][0] for m in mailbox.messages) == sorted(r.split(":")[0] for r in recipients)
@@ -0,0 +1,105 @@
+import pytest
+
+from benchmarks.fake_sheets_server import start_fake_sheets_server
+from outputs.google_sheets import (
+    use_local_sheets_endpoint, push_tabs, article_to_row, raise_to_row, article_row_keys, raise_row_keys,
+    ARTICLE_HEADERS, RAISE_HEADERS,
+)
+
+
+@pytest.fixture
+def sheets():
+    server, store, endpoint = start_fake_sheets_server()
+    use_local_sheets_endpoint(endpoint)
+    yield store
+    server.shutdown()
+    server.server_close()
+
+
+def article(i: int, link: str = None, title: str = None) -> dict:
+    return {
+        "title": title or f"Article {i}", "link": link or f"https://example.com/post/{i}", "source": "test",
+        "published": f"2026-10-{1 + i:02d}T08:00:00", "categories": ["crypto"],
+        "is_funding": False, "is_regulatory": False,
+    }
+
+
+def push_articles(articles):
+    rows = [article_to_row(a) for a in articles]
+    return push_tabs("book", [("News", ARTICLE_HEADERS, rows, article_row_keys)], mode="sync")["News"]
+
+
+def test_sync_appends_only_new_rows(sheets):
+    assert push_articles([article(1), article(2)]) == (2, 0)
+    assert push_articles([article(2), article(3)]) == (1, 0)
+
+    rows = sheets.sheet("book", "News")
+    assert rows[0] == ARTICLE_HEADERS
+    assert [row[6] for row in rows[1:]] == [f"https://example.com/post/{i}" for i in (1, 2, 3)]
+
+
+def test_sync_matches_link_variants_and_keeps_the_original_link(sheets):
+    push_articles([article(1, link="https://www.example.com/post/1?utm_source=rss&utm_medium=rss")])
+    appended, patched = push_articles([article(1, link="https://example.com/post/1", title="Article 1 (updated)")])
+
+    assert (appended, patched) == (0, 1)
+    rows = sheets.sheet("book", "News")
+    assert len(rows) == 2
+    assert rows[1][2] == "Article 1 (updated)"
+    assert rows[1][6] == "https://example.com/post/1"
+
+
+def test_unchanged_sync_writes_nothing(sheets):
+    push_articles([article(1), article(2)])
+    sheets.requests.clear()
+
+    assert push_articles([article(1), article(2)]) == (0, 0)
+    assert sheets.requests["batchGet"] == 1
+    assert "batchUpdate" not in sheets.requests
+
+
+def test_raise_rows_are_keyed_by_project_date_and_round(sheets):
+    raise_data = {"project": "Acme", "amount": "$5M", "round": "Seed", "category": "DeFi",
+                  "lead_investors": ["Paradigm"], "chains": [], "date": "2026-10-02T00:00:00"}
+    tab = lambda raises: push_tabs(
+        "book", [("Funding Rounds", RAISE_HEADERS, [raise_to_row(r) for r in raises], raise_row_keys)], mode="sync",
+    )["Funding Rounds"]
+
+    assert tab([raise_data]) == (1, 0)
+    assert tab([{**raise_data, "amount": "$6M"}]) == (0, 1)
+    assert tab([{**raise_data, "round": "Series A"}]) == (1, 0)
+    assert len(sheets.sheet("book", "Funding Rounds")) == 3
+
+
+def test_raise_rows_with_null_fields_sync_as_unchanged(sheets):
+    raise_data = {"project": "Acme", "amount": "$5M", "round": None, "category": None,
+                  "lead_investors": ["Paradigm"], "chains": [], "date": "2026-10-02T00:00:00"}
+    tab = lambda: push_tabs(
+        "book", [("Funding Rounds", RAISE_HEADERS, [raise_to_row(raise_data)], raise_row_keys)], mode="sync",
+    )["Funding Rounds"]
+
+    assert tab() == (1, 0)
+    assert tab() == (0, 0)
+    assert sheets.sheet("book", "Funding Rounds")[1][3:5] == ["", ""]
+
+
+def test_sync_reads_the_redirect_cache_once_per_tab(sheets, monkeypatch):
+    from processing import urls
+
+    conn = urls.connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO resolved (url, target, resolved_at) VALUES (?, ?, datetime('now', 'localtime'))",
+            [(f"https://feedproxy.google.com/~r/example/{i}", f"https://example.com/post/{i}") for i in range(3)],
+        )
+    conn.close()
+    lookups = []
+    cached_targets = urls.cached_targets
+    monkeypatch.setattr(urls, "cached_targets", lambda u, *a: lookups.append(list(u)) or cached_targets(u, *a))
+
+    push_articles([article(i, link=f"https://feedproxy.google.com/~r/example/{i}") for i in range(3)])
+    lookups.clear()
+    # The resolved links match the redirect rows; only their Link cells are patched
+    assert push_articles([article(i) for i in range(3)]) == (0, 3)
+    # One lookup for the rows read back from the sheet, one for the new rows (none of which redirect)
+    assert [len(urls) for urls in lookups] == [3, 0]
@@ -0,0 +1,25 @@
+from processing.linking import raise_key, link_raises
+
+NULL_ROUND = {
+    "project": "Acme", "amount": "$5M", "amount_raw": 5, "round": None, "category": None,
+    "lead_investors": ["Paradigm"], "all_investors": ["Paradigm"],
+    "date": "2026-10-18T00:00:00", "source": "defillama", "chains": [],
+}
+
+
+def test_raise_key_treats_null_fields_as_empty():
+    assert raise_key(NULL_ROUND) == "Acme|2026-10-18|"
+    assert raise_key({"project": None, "date": None, "round": None}) == "||"
+    assert raise_key(NULL_ROUND) == raise_key({**NULL_ROUND, "round": ""})
+
+
+def test_null_round_raise_is_linked():
+    article = {
+        "title": "Acme raises $5M led by Paradigm", "summary": "", "link": "https://example.com/acme",
+        "source": "the_block", "published": "2026-10-18T09:00:00", "is_funding": True,
+    }
+    raises = [dict(NULL_ROUND)]
+
+    assert link_raises([article], raises) == 1
+    assert raises[0]["coverage_count"] == 1
+    assert article["round"]["project"] == "Acme"
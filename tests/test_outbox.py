@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from outputs import outbox
+from outputs.outbox import DeliveryError, enqueue_run, deliver_run, drain_outbox, replay_run, outbox_status
+
+ARTICLES = [{
+    "title": "Acme raises $5M seed", "link": "https://example.com/acme", "source": "test",
+    "published": "2026-10-18T08:00:00", "summary": "", "categories": ["crypto"],
+    "is_funding": True, "is_regulatory": False,
+}]
+RAISES = [{"project": "Acme", "amount": "$5M", "amount_raw": 5, "round": "Seed", "date": "2026-10-18T00:00:00"}]
+
+
+class Handler:
+    """Stand-in delivery handler that fails a set number of times first"""
+
+    def __init__(self, failures: int = 0, error: Exception = None):
+        self.failures = failures
+        self.error = error or RuntimeError("service unavailable")
+        self.calls = []
+
+    def __call__(self, articles, raises, options):
+        self.calls.append(options)
+        if len(self.calls) <= self.failures:
+            raise self.error
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    handler = Handler()
+    monkeypatch.setitem(outbox.DELIVERY_HANDLERS, "sheets", handler)
+    return handler
+
+
+def status(run_id: str, output: str = "sheets") -> dict:
+    return next(e for e in outbox_status() if e["run_id"] == run_id and e["output"] == output)
+
+
+def make_due(run_id: str):
+    conn = outbox.connect()
+    with conn:
+        conn.execute("UPDATE deliveries SET next_attempt = ? WHERE run_id = ?",
+                     ((datetime.now() - timedelta(seconds=1)).isoformat(), run_id))
+    conn.close()
+
+
+def test_failed_delivery_is_retried_after_its_backoff(sheets):
+    sheets.failures = 1
+    run_id = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+
+    assert deliver_run(run_id, "sheets") is False
+    entry = status(run_id)
+    assert (entry["status"], entry["attempts"], entry["last_error"]) == ("pending", 1, "service unavailable")
+    assert entry["next_attempt"] > datetime.now().isoformat()
+
+    assert drain_outbox() == {"delivered": 0, "failed": 0}
+    make_due(run_id)
+    assert drain_outbox() == {"delivered": 1, "failed": 0}
+    assert status(run_id)["status"] == "delivered"
+    assert len(sheets.calls) == 2
+
+
+def test_delivery_gives_up_after_max_attempts(sheets):
+    sheets.failures = outbox.MAX_ATTEMPTS
+    run_id = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+
+    deliver_run(run_id, "sheets")
+    for _ in range(outbox.MAX_ATTEMPTS - 1):
+        make_due(run_id)
+        drain_outbox()
+
+    entry = status(run_id)
+    assert (entry["status"], entry["attempts"]) == ("failed", outbox.MAX_ATTEMPTS)
+    make_due(run_id)
+    assert drain_outbox() == {"delivered": 0, "failed": 0}
+    assert drain_outbox(force=True) == {"delivered": 1, "failed": 0}
+
+
+def test_partial_failure_retries_only_what_is_left(monkeypatch):
+    handler = Handler(failures=1, error=DeliveryError("1 recipient(s) failed", {"recipients": "b@example.com"}))
+    monkeypatch.setitem(outbox.DELIVERY_HANDLERS, "email", handler)
+    run_id = enqueue_run(ARTICLES, RAISES, {"email": {"recipients": "a@example.com,b@example.com"}})
+
+    deliver_run(run_id, "email")
+    make_due(run_id)
+    drain_outbox()
+
+    assert handler.calls[0]["recipients"] == "a@example.com,b@example.com"
+    assert handler.calls[1]["recipients"] == "b@example.com"
+    assert status(run_id, "email")["status"] == "delivered"
+
+
+def test_unchanged_content_is_skipped(sheets):
+    first = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    assert deliver_run(first, "sheets")
+
+    # Only a volatile counter differs: nothing new to show
+    recounted = [{**ARTICLES[0], "engagement": 42, "metrics": {"like_count": 40, "retweet_count": 2}}]
+    second = enqueue_run(recounted, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    assert deliver_run(second, "sheets")
+    assert status(second)["status"] == "unchanged"
+    assert len(sheets.calls) == 1
+
+    changed = [{**ARTICLES[0], "title": "Acme raises $6M seed"}]
+    third = enqueue_run(changed, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    assert deliver_run(third, "sheets")
+    assert status(third)["status"] == "delivered"
+    assert len(sheets.calls) == 2
+
+
+def test_corrected_publish_date_is_delivered(sheets):
+    first = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(first, "sheets")
+
+    redated = [{**ARTICLES[0], "published": "2026-10-19T09:30:00"}]
+    second = enqueue_run(redated, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    assert deliver_run(second, "sheets")
+    assert status(second)["status"] == "delivered"
+    assert len(sheets.calls) == 2
+
+
+def test_replay_delivers_even_when_unchanged(sheets):
+    run_id = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(run_id, "sheets")
+
+    assert replay_run(run_id) == {"delivered": 1, "failed": 0}
+    assert status(run_id)["status"] == "delivered"
+    assert len(sheets.calls) == 2
+    assert "content_hash" in sheets.calls[-1]
+
+
+def test_retry_is_superseded_by_a_newer_run(sheets):
+    sheets.failures = 1
+    old_run = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(old_run, "sheets")
+    newer = [{**ARTICLES[0], "title": "Acme raises $6M seed"}]
+    new_run = enqueue_run(newer, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    assert deliver_run(new_run, "sheets") is True
+
+    make_due(old_run)
+    assert drain_outbox() == {"delivered": 0, "failed": 0}
+    assert status(old_run)["status"] == "superseded"
+    assert len(sheets.calls) == 2
+
+
+def test_retry_is_superseded_by_a_queued_newer_run(sheets):
+    sheets.failures = outbox.MAX_ATTEMPTS
+    old_run = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(old_run, "sheets")
+    sheets.failures = 0
+    new_run = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "other"}})
+
+    make_due(old_run)
+    assert drain_outbox() == {"delivered": 1, "failed": 0}
+    assert status(old_run)["status"] == "superseded"
+    assert status(new_run)["status"] == "delivered"
+    assert [call["spreadsheet_id"] for call in sheets.calls] == ["book", "other"]
+
+
+def test_only_the_newest_pending_retry_is_sent(sheets):
+    sheets.failures = 2
+    old_run = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(old_run, "sheets")
+    new_run = enqueue_run(ARTICLES, RAISES, {"sheets": {"spreadsheet_id": "book"}})
+    deliver_run(new_run, "sheets")
+
+    # Both are pending: the newer one supersedes the older, which is never sent again
+    make_due(old_run)
+    make_due(new_run)
+    assert drain_outbox() == {"delivered": 1, "failed": 0}
+    assert (status(old_run)["status"], status(new_run)["status"]) == ("superseded", "delivered")
+    assert len(sheets.calls) == 3
@@ -0,0 +1,51 @@
+from datetime import date
+
+from processing.rollups import update_rollups, window_stats
+from processing.investors import update_investor_graph, load_graph
+
+END = date(2026, 10, 19)
+
+
+def raise_(project, amount, day="2026-10-18", **fields):
+    return {"project": project, "amount": f"${amount}M", "amount_raw": amount, "round": "Seed",
+            "category": "DeFi", "chains": ["Ethereum"], "lead_investors": ["Paradigm"],
+            "all_investors": ["Paradigm"], "date": f"{day}T00:00:00", "source": "defillama", **fields}
+
+
+def stats(dim):
+    return {s["value"]: (s["count"], s["total"]) for s in window_stats(dim, days=7, end=END)}
+
+
+def test_raises_with_null_fields_are_rolled_up():
+    raises = [raise_("Acme", 5, round=None, category=None, chains=None), raise_("Beta", 8)]
+
+    assert update_rollups(raises) == 2
+    assert stats("sector") == {"crypto": (2, 13.0)}
+    assert stats("round") == {"Unknown": (1, 5.0), "Seed": (1, 8.0)}
+    assert stats("category") == {"DeFi": (1, 8.0)}
+
+
+def test_raises_with_null_fields_reach_the_investor_graph():
+    assert update_investor_graph([raise_("Acme", 5, round=None, category=None)]) == 1
+    assert load_graph().active_investors(days=7, end=END)[0]["name"] == "Paradigm"
+
+
+def test_headline_deals_are_not_counted_beside_the_defillama_record():
+    from processing.deals import extract_deal
+
+    deal = extract_deal({"title": "Acme raises $5M seed round led by Paradigm", "summary": "",
+                         "published": "2026-10-16T09:00:00", "source": "the_block", "link": "https://example.com/acme"})
+    assert update_rollups([deal, raise_("Beta", 8)]) == 1
+    # DefiLlama lists Acme's round two days after the article
+    assert update_rollups([raise_("Acme", 5)]) == 1
+    assert stats("all") == {"all": (2, 13.0)}
+
+
+def test_headline_deals_are_not_added_to_the_investor_graph():
+    from processing.deals import extract_deal
+
+    deal = extract_deal({"title": "Acme raises $5M seed round led by Paradigm", "summary": "",
+                         "published": "2026-10-16T09:00:00", "source": "the_block", "link": "https://example.com/acme"})
+    assert update_investor_graph([deal]) == 0
+    assert update_investor_graph([raise_("Acme", 5)]) == 1
+    assert load_graph().active_investors(days=7, end=END)[0]["deals"] == 1
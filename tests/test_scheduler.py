@@ -0,0 +1,57 @@
+import pytest
+
+import scheduler
+
+
+def article(title, published="2026-10-19T08:00:00+00:00"):
+    return {
+        "title": title, "link": f"https://example.com/{title.lower().replace(' ', '-')}", "source": "the_block",
+        "published": published, "summary": "", "categories": ["funding", "crypto"],
+        "is_funding": True, "is_regulatory": False,
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ENABLE_SCHEDULER", "false")
+    import app
+    return app.app.test_client()
+
+
+@pytest.fixture
+def collected(monkeypatch):
+    """What the next rss collector run returns"""
+    items = []
+    monkeypatch.setattr(scheduler, "collect", lambda source: list(items))
+    return items
+
+
+def top_titles(client):
+    response = client.get("/api/top?section=funding")
+    assert response.status_code == 200
+    return response.get_json()["snapshot"], [item["title"] for item in response.get_json()["sections"]["funding"]]
+
+
+def test_collector_jobs_move_api_top_forward(client, collected):
+    assert client.get("/api/top").status_code == 503
+
+    collected.append(article("Acme raises $5M seed"))
+    scheduler.run_job("rss")
+    first, titles = top_titles(client)
+    assert titles == ["Acme raises $5M seed"]
+
+    collected.append(article("Beta raises $8M Series A", "2026-10-19T09:00:00+00:00"))
+    scheduler.run_job("rss")
+    second, titles = top_titles(client)
+    assert second > first
+    assert set(titles) == {"Acme raises $5M seed", "Beta raises $8M Series A"}
+
+
+def test_unchanged_collections_add_no_snapshot(collected):
+    from outputs.snapshots import list_snapshots
+
+    collected.append(article("Acme raises $5M seed"))
+    scheduler.run_job("rss")
+    scheduler.run_job("rss")
+    scheduler.run_job("dashboard")
+    assert len(list_snapshots()) == 1
@@ -0,0 +1,17 @@
+from outputs.search_index import index_items, search_items
+
+RAISES = [
+    {"project": "Acme", "amount": "$5M", "round": None, "category": None, "chains": None,
+     "lead_investors": ["Paradigm"], "all_investors": None, "date": "2026-10-18T00:00:00", "source": "defillama"},
+    {"project": "Beta", "amount": "$8M", "round": "Series A", "category": "DeFi", "chains": ["Ethereum"],
+     "lead_investors": ["Dragonfly"], "all_investors": ["Dragonfly"], "date": "2026-10-18T00:00:00",
+     "source": "defillama"},
+]
+
+
+def test_raises_with_null_fields_are_indexed_with_the_rest_of_the_batch():
+    assert index_items([], RAISES) == 2
+
+    [acme] = search_items("paradigm")
+    assert acme["title"] == "Acme raises $5M ()"
+    assert [r["title"] for r in search_items("dragonfly")] == ["Beta raises $8M (Series A)"]
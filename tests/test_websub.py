@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from collectors import rss_collector, websub
+
+SOURCE = "the_block"
+TOPIC = "https://www.theblock.co/rss.xml"
+HUB = "https://hub.example.com/"
+
+
+def feed(*titles) -> bytes:
+    published = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    items = "".join(
+        f"<item><title>{title}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>{published}</pubDate><description>{title}</description></item>"
+        for i, title in enumerate(titles)
+    )
+    return (
+        "<?xml version='1.0'?><rss version='2.0' xmlns:atom='http://www.w3.org/2005/Atom'><channel>"
+        f"<title>The Block</title><atom:link rel='hub' href='{HUB}'/><atom:link rel='self' href='{TOPIC}'/>"
+        f"{items}</channel></rss>"
+    ).encode()
+
+
+class Response:
+    ok = True
+    url = TOPIC
+    headers = {"Content-Type": "application/rss+xml"}
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def iter_content(self, size):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def only_the_block(monkeypatch):
+    monkeypatch.setattr(rss_collector, "all_feeds", lambda: {SOURCE: TOPIC})
+
+
+def serve(monkeypatch, body: bytes):
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return Response(body)
+    monkeypatch.setattr(rss_collector.requests, "get", get)
+    return calls
+
+
+def verify_subscription():
+    conn = websub.connect()
+    with conn:
+        conn.execute("UPDATE subscriptions SET state = 'verified', lease_expires = ? WHERE source = ?",
+                     ((datetime.now() + timedelta(days=7)).isoformat(), SOURCE))
+    conn.close()
+
+
+def test_polled_items_are_served_while_the_feed_is_pushed(only_the_block, monkeypatch):
+    serve(monkeypatch, feed("Acme raises $5M seed", "Beta raises $8M Series A"))
+    assert len(rss_collector.collect_all_feeds()) == 2
+    verify_subscription()
+
+    # The feed is now pushed, so it is not fetched; its polled items still come through
+    calls = serve(monkeypatch, feed())
+    articles = rss_collector.collect_all_feeds()
+    assert calls == []
+    assert sorted(a["title"] for a in articles) == ["Acme raises $5M seed", "Beta raises $8M Series A"]
+    assert all(a["is_funding"] for a in articles)
+
+
+def test_polled_and_pushed_items_are_merged(only_the_block, monkeypatch):
+    serve(monkeypatch, feed("Acme raises $5M seed"))
+    rss_collector.collect_all_feeds()
+    verify_subscription()
+
+    pushed = websub.ingest_push(SOURCE, feed("Acme raises $5M seed", "Gamma launches mainnet"))
+    assert [a["title"] for a in pushed] == ["Gamma launches mainnet"]
+    assert sorted(a["title"] for a in rss_collector.collect_all_feeds()) == [
+        "Acme raises $5M seed", "Gamma launches mainnet",
+    ]
+
+
+@pytest.fixture
+def discovered():
+    websub.record_hub(SOURCE, HUB, TOPIC)
+
+
+def state() -> str:
+    return next(s["state"] for s in websub.subscription_status() if s["source"] == SOURCE)
+
+
+def accepted() -> requests.Response:
+    response = requests.Response()
+    response.status_code = 202
+    return response
+
+
+def verification(**params) -> dict:
+    return {"hub.mode": "subscribe", "hub.topic": TOPIC, "hub.challenge": "c0ffee", **params}
+
+
+def test_hub_can_verify_while_the_subscribe_request_is_open(discovered, monkeypatch):
+    answers = []
+
+    def post(url, data, timeout):
+        # Hubs commonly verify synchronously, before answering the POST
+        answers.append(websub.verify_intent(SOURCE, verification(**{"hub.lease_seconds": "3600"})))
+        return accepted()
+    monkeypatch.setattr(websub.requests, "post", post)
+
+    assert websub.request_subscription(SOURCE) is True
+    assert answers == ["c0ffee"]
+    assert state() == "verified"
+
+
+def test_a_failed_subscribe_request_restores_the_previous_state(discovered, monkeypatch):
+    def post(url, data, timeout):
+        raise requests.ConnectionError("hub down")
+    monkeypatch.setattr(websub.requests, "post", post)
+
+    assert websub.request_subscription(SOURCE) is False
+    assert state() == "discovered"
+    assert websub.verify_intent(SOURCE, verification()) is None
+
+
+def test_malformed_lease_is_refused(discovered, monkeypatch):
+    monkeypatch.setattr(websub.requests, "post", lambda url, data, timeout: accepted())
+    websub.request_subscription(SOURCE)
+
+    monkeypatch.setenv("ENABLE_SCHEDULER", "false")
+    from app import app
+    params = verification(**{"hub.lease_seconds": "soon"})
+    response = app.test_client().get(f"/websub/callback/{SOURCE}", query_string=params)
+    assert response.status_code == 404
+    assert state() == "pending"
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from collectors import workqueue
+from collectors.workqueue import (
+    enqueue_collection, lease_task, complete_task, fail_task, gather_run, run_summary, failed_tasks,
+)
+
+
+@pytest.fixture
+def run_id(monkeypatch):
+    monkeypatch.setattr(workqueue, "plan_tasks", lambda include_twitter=True: (
+        [("feed", "alpha", "https://alpha.example/feed"), ("feed", "beta", "https://beta.example/feed")], [],
+    ))
+    return enqueue_collection(include_twitter=False)
+
+
+@pytest.fixture
+def conn():
+    conn = workqueue.connect()
+    yield conn
+    conn.close()
+
+
+def article(title):
+    return {"title": title, "published": "2026-10-19T08:00:00+00:00"}
+
+
+def expire_leases(monkeypatch):
+    """Leases taken from now on are visible again immediately"""
+    monkeypatch.setattr(workqueue, "LEASE_SECONDS", -1)
+
+
+def test_a_leased_task_is_hidden_from_other_workers(run_id, conn):
+    first = lease_task("w1", run_id, conn)
+    second = lease_task("w2", run_id, conn)
+
+    assert (first["name"], second["name"]) == ("alpha", "beta")
+    assert lease_task("w3", run_id, conn) is None
+
+
+def test_an_expired_lease_is_handed_to_another_worker(run_id, conn, monkeypatch):
+    expire_leases(monkeypatch)
+    stale = lease_task("w1", run_id, conn)
+    current = lease_task("w2", run_id, conn)
+
+    assert current["id"] == stale["id"]
+    assert (current["worker"], current["attempts"]) == ("w2", 2)
+    assert current["lease_id"] != stale["lease_id"]
+
+
+def test_complete_task_rejects_a_stale_lease(run_id, conn, monkeypatch):
+    expire_leases(monkeypatch)
+    stale = lease_task("w1", run_id, conn)
+    monkeypatch.setattr(workqueue, "LEASE_SECONDS", 300)
+    current = lease_task("w2", run_id, conn)
+
+    assert complete_task(conn, stale, {"articles": [article("from w1")]}) is False
+    assert fail_task(conn, stale, "too late") is False
+    assert complete_task(conn, current, {"articles": [article("from w2")]}) is True
+    assert complete_task(conn, current, {"articles": [article("again")]}) is False
+
+    articles, _, _ = gather_run(run_id)
+    assert [a["title"] for a in articles] == ["from w2"]
+
+
+def test_a_task_fails_once_its_last_lease_expires(run_id, conn, monkeypatch):
+    expire_leases(monkeypatch)
+    for _ in range(workqueue.MAX_ATTEMPTS):
+        task = lease_task("w1", run_id, conn)
+        assert task["name"] == "alpha"
+
+    # The next lease call expires alpha's last lease and moves on
+    assert lease_task("w1", run_id, conn)["name"] == "beta"
+    failed = failed_tasks(run_id)
+    assert [(t["name"], t["last_error"]) for t in failed] == [("alpha", "lease expired")]
+    assert run_summary(run_id)["failed"] == 1
+
+
+def test_a_failed_task_waits_out_its_backoff(run_id, conn):
+    task = lease_task("w1", run_id, conn)
+    assert fail_task(conn, task, "HTTP 503") is True
+
+    # alpha is queued again but not yet visible
+    assert lease_task("w1", run_id, conn)["name"] == "beta"
+    assert lease_task("w1", run_id, conn) is None
+    assert run_summary(run_id) == {"queued": 1, "leased": 1}
+
+
+@pytest.fixture
+def expired_run(monkeypatch):
+    monkeypatch.setattr(workqueue, "plan_tasks", lambda include_twitter=True: (
+        [("feed", "gamma", "https://gamma.example/feed")], [],
+    ))
+    run_id = enqueue_collection(include_twitter=False)
+    conn = workqueue.connect()
+    with conn:
+        conn.execute("UPDATE runs SET params = json_set(params, '$.deadline', ?) WHERE run_id = ?",
+                     (time.time() - 1, run_id))
+    conn.close()
+    return run_id
+
+
+def test_no_task_is_leased_past_the_run_deadline(run_id, expired_run, conn):
+    assert lease_task("w1", expired_run, conn) is None
+    # Other runs are still served
+    assert lease_task("w1", None, conn)["run_id"] == run_id
+
+
+def test_worker_stops_at_the_run_deadline(expired_run, monkeypatch):
+    monkeypatch.setattr(workqueue, "run_task", lambda task, params: pytest.fail("task run past the deadline"))
+
+    assert workqueue.run_worker(expired_run, "w1") == 0
+    assert run_summary(expired_run) == {"queued": 1}
+    assert workqueue.cancel_run(expired_run) == [{"kind": "feed", "name": "gamma"}]